@@ -0,0 +1,219 @@
+"""
+Simulador de autojuego del Tres en Raya para evaluar la IA.
+
+Juega sin conexión lotes de cientos de miles de partidas a la vez: cada lote
+es un par de vectores de NumPy con las máscaras de bits de los dos jugadores
+(ver tictactoe_engine.py), y todas sus partidas avanzan juntas jugada a
+jugada. La detección del ganador se vectoriza sobre las ocho líneas, y las
+jugadas de la IA salen de la tabla negamax del motor convertida en una matriz
+de puntuaciones por posición. Las partidas terminadas salen del lote.
+
+Enfrenta estrategias ('aleatoria' o un nivel de la IA: 'facil', 'normal',
+'dificil') y mide el porcentaje de victorias, empates y derrotas y las
+partidas por segundo:
+
+    python bench_ai.py --partidas 1000000
+    python bench_ai.py --x dificil --o aleatoria --partidas 5000000 --salida ia.json
+
+Con --escalar N juega además N partidas de cada enfrentamiento partida a
+partida con un motor escalar (tictactoe_engine por defecto, el que usa el bot,
+o el módulo de --motor con la misma interfaz: `best_move` e `is_winner`). Así se comparan tanto la fuerza como el
+rendimiento de un motor que los sustituya.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import platform
+import random
+import subprocess
+import time
+
+import numpy as np
+
+import tictactoe_engine
+
+CASILLAS = np.arange(9, dtype=np.uint16)
+BITS = (1 << CASILLAS).astype(np.uint16)
+LINEAS = np.array(tictactoe_engine.LINEAS_GANADORAS, dtype=np.uint16)
+ILEGAL = -128  # Puntuación de las casillas ocupadas en la matriz de la IA
+
+# Resultados de una partida
+EMPATE, GANA_X, GANA_O = 0, 1, 2
+
+# --- TABLERO VECTORIZADO ---
+def winners(mascaras: np.ndarray) -> np.ndarray:
+    """Qué máscaras (vector de uint16) contienen alguna de las ocho líneas ganadoras."""
+    return ((mascaras[:, None] & LINEAS) == LINEAS).any(axis=1)
+
+def free_cells(propia: np.ndarray, rival: np.ndarray) -> np.ndarray:
+    """Matriz (n, 9) de booleanos: casillas libres de cada tablero."""
+    return ((propia | rival)[:, None] >> CASILLAS) & 1 == 0
+
+def _score_matrix() -> np.ndarray:
+    """
+    La tabla negamax del motor como matriz: fila `propia | rival << 9`, una
+    columna por casilla con su puntuación para quien mueve (ILEGAL si no se
+    puede jugar ahí). Ocupa 2,3 MB; las posiciones no alcanzables quedan ILEGAL.
+    """
+    filas, casillas, puntuaciones = [], [], []
+    for (propia, rival), jugadas in tictactoe_engine.TABLA.items():
+        for casilla, puntuacion in jugadas:
+            filas.append(propia | rival << 9)
+            casillas.append(casilla)
+            puntuaciones.append(puntuacion)
+    matriz = np.full((1 << 18, 9), ILEGAL, dtype=np.int8)
+    matriz[filas, casillas] = puntuaciones
+    return matriz
+
+PUNTUACIONES = _score_matrix()
+
+def _sample(pesos: np.ndarray, azar: np.random.Generator) -> np.ndarray:
+    """Elige una columna por fila con probabilidad proporcional a su peso."""
+    acumulados = pesos.cumsum(axis=1)
+    umbral = azar.random(len(pesos)) * acumulados[:, -1]
+    return (acumulados <= umbral[:, None]).sum(axis=1)
+
+# --- ESTRATEGIAS ---
+# Una estrategia recibe las máscaras de quien mueve y de su rival (solo de las
+# partidas que siguen en juego) y devuelve la casilla elegida en cada una.
+def random_player(propia: np.ndarray, rival: np.ndarray, azar: np.random.Generator) -> np.ndarray:
+    """Juega en una casilla libre al azar."""
+    claves = np.where(free_cells(propia, rival), azar.random((len(propia), 9)), -1.0)
+    return claves.argmax(axis=1)
+
+def engine_player(nivel: str):
+    """Estrategia equivalente a `tictactoe_engine.best_move(propia, rival, nivel)`, vectorizada."""
+    pesos_nivel = tictactoe_engine.NIVELES[nivel]
+    perfecta = pesos_nivel == tictactoe_engine.NIVELES["dificil"]
+    gana, empata, pierde = pesos_nivel
+
+    def jugar(propia: np.ndarray, rival: np.ndarray, azar: np.random.Generator) -> np.ndarray:
+        puntos = PUNTUACIONES[propia.astype(np.int32) | rival.astype(np.int32) << 9]
+        legales = puntos != ILEGAL
+        if perfecta:
+            # Al azar entre las de mejor puntuación, como best_move
+            pesos = puntos == puntos.max(axis=1, keepdims=True)
+        else:
+            pesos = np.where(puntos > 0, gana, np.where(puntos == 0, empata, pierde)) * legales
+        return _sample(pesos.astype(np.float32), azar)
+    return jugar
+
+ESTRATEGIAS = {'aleatoria': random_player}
+ESTRATEGIAS.update((nivel, engine_player(nivel)) for nivel in tictactoe_engine.NIVELES)
+
+def play_batch(jugador_x, jugador_o, n: int, azar: np.random.Generator) -> np.ndarray:
+    """Juega `n` partidas a la vez y devuelve el resultado de cada una (EMPATE, GANA_X o GANA_O)."""
+    mascaras = np.zeros((2, n), dtype=np.uint16)
+    resultados = np.full(n, EMPATE, dtype=np.int8)
+    activas = np.arange(n)
+    jugadores = (jugador_x, jugador_o)
+    for turno in range(9):
+        j = turno & 1
+        propia = mascaras[j, activas]
+        casillas = jugadores[j](propia, mascaras[1 - j, activas], azar)
+        propia |= BITS[casillas]
+        mascaras[j, activas] = propia
+        ganan = winners(propia)
+        resultados[activas[ganan]] = GANA_X + j
+        activas = activas[~ganan]
+        if not len(activas):
+            break
+    return resultados  # Las que siguen activas tras la novena jugada son empates
+
+# --- MOTOR ESCALAR ---
+def play_scalar(motor, x: str, o: str, n: int) -> np.ndarray:
+    """Juega `n` partidas una a una con `motor.best_move` y `motor.is_winner`."""
+    resultados = np.full(n, EMPATE, dtype=np.int8)
+    niveles = (x, o)
+    for i in range(n):
+        mascaras = [0, 0]
+        for turno in range(9):
+            j = turno & 1
+            if niveles[j] == 'aleatoria':
+                ocupadas = mascaras[0] | mascaras[1]
+                casilla = random.choice([c for c in range(9) if not ocupadas >> c & 1])
+            else:
+                casilla = motor.best_move(mascaras[j], mascaras[1 - j], niveles[j])
+            mascaras[j] |= 1 << casilla
+            if motor.is_winner(mascaras[j]):
+                resultados[i] = GANA_X + j
+                break
+    return resultados
+
+# --- INFORME ---
+def summarize(x: str, o: str, resultados: np.ndarray, duracion: float, **extra) -> dict:
+    cuentas = np.bincount(resultados, minlength=3)
+    n = len(resultados)
+    return {
+        'x': x,
+        'o': o,
+        **extra,
+        'partidas': n,
+        'gana_x': cuentas[GANA_X] / n,
+        'empate': cuentas[EMPATE] / n,
+        'gana_o': cuentas[GANA_O] / n,
+        'partidas_por_segundo': n / duracion if duracion else 0.0,
+    }
+
+def matchups(args) -> list:
+    """Enfrentamientos a jugar: los indicados, o cada nivel contra el azar (en los dos lados) y contra cada nivel."""
+    if args.x or args.o:
+        return [(args.x or 'aleatoria', args.o or 'aleatoria')]
+    niveles = list(tictactoe_engine.NIVELES)
+    return ([(nivel, 'aleatoria') for nivel in niveles] + [('aleatoria', nivel) for nivel in niveles]
+            + list(itertools.product(niveles, repeat=2)))
+
+def ejecutar(args) -> dict:
+    azar = np.random.default_rng(args.semilla)
+    random.seed(args.semilla)
+    motor = importlib.import_module(args.motor)
+    vectorizado, escalar = [], []
+    for x, o in matchups(args):
+        resultados = []
+        inicio = time.perf_counter()
+        for desde in range(0, args.partidas, args.lote):
+            resultados.append(play_batch(ESTRATEGIAS[x], ESTRATEGIAS[o], min(args.lote, args.partidas - desde), azar))
+        vectorizado.append(summarize(x, o, np.concatenate(resultados), time.perf_counter() - inicio))
+        if args.escalar:
+            inicio = time.perf_counter()
+            resultados = play_scalar(motor, x, o, args.escalar)
+            escalar.append(summarize(x, o, resultados, time.perf_counter() - inicio, motor=args.motor))
+    informe = {
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'parametros': vars(args),
+        'vectorizado': vectorizado,
+    }
+    if escalar:
+        informe['escalar'] = escalar
+    return informe
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def parse_args(argv=None):
+    opciones = sorted(ESTRATEGIAS)
+    parser = argparse.ArgumentParser(description="Simulador de autojuego del Tres en Raya para evaluar la IA.")
+    parser.add_argument('--partidas', type=int, default=200_000, help="Partidas por enfrentamiento.")
+    parser.add_argument('--lote', type=int, default=250_000, help="Partidas que se juegan a la vez (memoria: ~100 bytes por partida).")
+    parser.add_argument('--x', choices=opciones, help="Estrategia del jugador X (empieza). Sin --x ni --o se juegan todos los enfrentamientos.")
+    parser.add_argument('--o', choices=opciones, help="Estrategia del jugador O.")
+    parser.add_argument('--escalar', type=int, default=0, help="Partidas por enfrentamiento con el motor escalar, para comparar (0 = ninguna).")
+    parser.add_argument('--motor', default='tictactoe_engine', help="Módulo del motor escalar (con best_move e is_winner).")
+    parser.add_argument('--semilla', type=int, default=1234, help="Semilla aleatoria para resultados reproducibles.")
+    parser.add_argument('--salida', help="Ruta del fichero JSON de resultados (por defecto, stdout).")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    texto = json.dumps(ejecutar(args), indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
@@ -0,0 +1,362 @@
+"""
+Banco de pruebas de carga sin conexión a Discord.
+
+Simula miles de partidas simultáneas de los tres juegos usando objetos
+Interaction, InteractionResponse y Message falsos, y llama directamente a los
+comandos de las extensiones de juego y el enrutado de componentes de
+partidas.py (`handle_component`), que construye las vistas y llama a sus
+callbacks. Mide:
+
+- Latencia de los manejadores (p50/p99) por tipo de evento.
+- Retraso del bucle de eventos (lag) mientras se juega.
+- Memoria asignada (tracemalloc, opcional) y RSS por partida activa.
+
+El resultado se escribe en JSON para poder comparar entre commits:
+
+    python bench_games.py --partidas 2000 --salida bench_results.json
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import main
+import metrics
+import partidas
+import tictactoe_engine
+
+_ids = itertools.count(10**17)
+
+def nuevo_id() -> int:
+    return next(_ids)
+
+def leer_rss() -> int:
+    """Devuelve el RSS actual del proceso en bytes (0 si no se puede medir)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+# --- OBJETOS FALSOS DE DISCORD ---
+class FakeUser:
+    def __init__(self, name: str, bot: bool = False, user_id: int = None):
+        self.id = nuevo_id() if user_id is None else user_id
+        self.name = name
+        self.bot = bot
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, latencia_rest: float):
+        self.id = nuevo_id()
+        self.channel = channel
+        self.latencia_rest = latencia_rest
+        self.ediciones = 0
+
+    async def edit(self, content=None, view=None):
+        await asyncio.sleep(self.latencia_rest)
+        self.ediciones += 1
+        return self
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+        self.view = None
+        self.modal = None
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, *args, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, view=None, ephemeral=False, **kwargs):
+        self._done = True
+        if not ephemeral:
+            self.view = view
+            self._interaction.message = FakeMessage(self._interaction.channel, 0)
+
+    async def edit_message(self, content=None, view=None, **kwargs):
+        self._done = True
+
+    async def send_modal(self, modal):
+        self._done = True
+        self.modal = modal
+
+class FakeInteraction:
+    def __init__(self, user: FakeUser, channel: FakeChannel, message: FakeMessage = None, data: dict = None, latencia_rest: float = 0):
+        self.id = nuevo_id()
+        self.token = f'token-{self.id}'
+        self.user = user
+        self.channel = channel
+        self.guild_id = channel.id
+        self.guild_locale = None
+        self.message = message
+        self.data = data or {}
+        self.latencia_rest = latencia_rest
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup()
+
+    async def original_response(self):
+        return self.message
+
+    async def edit_original_response(self, content=None, view=None, **kwargs):
+        await asyncio.sleep(self.latencia_rest)
+        return self.message
+
+# --- MEDICIONES ---
+class Medidor:
+    def __init__(self):
+        self.latencias = {}
+
+    async def medir(self, evento: str, corrutina):
+        inicio = time.perf_counter()
+        await corrutina
+        self.latencias.setdefault(evento, []).append(time.perf_counter() - inicio)
+
+    def resumen(self) -> dict:
+        return {evento: resumir(muestras) for evento, muestras in sorted(self.latencias.items())}
+
+def percentil(ordenadas: list, p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+def resumir(muestras: list) -> dict:
+    ordenadas = sorted(muestras)
+    return {
+        'n': len(ordenadas),
+        'p50_ms': percentil(ordenadas, 0.50) * 1000,
+        'p99_ms': percentil(ordenadas, 0.99) * 1000,
+        'max_ms': (ordenadas[-1] if ordenadas else 0.0) * 1000,
+    }
+
+async def medir_lag(intervalo: float, muestras: list, parar: asyncio.Event):
+    """Mide cuánto se retrasa el bucle de eventos respecto a un sleep de `intervalo`."""
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        muestras.append(max(0.0, time.perf_counter() - inicio - intervalo))
+
+# --- SIMULACIÓN DE PARTIDAS ---
+def activa(state) -> bool:
+    return partidas.games.get(state.game_id) is state
+
+def interaccion_componente(state, user_id: int, nombre: str, custom_id: str, latencia_rest: float, **data):
+    """Crea una interacción de componente sobre el mensaje de la partida."""
+    canal = FakeChannel(state.channel_id)
+    mensaje = FakeMessage(canal, latencia_rest)
+    mensaje.id = state.message_id
+    return FakeInteraction(FakeUser(nombre, user_id=user_id), canal, mensaje, dict(custom_id=custom_id, **data), latencia_rest)
+
+def id_componente(state, sufijo: str) -> str:
+    """custom_id del componente tal como lo pinta la vista (ver PartidaView.make_custom_id)."""
+    return f"{state.TIPO}:{state.game_id:x}:{state.secuencia:x}:{sufijo}"
+
+async def pulsar(medidor: Medidor, evento: str, crear, duplicados: float):
+    """Envía una interacción de componente y, con probabilidad `duplicados`, una copia a la vez (doble clic)."""
+    if random.random() < duplicados:
+        await asyncio.gather(medidor.medir(evento, partidas.handle_component(crear())),
+                             medidor.medir(evento, partidas.handle_component(crear())))
+    else:
+        await medidor.medir(evento, partidas.handle_component(crear()))
+
+def comando(cog: str, nombre: str, interaction, *args):
+    """Llama directamente al callback de un comando slash de una extensión cargada."""
+    instancia = main.bot.get_cog(cog)
+    return getattr(instancia, nombre).callback(instancia, interaction, *args)
+
+async def crear_tictactoe(medidor: Medidor, canal: FakeChannel, contra_ia: bool):
+    jugador = FakeUser('jugador')
+    oponente = None if contra_ia else FakeUser('oponente')
+    interaction = FakeInteraction(jugador, canal)
+    await medidor.medir('cmd_tictactoe', comando('TicTacToe', 'tictactoe_command', interaction, oponente, tictactoe_engine.NIVEL_POR_DEFECTO))
+    return interaction.response.view.state
+
+async def crear_adivinar(medidor: Medidor, canal: FakeChannel):
+    interaction = FakeInteraction(FakeUser('jugador'), canal)
+    await medidor.medir('cmd_adivinar', comando('AdivinaNumero', 'adivinar_command', interaction))
+    return interaction.response.view.state
+
+async def crear_duelo(medidor: Medidor, canal: FakeChannel):
+    interaction = FakeInteraction(FakeUser('retador'), canal)
+    await medidor.medir('cmd_duelo', comando('Duelo', 'duelo_command', interaction, FakeUser('retado')))
+    return interaction.response.view.state
+
+async def jugar_tictactoe(medidor: Medidor, state, latencia_rest: float, duplicados: float):
+    while activa(state):
+        libres = [i for i in range(9) if state.is_free(i)]
+        if not libres:
+            break
+        turno = state.turno
+        custom_id = id_componente(state, random.choice(libres))
+        await pulsar(medidor, 'ttt_button_callback', lambda: interaccion_componente(
+            state, state.jugadores[turno], state.nombres[turno], custom_id, latencia_rest), duplicados)
+
+async def jugar_adivinar(medidor: Medidor, state, latencia_rest: float, duplicados: float):
+    bajo, alto = 1, 50
+    while activa(state):
+        interaction = interaccion_componente(state, state.autor, state.nombre, id_componente(state, 'intento'), latencia_rest)
+        await partidas.handle_component(interaction)
+        modal = interaction.response.modal
+        intento = random.randint(bajo, alto)
+        modal.guess._value = str(intento)
+        envio = interaccion_componente(state, state.autor, state.nombre, '', latencia_rest)
+        await medidor.medir('adv_on_submit', modal.on_submit(envio))
+        if intento < state.numero_secreto:
+            bajo = intento + 1
+        elif intento > state.numero_secreto:
+            alto = intento - 1
+
+async def jugar_duelo(medidor: Medidor, state, latencia_rest: float, duplicados: float):
+    while activa(state):
+        turno = state.turno
+        respuesta = str(random.choice(state.opciones))
+        custom_id = id_componente(state, 'respuesta')
+        await pulsar(medidor, 'duelo_select_callback', lambda: interaccion_componente(
+            state, state.jugadores[turno], state.nombres[turno], custom_id, latencia_rest, values=[respuesta]), duplicados)
+
+async def ejecutar(args) -> dict:
+    random.seed(args.semilla)
+    medidor = Medidor()
+    main.bot._connection.user = FakeUser('bot', bot=True)
+    with tempfile.TemporaryDirectory() as directorio:
+        partidas.store.ruta = os.path.join(directorio, 'bench_partidas.db')
+        partidas.store.open()
+        partidas.store.start()
+        partidas.start()
+        partidas.stats.ruta = os.path.join(directorio, 'bench_estadisticas.db')
+        partidas.stats.open()
+        partidas.stats.start()
+        partidas.registros.directorio = os.path.join(directorio, 'registros')
+        partidas.registros.open()
+        partidas.registros.start()
+        await main.load_extensions()
+
+        canales = [FakeChannel(nuevo_id()) for _ in range(args.canales or args.partidas)]
+
+        # Fase 1: crear todas las partidas y medir la memoria que ocupan activas
+        gc.collect()
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_inicial = leer_rss()
+        en_juego = []
+        for i in range(args.partidas):
+            canal = canales[i % len(canales)]
+            tipo = i % 4
+            if tipo == 0:
+                en_juego.append((jugar_tictactoe, await crear_tictactoe(medidor, canal, contra_ia=True)))
+            elif tipo == 1:
+                en_juego.append((jugar_tictactoe, await crear_tictactoe(medidor, canal, contra_ia=False)))
+            elif tipo == 2:
+                en_juego.append((jugar_adivinar, await crear_adivinar(medidor, canal)))
+            else:
+                en_juego.append((jugar_duelo, await crear_duelo(medidor, canal)))
+        gc.collect()
+        rss_activo = leer_rss()
+        memoria = {
+            'rss_inicial_bytes': rss_inicial,
+            'rss_activo_bytes': rss_activo,
+            'rss_por_partida_bytes': (rss_activo - rss_inicial) / max(1, args.partidas),
+        }
+        if args.tracemalloc:
+            actual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memoria['asignado_por_partida_bytes'] = actual / max(1, args.partidas)
+            memoria['pico_asignado_bytes'] = pico
+
+        # Fase 2: jugar todas las partidas a la vez
+        lag = []
+        parar = asyncio.Event()
+        monitor = asyncio.create_task(medir_lag(0.01, lag, parar))
+        inicio = time.perf_counter()
+        await asyncio.gather(*(jugar(medidor, state, args.latencia_rest / 1000, args.duplicados) for jugar, state in en_juego))
+        # Las jugadas no esperan a sus ediciones (ver PartidaView.render): se espera a que salgan todas
+        while partidas.render_scheduler._pendientes or partidas.render_scheduler._en_vuelo:
+            await asyncio.sleep(0.01)
+        duracion = time.perf_counter() - inicio
+        parar.set()
+        await monitor
+
+        for nombre in tuple(main.bot.extensions):
+            await main.bot.unload_extension(nombre)
+        partidas.store.close()
+        partidas.stats.close()
+        partidas.registros.close()
+
+    return {
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'parametros': vars(args),
+        'duracion_s': duracion,
+        'latencias': medidor.resumen(),
+        'lag_bucle': resumir(lag),
+        'memoria': memoria,
+        'render': {
+            'enviadas': partidas.render_scheduler.enviadas,
+            'combinadas': partidas.render_scheduler.combinadas,
+            'sin_cambios': partidas.render_scheduler.sin_cambios,
+        },
+        'interacciones_descartadas': metrics.descartadas.total(),
+    }
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga sin conexión de las vistas de juego.")
+    parser.add_argument('--partidas', type=int, default=2000, help="Número de partidas simultáneas.")
+    parser.add_argument('--canales', type=int, default=0, help="Número de canales entre los que repartirlas (0 = uno por partida).")
+    parser.add_argument('--latencia-rest', type=float, default=0.0, help="Latencia simulada de cada edición REST, en ms.")
+    parser.add_argument('--duplicados', type=float, default=0.0, help="Fracción de clics que llegan por duplicado (doble clic).")
+    parser.add_argument('--tracemalloc', action='store_true', help="Mide las asignaciones con tracemalloc (más lento).")
+    parser.add_argument('--semilla', type=int, default=1234, help="Semilla aleatoria para resultados reproducibles.")
+    parser.add_argument('--salida', help="Ruta del fichero JSON de resultados (por defecto, stdout).")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Los logs por jugada distorsionarían la medida; solo se conservan avisos y errores
+    logging.getLogger('discord_bot').setLevel(logging.WARNING)
+    resultado = asyncio.run(ejecutar(args))
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+    main.shutdown_logging()
@@ -0,0 +1,176 @@
+"""
+Banco de pruebas de memoria por servidor según el modo de gateway.
+
+Crea un cliente de discord.py sin conectarlo, con las opciones de gateway y
+caché de cada modo (ver `main.gateway_options` y MODO_LIGERO en config.py), y
+le inyecta el tráfico simulado de N servidores: un GUILD_CREATE por servidor
+(canales, roles y miembros) y, solo si los intents del modo incluyen los
+mensajes de servidor (si no, Discord no los envía), unos cuantos
+MESSAGE_CREATE por servidor. Los eventos pasan por los mismos parsers que los
+del gateway real, así que lo que se mide es lo que el cliente conserva en sus
+cachés.
+
+Cada modo se mide en un proceso aparte para que el RSS de uno no contamine el
+del otro. Mide:
+
+- RSS y memoria asignada (tracemalloc) por servidor.
+- Tamaño de las cachés: servidores, miembros, usuarios y mensajes.
+- Tiempo de CPU dedicado a procesar los eventos.
+
+El resultado se escribe en JSON para poder comparar entre commits:
+
+    python bench_gateway.py --servidores 2000 --salida bench_gateway.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import discord
+
+import main
+from bench_games import leer_rss, commit_actual
+
+MODOS = ('normal', 'ligero')
+FECHA = '2024-01-01T00:00:00+00:00'
+
+# --- EVENTOS SIMULADOS ---
+def user_payload(user_id: int) -> dict:
+    return {'id': str(user_id), 'username': f'usuario{user_id}', 'discriminator': '0', 'global_name': None, 'avatar': None}
+
+def guild_payload(guild_id: int, canales: int, roles: int, miembros: int) -> dict:
+    """GUILD_CREATE de un servidor con `canales` canales de texto, `roles` roles y `miembros` miembros."""
+    base = guild_id * 100_000
+    return {
+        'id': str(guild_id),
+        'name': f'Servidor {guild_id}',
+        'owner_id': str(base + 1),
+        'icon': None, 'splash': None, 'discovery_splash': None, 'banner': None, 'description': None,
+        'afk_channel_id': None, 'afk_timeout': 300, 'verification_level': 0, 'default_message_notifications': 0,
+        'explicit_content_filter': 0, 'mfa_level': 0, 'nsfw_level': 0, 'premium_tier': 0,
+        'features': [], 'application_id': None, 'system_channel_id': None, 'system_channel_flags': 0,
+        'rules_channel_id': None, 'public_updates_channel_id': None, 'vanity_url_code': None,
+        'preferred_locale': 'es-ES', 'premium_progress_bar_enabled': False,
+        'member_count': miembros, 'large': miembros > 250, 'unavailable': False, 'joined_at': FECHA,
+        'roles': [
+            {'id': str(guild_id if i == 0 else base + 50_000 + i), 'name': '@everyone' if i == 0 else f'rol{i}',
+             'color': 0, 'hoist': False, 'position': i, 'permissions': '0', 'managed': False, 'mentionable': False, 'flags': 0}
+            for i in range(roles)
+        ],
+        'channels': [
+            {'id': str(base + 10_000 + i), 'type': 0, 'name': f'canal{i}', 'position': i, 'permission_overwrites': [],
+             'nsfw': False, 'parent_id': None, 'topic': None, 'rate_limit_per_user': 0, 'last_message_id': None}
+            for i in range(canales)
+        ],
+        'members': [
+            {'user': user_payload(base + 1 + i), 'roles': [], 'joined_at': FECHA, 'deaf': False, 'mute': False, 'flags': 0}
+            for i in range(miembros)
+        ],
+        'emojis': [], 'stickers': [], 'threads': [], 'voice_states': [], 'presences': [],
+        'stage_instances': [], 'guild_scheduled_events': [],
+    }
+
+def message_payload(message_id: int, guild_id: int, canal: int, autor: int) -> dict:
+    """MESSAGE_CREATE de un mensaje de texto de un miembro."""
+    base = guild_id * 100_000
+    return {
+        'id': str(message_id), 'channel_id': str(base + 10_000 + canal), 'guild_id': str(guild_id),
+        'author': user_payload(base + 1 + autor),
+        'member': {'roles': [], 'joined_at': FECHA, 'deaf': False, 'mute': False, 'flags': 0},
+        'content': 'hola a todos, ¿alguien para una partida?', 'timestamp': FECHA, 'edited_timestamp': None,
+        'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+        'embeds': [], 'pinned': False, 'type': 0, 'flags': 0,
+    }
+
+# --- MEDICIÓN (proceso hijo) ---
+async def medir(args) -> dict:
+    opciones = main.gateway_options(args.modo == 'ligero')
+    gc.collect()
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_inicial = leer_rss()
+
+    cliente = discord.Client(**opciones)
+    estado = cliente._connection
+    recibe_mensajes = opciones['intents'].guild_messages
+    message_id = 1
+    cpu = time.process_time()
+    for i in range(args.servidores):
+        guild_id = 1_000 + i
+        estado.parse_guild_create(guild_payload(guild_id, args.canales, args.roles, args.miembros))
+        if recibe_mensajes:
+            for j in range(args.mensajes):
+                estado.parse_message_create(message_payload(message_id, guild_id, j % args.canales, j % args.miembros))
+                message_id += 1
+    cpu = time.process_time() - cpu
+    await asyncio.sleep(0)  # Deja correr lo que hayan programado los eventos
+
+    gc.collect()
+    rss_final = leer_rss()
+    resultado = {
+        'modo': args.modo,
+        'intents': opciones['intents'].value,
+        'rss_por_servidor_bytes': (rss_final - rss_inicial) / args.servidores,
+        'cpu_eventos_s': cpu,
+        'cache': {
+            'servidores': len(cliente.guilds),
+            'miembros': sum(len(guild.members) for guild in cliente.guilds),
+            'usuarios': len(cliente.users),
+            'mensajes': len(cliente.cached_messages),
+        },
+    }
+    if args.tracemalloc:
+        actual, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        resultado['asignado_por_servidor_bytes'] = actual / args.servidores
+    return resultado
+
+# --- COMPARACIÓN (proceso principal) ---
+def ejecutar(args) -> dict:
+    modos = {}
+    for modo in MODOS:
+        comando = [sys.executable, __file__, '--modo', modo, '--servidores', str(args.servidores),
+                   '--canales', str(args.canales), '--roles', str(args.roles), '--miembros', str(args.miembros),
+                   '--mensajes', str(args.mensajes)]
+        if args.tracemalloc:
+            comando.append('--tracemalloc')
+        salida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+        modos[modo] = json.loads(salida.splitlines()[-1])  # Antes pueden ir líneas del log de consola
+    normal, ligero = modos['normal']['rss_por_servidor_bytes'], modos['ligero']['rss_por_servidor_bytes']
+    return {
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'discord.py': discord.__version__,
+        'parametros': vars(args),
+        'modos': modos,
+        'ahorro_rss_por_servidor': 1 - ligero / normal if normal > 0 else None,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Memoria por servidor de los modos de gateway, sin conexión a Discord.")
+    parser.add_argument('--servidores', type=int, default=1000, help="Número de servidores simulados.")
+    parser.add_argument('--canales', type=int, default=30, help="Canales de texto por servidor.")
+    parser.add_argument('--roles', type=int, default=20, help="Roles por servidor.")
+    parser.add_argument('--miembros', type=int, default=200, help="Miembros incluidos en cada GUILD_CREATE.")
+    parser.add_argument('--mensajes', type=int, default=20, help="Mensajes por servidor (si el modo los recibe).")
+    parser.add_argument('--tracemalloc', action='store_true', help="Mide también las asignaciones con tracemalloc (más lento).")
+    parser.add_argument('--modo', choices=MODOS, help=argparse.SUPPRESS)  # Uso interno: proceso hijo que mide un modo
+    parser.add_argument('--salida', help="Ruta del fichero JSON de resultados (por defecto, stdout).")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.modo is not None:
+        print(json.dumps(asyncio.run(medir(args))))
+        sys.exit(0)
+    texto = json.dumps(ejecutar(args), indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
@@ -0,0 +1,167 @@
+"""
+Lanzador del bot en modo clúster.
+
+Reparte los shards del bot entre varios procesos. Cada proceso ejecuta main.py
+con su propio bucle de eventos, su propio logging ('info-<n>.log',
+'error-<n>.log') y su propia base de datos de partidas, usando
+AutoShardedBot con un rango contiguo de shards. Un supervisor vigila los
+procesos y reinicia los que terminan con error, con espera exponencial.
+
+    python cluster.py --procesos 4 --shards 16
+
+Si se omite --shards se usa el número recomendado por Discord.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import urllib.request
+
+from config import DISCORD_TOKEN
+from log_setup import setup_logging, shutdown_logging
+
+logger = logging.getLogger('discord_bot.cluster')
+
+ESPERA_REINICIO_MIN = 1.0   # Segundos antes del primer reinicio
+ESPERA_REINICIO_MAX = 60.0  # Tope de la espera exponencial
+TIEMPO_ESTABLE = 300.0      # Un proceso que aguanta esto vivo vuelve a la espera mínima
+
+def recommended_shards(token: str) -> int:
+    """Consulta a Discord el número de shards recomendado para el bot."""
+    peticion = urllib.request.Request(
+        'https://discord.com/api/v10/gateway/bot',
+        headers={'Authorization': f'Bot {token}', 'User-Agent': 'DiscordBot (cluster.py, 1.0)'},
+    )
+    with urllib.request.urlopen(peticion, timeout=10) as respuesta:
+        return json.load(respuesta)['shards']
+
+def split_shards(shard_count: int, procesos: int) -> list:
+    """Reparte los shards 0..shard_count-1 en rangos contiguos lo más equilibrados posible."""
+    procesos = max(1, min(procesos, shard_count))
+    base, resto = divmod(shard_count, procesos)
+    rangos = []
+    inicio = 0
+    for i in range(procesos):
+        tamano = base + (1 if i < resto else 0)
+        rangos.append(list(range(inicio, inicio + tamano)))
+        inicio += tamano
+    return rangos
+
+def _run_worker(worker_id: int, shard_ids: list, shard_count: int):
+    """Punto de entrada de cada proceso hijo."""
+    os.environ['BOT_WORKER_ID'] = str(worker_id)
+    os.environ['BOT_SHARD_COUNT'] = str(shard_count)
+    os.environ['BOT_SHARD_IDS'] = ','.join(map(str, shard_ids))
+    # SIGTERM se trata como Ctrl+C para que el bot se cierre ordenadamente
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    import main # Se importa aquí para que lea las variables de entorno del proceso
+    sys.exit(main.run())
+
+class Worker:
+    def __init__(self, worker_id: int, shard_ids: list, shard_count: int, contexto):
+        self.worker_id = worker_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.contexto = contexto
+        self.proceso = None
+        self.inicio = 0.0
+        self.espera = ESPERA_REINICIO_MIN
+        self.reinicio_en = None  # Momento del próximo reinicio programado
+
+    def start(self):
+        self.proceso = self.contexto.Process(
+            target=_run_worker, args=(self.worker_id, self.shard_ids, self.shard_count),
+            name=f'bot-worker-{self.worker_id}',
+        )
+        self.proceso.start()
+        self.inicio = time.monotonic()
+        self.reinicio_en = None
+        logger.info(f"Proceso {self.worker_id} iniciado (PID {self.proceso.pid}, shards {self.shard_ids[0]}-{self.shard_ids[-1]}).")
+
+class Supervisor:
+    def __init__(self, shard_count: int, procesos: int):
+        self.shard_count = shard_count
+        contexto = multiprocessing.get_context('spawn')
+        self.workers = [
+            Worker(i, shard_ids, shard_count, contexto)
+            for i, shard_ids in enumerate(split_shards(shard_count, procesos))
+        ]
+        self.parando = False
+
+    def stop(self, *_):
+        self.parando = True
+
+    def run(self, intervalo: float = 1.0):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        logger.info(f"Lanzando {len(self.workers)} procesos para {self.shard_count} shards.")
+        for worker in self.workers:
+            worker.start()
+
+        while not self.parando:
+            time.sleep(intervalo)
+            self.check_workers()
+
+        self.shutdown()
+
+    def check_workers(self):
+        """Reinicia los procesos caídos, con espera exponencial entre reinicios."""
+        ahora = time.monotonic()
+        for worker in self.workers:
+            if worker.reinicio_en is not None:
+                if ahora >= worker.reinicio_en:
+                    worker.start()
+                continue
+            if worker.proceso.is_alive():
+                if ahora - worker.inicio >= TIEMPO_ESTABLE:
+                    worker.espera = ESPERA_REINICIO_MIN
+                continue
+
+            codigo = worker.proceso.exitcode
+            if codigo == 0:
+                logger.info(f"Proceso {worker.worker_id} terminó normalmente; no se reinicia.")
+                worker.reinicio_en = float('inf')
+                continue
+            logger.error(f"Proceso {worker.worker_id} terminó con código {codigo}; se reinicia en {worker.espera:.0f} s.")
+            worker.reinicio_en = ahora + worker.espera
+            worker.espera = min(worker.espera * 2, ESPERA_REINICIO_MAX)
+
+        if all(w.reinicio_en == float('inf') for w in self.workers):
+            self.parando = True
+
+    def shutdown(self, tiempo_gracia: float = 30.0):
+        """Pide a todos los procesos que se cierren y espera a que terminen."""
+        logger.info("Deteniendo el clúster...")
+        vivos = [w.proceso for w in self.workers if w.proceso is not None and w.proceso.is_alive()]
+        for proceso in vivos:
+            proceso.terminate()
+        limite = time.monotonic() + tiempo_gracia
+        for proceso in vivos:
+            proceso.join(max(0.0, limite - time.monotonic()))
+            if proceso.is_alive():
+                logger.warning(f"El proceso {proceso.name} no se detuvo a tiempo; se fuerza su cierre.")
+                proceso.kill()
+                proceso.join()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lanza el bot repartiendo sus shards entre varios procesos.")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1, help="Número de procesos (por defecto, uno por núcleo).")
+    parser.add_argument('--shards', type=int, default=None, help="Número total de shards (por defecto, el recomendado por Discord).")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging(id_proceso='supervisor')
+    try:
+        shard_count = args.shards or recommended_shards(DISCORD_TOKEN)
+        Supervisor(shard_count, args.procesos).run()
+    except Exception as e:
+        logger.exception(f"Error crítico en el supervisor: {e}")
+        print(f"Error crítico: {e}")
+    finally:
+        shutdown_logging()
@@ -0,0 +1 @@
+"""Extensiones del bot: un juego por módulo, más los comandos de administración."""
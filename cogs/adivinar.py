@@ -0,0 +1,150 @@
+"""
+Extensión de Adivina el Número: comando /adivinar, su vista y su modal.
+"""
+import discord
+from discord import app_commands, ui, TextStyle
+from discord.ext import commands
+import logging
+
+import metrics
+import game_events
+import game_records
+import partidas
+import player_stats
+import rate_limits
+from partidas import PartidaView
+from game_state import AdivinaState
+
+logger = logging.getLogger('discord_bot')
+
+# --- MODAL Y VIEW ---
+class GuessNumberModal(ui.Modal, title='Adivina el Número'):
+    def __init__(self, view):
+        super().__init__(timeout=view.TIMEOUT)
+        self.view = view
+    
+    guess = ui.TextInput(label='Escribe tu número aquí', style=TextStyle.short, placeholder='Ej: 25')
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        # Los envíos no llevan secuencia: cada uno es un intento, aunque se abrieran varios modales
+        state = self.view.state
+        await partidas.run_exclusive(state, interaction, lambda: self.submit(interaction), nombre=f"{state.TIPO}:modal")
+
+    async def submit(self, interaction: discord.Interaction):
+        with metrics.measure_callback(self.view.state.TIPO):
+            await self.view.process_guess(interaction, self.guess.value)
+
+class AdivinaNumeroView(PartidaView):
+    TIMEOUT = 180
+
+    def __init__(self, state: AdivinaState):
+        super().__init__(state)
+        self.max_intentos = state.MAX_INTENTOS
+        self.guess_button.custom_id = self.make_custom_id('intento')
+
+    async def on_timeout(self):
+        """Se ejecuta cuando expira el timeout."""
+        for item in self.children: 
+            item.disabled = True
+        try:
+            await self.render_expiry(f"⌛ ¡El tiempo se acabó! El número era **{self.state.numero_secreto}**.")
+            game_events.game_event('partida_expirada', self.state, nivel=logging.WARNING, intentos=self.state.intentos)
+        except discord.NotFound:
+            logger.warning("Mensaje no encontrado durante timeout de AdivinaNumero")
+        except Exception as e:
+            logger.exception(f"Error durante timeout de AdivinaNumero: {e}")
+
+    async def dispatch(self, interaction: discord.Interaction, sufijo: str):
+        await self.guess_button.callback(interaction)
+
+    @ui.button(label="Hacer un intento", style=discord.ButtonStyle.primary, emoji="🤔")
+    async def guess_button(self, interaction: discord.Interaction, button: ui.Button):
+        if interaction.user.id != self.state.autor:
+            await interaction.response.send_message("No puedes jugar en la partida de otra persona.", ephemeral=True)
+            return
+        
+        # Pasar la vista al modal
+        modal = GuessNumberModal(self)
+        await interaction.response.send_modal(modal)
+
+    async def process_guess(self, interaction: discord.Interaction, guess_str: str):
+        """Procesa un intento de adivinanza."""
+        state = self.state
+        if not self.is_active():
+            await interaction.response.send_message("Esta partida ya ha terminado.", ephemeral=True)
+            return
+        try:
+            guess = int(guess_str)
+            if not 1 <= guess <= 50:
+                await interaction.response.send_message("El número debe estar entre 1 y 50.", ephemeral=True)
+                return
+        except ValueError:
+            await interaction.response.send_message("Introduce un número válido.", ephemeral=True)
+            return
+            
+        state.guess(guess)
+        game_events.game_event('intento', state, interaction, numero=guess, intento=state.intentos)
+        
+        if guess == state.numero_secreto:
+            self.finish(game_records.GANA_JUGADOR_0)
+            self.record_result(state.autor, player_stats.VICTORIA, mejor=state.intentos)
+            for item in self.children:
+                item.disabled = True
+            await interaction.response.edit_message(
+                content=f"🌟 ¡Felicidades <@{state.autor}>! Adivinaste el número **{state.numero_secreto}** en {state.intentos} intentos!", 
+                view=self
+            )
+            game_events.game_event('partida_terminada', state, interaction, resultado='victoria', intentos=state.intentos)
+            return
+            
+        if state.intentos >= self.max_intentos:
+            self.finish(game_records.GANA_JUGADOR_1)
+            self.record_result(state.autor, player_stats.DERROTA)
+            for item in self.children:
+                item.disabled = True
+            await interaction.response.edit_message(
+                content=f"💔 Se acabaron tus intentos. El número era **{state.numero_secreto}**.", 
+                view=self
+            )
+            game_events.game_event('partida_terminada', state, interaction, resultado='derrota', numero_secreto=state.numero_secreto)
+            return
+            
+        self.persist()
+        pista = "demasiado bajo ⬇️" if guess < state.numero_secreto else "demasiado alto ⬆️"
+        intentos_restantes = self.max_intentos - state.intentos
+        self.guess_button.custom_id = self.make_custom_id('intento') # Con la secuencia nueva
+        
+        await interaction.response.edit_message(
+            content=f"Tu número ({guess}) es **{pista}**. Te quedan **{intentos_restantes}** intentos.",
+            view=self
+        )
+
+# --- COG ---
+class AdivinaNumero(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        await partidas.register_game(AdivinaState, AdivinaNumeroView)
+
+    async def cog_unload(self):
+        partidas.unregister_game(AdivinaState.TIPO)
+
+    @app_commands.command(name="adivinar", description="Inicia un juego para adivinar un número entre 1 y 50.")
+    @rate_limits.game_check()
+    async def adivinar_command(self, interaction: discord.Interaction):
+        try:
+            state = AdivinaState(interaction.user.id, interaction.user.name)
+            view = AdivinaNumeroView(state)
+            await interaction.response.send_message(
+                f"🎉 **¡Adivina el número!** {interaction.user.mention}, he pensado en un número entre 1 y 50. Tienes {view.max_intentos} intentos.", 
+                view=view
+            )
+            view.bind_message(await interaction.original_response(), interaction.guild_id)
+            game_events.game_event('partida_iniciada', state, interaction, numero_secreto=state.numero_secreto)
+        except Exception as e:
+            logger.exception(f"Error en comando adivinar: {e}")
+            await interaction.response.send_message("Ocurrió un error iniciando el juego.", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(AdivinaNumero(bot))
@@ -0,0 +1,123 @@
+"""
+Extensión de administración: carga, descarga y recarga en caliente de
+extensiones, y perfilado en caliente (/perf, ver profiling.py).
+
+Solo el propietario del bot puede usar estos comandos. En modo clúster cada
+proceso tiene sus propias extensiones, así que solo se ve afectado el proceso
+que atiende la interacción.
+"""
+import discord
+from discord import app_commands
+from discord.ext import commands
+import asyncio
+import io
+import logging
+import time
+
+import game_events
+import profiling
+
+from config import EXTENSIONES, GUILD_DESARROLLO_ID
+from command_sync import sync_commands
+
+logger = logging.getLogger('discord_bot')
+
+async def es_propietario(interaction: discord.Interaction) -> bool:
+    return await interaction.client.is_owner(interaction.user)
+
+class Admin(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="extension", description="Carga, descarga o recarga en caliente una extensión del bot.")
+    @app_commands.describe(accion="Qué hacer con la extensión.", nombre="Módulo de la extensión, p. ej. cogs.tictactoe.")
+    @app_commands.choices(accion=[
+        app_commands.Choice(name="Cargar", value="cargar"),
+        app_commands.Choice(name="Descargar", value="descargar"),
+        app_commands.Choice(name="Recargar", value="recargar"),
+    ])
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.check(es_propietario)
+    async def extension_command(self, interaction: discord.Interaction, accion: str, nombre: str):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            if accion == "cargar":
+                await self.bot.load_extension(nombre)
+            elif accion == "descargar":
+                await self.bot.unload_extension(nombre)
+            else:
+                await self.bot.reload_extension(nombre)
+        except commands.ExtensionError as e:
+            game_events.event('admin_extension', logging.WARNING, user_id=interaction.user.id, accion=accion, extension=nombre, error=str(e))
+            await interaction.followup.send(f"❌ No se pudo {accion} `{nombre}`: {e}", ephemeral=True)
+            return
+        game_events.event('admin_extension', user_id=interaction.user.id, accion=accion, extension=nombre)
+
+        # Cargar o descargar cambia los comandos; una recarga normalmente no (y si no, no se sincroniza nada)
+        try:
+            synced = await sync_commands(self.bot, guild_id=GUILD_DESARROLLO_ID)
+            if synced is not None:
+                logger.info(f"Sincronizados {len(synced)} comandos slash.")
+        except Exception as e:
+            logger.exception(f"Error sincronizando comandos: {e}")
+        await interaction.followup.send(f"✅ Extensión `{nombre}`: {accion} hecho.", ephemeral=True)
+
+    @extension_command.autocomplete('nombre')
+    async def extension_autocomplete(self, interaction: discord.Interaction, actual: str):
+        nombres = sorted(set(EXTENSIONES) | set(self.bot.extensions))
+        return [app_commands.Choice(name=n, value=n) for n in nombres if actual.lower() in n.lower()][:25]
+
+    @app_commands.command(name="perf", description="Perfilado en caliente del bot: resumen, exportación o configuración.")
+    @app_commands.describe(
+        accion="Qué hacer con el perfilado.",
+        muestreo="Al activar: fracción de interacciones que se perfilan (0-1).",
+        memoria="Al activar: medir también la memoria con tracemalloc.",
+        callbacks_lentos_ms="Al activar: avisar de los callbacks que bloqueen el bucle más de estos ms (0 = no).",
+    )
+    @app_commands.choices(accion=[
+        app_commands.Choice(name="Resumen", value="resumen"),
+        app_commands.Choice(name="Exportar (pstats)", value="exportar"),
+        app_commands.Choice(name="Activar", value="activar"),
+        app_commands.Choice(name="Desactivar", value="desactivar"),
+        app_commands.Choice(name="Vaciar muestras", value="vaciar"),
+    ])
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.check(es_propietario)
+    async def perf_command(self, interaction: discord.Interaction, accion: str = "resumen",
+                           muestreo: app_commands.Range[float, 0.0, 1.0] = None, memoria: bool = None,
+                           callbacks_lentos_ms: app_commands.Range[int, 0, 10_000] = None):
+        await interaction.response.defer(ephemeral=True)
+        if accion == "activar":
+            umbral = ... if callbacks_lentos_ms is None else (callbacks_lentos_ms / 1000 or None)
+            profiling.configure(0.01 if muestreo is None and not profiling.muestreo else muestreo, memoria, umbral)
+        elif accion == "desactivar":
+            profiling.configure(0.0, False, None)
+        elif accion == "vaciar":
+            profiling.clear()
+        if accion != "resumen" and accion != "exportar":
+            game_events.event('admin_perfilado', user_id=interaction.user.id, accion=accion)
+
+        if accion == "exportar":
+            # Combinar los perfiles cuesta algo de CPU: fuera del bucle
+            datos = await asyncio.to_thread(profiling.export)
+            if not datos:
+                await interaction.followup.send("No hay interacciones perfiladas todavía.", ephemeral=True)
+                return
+            nombre = f"perf-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+            await interaction.followup.send(
+                f"📈 {len(profiling.muestras)} interacciones perfiladas. Ábrelo con `python -m pstats {nombre}`, snakeviz o flameprof.",
+                file=discord.File(io.BytesIO(datos), filename=nombre), ephemeral=True)
+            return
+
+        resumen = await asyncio.to_thread(profiling.summary)
+        if len(resumen) > 1900:
+            await interaction.followup.send(file=discord.File(io.BytesIO(resumen.encode()), filename="perf.txt"), ephemeral=True)
+        else:
+            await interaction.followup.send(f"```\n{resumen}\n```", ephemeral=True)
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure):
+            await interaction.response.send_message("Solo el propietario del bot puede usar este comando.", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Admin(bot))
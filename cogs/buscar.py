@@ -0,0 +1,187 @@
+"""
+Extensión de emparejamiento: comandos /buscar y /cancelar_busqueda.
+
+Los jugadores entran en una cola por juego, en su servidor o entre todos los
+servidores, y se emparejan por nivel (ver matchmaking.py). Cada pareja
+formada arranca una partida JvJ a través de la extensión del juego
+(`start_pvp`), que se busca al emparejar para que sobreviva a recargas en
+caliente.
+"""
+import discord
+from discord import app_commands
+from discord.ext import commands
+import asyncio
+import logging
+import time
+
+import game_events
+import matchmaking
+import partidas
+import rate_limits
+from config import (EMPAREJAMIENTO_VENTANA_INICIAL, EMPAREJAMIENTO_AMPLIACION, EMPAREJAMIENTO_INTERVALO,
+                    EMPAREJAMIENTO_VENTANA_MAXIMA, EMPAREJAMIENTO_ESPERA_MAXIMA)
+
+logger = logging.getLogger('discord_bot')
+
+# --- CONSTANTES ---
+# Juego -> (cog que arranca la partida, clave de estadísticas, nombre)
+JUEGOS = {
+    "tictactoe": ("TicTacToe", "ttt", "Tres en Raya"),
+    "duelo": ("Duelo", "duelo", "Duelo de insultos"),
+}
+
+# --- COG ---
+class Buscar(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.emparejador = matchmaking.Emparejador(
+            EMPAREJAMIENTO_VENTANA_INICIAL, EMPAREJAMIENTO_AMPLIACION, EMPAREJAMIENTO_INTERVALO,
+            EMPAREJAMIENTO_VENTANA_MAXIMA, EMPAREJAMIENTO_ESPERA_MAXIMA
+        )
+        self._tarea = None
+
+    async def cog_load(self):
+        self._tarea = asyncio.create_task(self._bucle_emparejamiento())
+
+    async def cog_unload(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+        solicitudes = self.emparejador.clear()
+        await asyncio.gather(*(
+            self.notify(s, "⚠️ La búsqueda se ha cancelado por mantenimiento. Vuelve a intentarlo en un rato.")
+            for s in solicitudes
+        ))
+
+    async def _bucle_emparejamiento(self):
+        """Repasa las colas periódicamente: las ventanas se amplían con la espera."""
+        while True:
+            # Las ventanas solo crecen cada `intervalo` segundos y los jugadores nuevos se emparejan
+            # al entrar, así que repasar más a menudo solo cuesta tiempo de bucle con colas grandes
+            await asyncio.sleep(self.emparejador.intervalo)
+            if not len(self.emparejador):
+                continue
+            try:
+                parejas, caducadas = self.emparejador.tick()
+                for a, b in parejas:
+                    asyncio.create_task(self.start_match(a, b))
+                for solicitud in caducadas:
+                    asyncio.create_task(self.notify(solicitud, "⌛ No se ha encontrado rival a tiempo. Prueba otra vez con /buscar."))
+            except Exception as e:
+                logger.exception(f"Error en el bucle de emparejamiento: {e}")
+
+    async def notify(self, solicitud: matchmaking.Solicitud, contenido: str):
+        """Actualiza el mensaje efímero de /buscar de un jugador."""
+        try:
+            await solicitud.datos.edit_original_response(content=contenido)
+        except discord.HTTPException:
+            pass # El token de la interacción caducó o el mensaje se descartó
+
+    async def host_interaction(self, a: matchmaking.Solicitud, b: matchmaking.Solicitud):
+        """
+        Elige dónde se juega: el canal del jugador que más esperaba, o el del
+        otro. En la cola entre servidores solo vale el de un servidor del que
+        ambos sean miembros; devuelve None si no hay ninguno.
+        """
+        for anfitrion, invitado in ((a, b), (b, a)):
+            interaction = anfitrion.datos
+            if interaction.guild_id == invitado.datos.guild_id:
+                return interaction
+            guild = interaction.guild
+            if guild is None:
+                continue
+            try:
+                if guild.get_member(invitado.user_id) or await guild.fetch_member(invitado.user_id):
+                    return interaction
+            except discord.HTTPException:
+                continue
+        return None
+
+    async def start_match(self, a: matchmaking.Solicitud, b: matchmaking.Solicitud):
+        """Arranca la partida de una pareja formada y avisa a los dos jugadores."""
+        juego = a.cola[0]
+        nombre_cog, _, nombre_juego = JUEGOS[juego]
+        try:
+            cog = self.bot.get_cog(nombre_cog)
+            if cog is None:
+                # Juego descargado (o en plena recarga)
+                mensaje = f"⚠️ Se encontró rival, pero {nombre_juego} no está disponible ahora mismo. Inténtalo en un rato."
+                await asyncio.gather(self.notify(a, mensaje), self.notify(b, mensaje))
+                return
+            interaction = await self.host_interaction(a, b)
+            if interaction is None:
+                mensaje = "⚠️ Se encontró rival, pero no compartís ningún servidor donde jugar. Vuelve a intentarlo con /buscar."
+                await asyncio.gather(self.notify(a, mensaje), self.notify(b, mensaje))
+                return
+
+            message = await cog.start_pvp(
+                interaction.channel, interaction.guild_id, (a.user_id, b.user_id), (a.nombre, b.nombre)
+            )
+            espera = time.monotonic() - a.inicio
+            await asyncio.gather(
+                self.notify(a, f"✅ ¡Rival encontrado! Juegas contra **{b.nombre}**: {message.jump_url}"),
+                self.notify(b, f"✅ ¡Rival encontrado! Juegas contra **{a.nombre}**: {message.jump_url}"),
+            )
+            game_events.event('emparejamiento', juego=juego, guild_id=a.cola[1], jugadores=[a.user_id, b.user_id],
+                              diferencia=abs(a.rating - b.rating), espera_ms=round(espera * 1000))
+        except Exception as e:
+            logger.exception(f"Error arrancando la partida emparejada: {e}")
+            mensaje = "Ocurrió un error iniciando la partida."
+            await asyncio.gather(self.notify(a, mensaje), self.notify(b, mensaje))
+
+    @app_commands.command(name="buscar", description="Busca un rival de tu nivel para una partida JvJ.")
+    @app_commands.describe(
+        juego="Juego al que quieres jugar.",
+        ambito="Opcional: Buscar rival en este servidor (por defecto) o en todos."
+    )
+    @app_commands.choices(
+        juego=[app_commands.Choice(name=nombre, value=clave) for clave, (_, _, nombre) in JUEGOS.items()],
+        ambito=[
+            app_commands.Choice(name="Este servidor", value="servidor"),
+            app_commands.Choice(name="Todos los servidores", value="global"),
+        ],
+    )
+    @app_commands.guild_only()
+    @rate_limits.game_check()
+    async def buscar_command(self, interaction: discord.Interaction, juego: str, ambito: str = "servidor"):
+        solicitud = None
+        try:
+            if interaction.user.id in self.emparejador:
+                await interaction.response.send_message("Ya estás buscando rival. Usa /cancelar_busqueda para salir de la cola.", ephemeral=True)
+                return
+
+            _, clave_stats, nombre_juego = JUEGOS[juego]
+            nivel = matchmaking.rating(partidas.stats.get(interaction.user.id, juego=clave_stats))
+            cola = (juego, interaction.guild_id if ambito == "servidor" else None)
+            solicitud = matchmaking.Solicitud(interaction.user.id, interaction.user.name, nivel, cola, interaction)
+
+            await interaction.response.send_message(
+                f"🔎 Buscando rival para **{nombre_juego}** (nivel {nivel})... Usa /cancelar_busqueda para salir de la cola.",
+                ephemeral=True
+            )
+            # Otra /buscar del mismo usuario pudo entrar en la cola mientras se respondía
+            if interaction.user.id in self.emparejador:
+                await interaction.followup.send("Ya estás buscando rival. Usa /cancelar_busqueda para salir de la cola.", ephemeral=True)
+                return
+            rival = self.emparejador.add(solicitud)
+            if rival is not None:
+                await self.start_match(rival, solicitud)
+
+        except Exception as e:
+            logger.exception(f"Error en comando buscar: {e}")
+            # Solo se saca de la cola la solicitud de esta llamada, no una anterior del mismo usuario
+            if solicitud is not None and self.emparejador.get(interaction.user.id) is solicitud:
+                self.emparejador.remove(interaction.user.id)
+            if not interaction.response.is_done():
+                await interaction.response.send_message("Ocurrió un error buscando rival.", ephemeral=True)
+
+    @app_commands.command(name="cancelar_busqueda", description="Sal de la cola de /buscar.")
+    async def cancelar_command(self, interaction: discord.Interaction):
+        solicitud = self.emparejador.remove(interaction.user.id)
+        if solicitud is None:
+            await interaction.response.send_message("No estabas buscando rival.", ephemeral=True)
+            return
+        await interaction.response.send_message("Has salido de la cola.", ephemeral=True)
+        await self.notify(solicitud, "❌ Búsqueda cancelada.")
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Buscar(bot))
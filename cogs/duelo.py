@@ -0,0 +1,231 @@
+"""
+Extensión del Duelo de Insultos: comando /duelo y su vista. Los insultos
+están en el fichero de contenido (ver duel_content.py); cada duelo usa el
+paquete del idioma de su servidor si lo hay.
+
+También arranca los duelos que forma /buscar (ver `start_pvp`).
+"""
+import discord
+from discord import app_commands, ui
+from discord.ext import commands
+import asyncio
+import logging
+
+import game_events
+import game_records
+import partidas
+import rate_limits
+from partidas import PartidaView
+from config import RUTA_CONTENIDO_DUELOS, IDIOMA_DUELOS, CACHE_INSULTOS
+from duel_content import DuelContent
+from game_state import DueloState
+
+logger = logging.getLogger('discord_bot')
+
+# Contenido de los duelos (ver duel_content.py); se abre al cargar la extensión
+contenido: DuelContent = None
+
+# --- VISTA ---
+class DueloView(PartidaView):
+    TIMEOUT = 300
+
+    def __init__(self, state: DueloState):
+        super().__init__(state)
+        self.repartido = False  # Si el turno guardado ya no era válido y se ha vuelto a repartir
+        if not state.opciones:
+            self.setup_turn() # Partida nueva: se reparte el primer turno
+        elif not contenido.has(state.idioma, state.insulto):
+            # Partida restaurada cuyo insulto ya no existe: se importó un paquete con menos
+            # insultos o se retiró su idioma. Sigue con un turno nuevo del contenido actual
+            logger.warning(f"[Duelo] El insulto de la partida {state.game_id:x} ya no existe ({state.idioma}, {state.insulto}); se reparte de nuevo.")
+            state.idioma = contenido.language(state.idioma)
+            self.setup_turn()
+            self.persist()
+            self.repartido = True
+        else:
+            self.build_select()
+
+    @property
+    def entrada(self):
+        """El insulto del turno, de la caché de contenido."""
+        return contenido.entry(self.state.idioma, self.state.insulto)
+
+    @property
+    def current_insulto(self) -> str:
+        return self.entrada.texto
+
+    def get_status_message(self, result_text: str = "") -> str:
+        """Genera el mensaje de estado del duelo."""
+        state = self.state
+        atacante = state.jugadores[state.turno]
+        defensor = state.jugadores[1 - state.turno]
+        
+        header = f"🤺 **Duelo de Insultos entre <@{state.jugadores[0]}> y <@{state.jugadores[1]}>** 🤺\n"
+        scores = f"❤️ {state.nombres[0]}: **{state.vidas[0]}** | ❤️ {state.nombres[1]}: **{state.vidas[1]}**\n\n"
+        
+        if result_text:
+            return f"{header}{scores}{result_text}"
+
+        turn_info = f"Turno de **<@{atacante}>**. ¡Elige una respuesta para el insulto de **<@{defensor}>**!\n"
+        insulto_text = f"> **{self.current_insulto}**"
+        
+        return f"{header}{scores}{turn_info}{insulto_text}"
+        
+    def setup_turn(self):
+        """Prepara el estado y la interfaz para el turno actual."""
+        self.state.draw_insult(contenido.size(self.state.idioma))
+        self.state.deal_options(self.entrada.n_incorrectas)
+        self.build_select()
+
+    def answer_text(self, codigo: int) -> str:
+        """Texto de una respuesta: 0 es la correcta, k la k-ésima incorrecta."""
+        return self.entrada.respuestas[codigo]
+
+    def build_select(self, terminada: bool = False):
+        """
+        Fija el menú de respuestas según las opciones del estado: una plantilla
+        por insulto, orden de las opciones y fase (ver render_cache.py). La
+        clave incluye la generación del contenido: al recargar la extensión
+        tras importar un paquete, las plantillas con los textos anteriores
+        dejan de usarse y salen de la caché por LRU.
+        """
+        state = self.state
+        clave = (state.TIPO, contenido.generacion, state.idioma, state.insulto, state.opciones, terminada)
+        self.use_template(clave, lambda: self.add_select(terminada))
+
+    def add_select(self, terminada: bool):
+        """Crea el menú de respuestas (con las opciones ya construidas en la caché de contenido)."""
+        opciones = self.entrada.opciones
+        select_options = [opciones[codigo] for codigo in self.state.opciones]
+        select = ui.Select(placeholder="Elige tu respuesta ingeniosa...", options=select_options,
+                           custom_id=self.make_custom_id('respuesta'), disabled=terminada)
+        select.callback = self.select_callback
+        self.add_item(select)
+
+    async def dispatch(self, interaction: discord.Interaction, sufijo: str):
+        await self.select_callback(interaction)
+
+    async def select_callback(self, interaction: discord.Interaction):
+        """Callback para cuando un jugador elige una respuesta."""
+        state = self.state
+        atacante = state.turno
+        defensor = 1 - state.turno
+        
+        if interaction.user.id != state.jugadores[atacante]:
+            await interaction.response.send_message("¡No es tu turno de responder!", ephemeral=True)
+            return
+
+        if self.repartido:
+            # La respuesta elegida era de un insulto que ya no existe: se muestra el turno nuevo
+            await interaction.response.edit_message(content=self.get_status_message(), view=self)
+            await interaction.followup.send("🔄 El contenido del duelo ha cambiado: se ha repartido un insulto nuevo.", ephemeral=True)
+            return
+
+        valores = interaction.data.get('values') or ()
+        if len(valores) != 1 or valores[0] not in [str(codigo) for codigo in state.opciones]:
+            # Solo se aceptan las opciones del turno: un valor ajeno no toca el estado
+            await interaction.response.send_message("Esa respuesta no es válida. Elige otra.", ephemeral=True)
+            return
+
+        selected_answer = int(valores[0])
+        correct_answer = self.answer_text(0)
+        state.answer(selected_answer)
+
+        if selected_answer == 0:
+            # La respuesta fue correcta, el defensor pierde un punto
+            state.vidas[defensor] -= 1
+            result_text = f"✅ ¡Correcto! **{state.nombres[defensor]}** pierde una vida."
+        else:
+            # La respuesta fue incorrecta, el atacante pierde un punto
+            state.vidas[atacante] -= 1
+            result_text = f"❌ ¡Incorrecto! La respuesta era:\n> *{correct_answer}*\n**{state.nombres[atacante]}** pierde una vida."
+
+        game_events.game_event('respuesta', state, interaction, correcta=selected_answer == 0, vidas=list(state.vidas))
+
+        if state.vidas[defensor] <= 0:
+            await self.game_over(interaction, winner=atacante, loser=defensor)
+            return
+        elif state.vidas[atacante] <= 0:
+            await self.game_over(interaction, winner=defensor, loser=atacante)
+            return
+        
+        # Cambiar de turno
+        state.turno = 1 - state.turno
+        self.setup_turn()
+        self.persist()
+        
+        await interaction.response.edit_message(content=self.get_status_message(result_text=result_text), view=self)
+
+    async def game_over(self, interaction: discord.Interaction, winner: int, loser: int):
+        """Finaliza el juego y declara un ganador."""
+        self.finish(game_records.victory(winner))
+        self.record_match(winner)
+        self.build_select(terminada=True)
+        
+        final_message = (
+            f"🤺 **¡Duelo finalizado!** 🤺\n"
+            f"🏆 **<@{self.state.jugadores[winner]}>** ha derrotado a **<@{self.state.jugadores[loser]}>** con su ingenio superior! 🏆"
+        )
+        await interaction.response.edit_message(content=final_message, view=self)
+        game_events.game_event('partida_terminada', self.state, interaction, resultado='victoria', ganador=self.state.jugadores[winner])
+
+    async def on_timeout(self):
+        self.build_select(terminada=True)
+        try:
+            await self.render_expiry("⌛ El duelo ha expirado por inactividad. ⌛")
+            game_events.game_event('partida_expirada', self.state, nivel=logging.WARNING)
+        except discord.NotFound:
+            pass
+
+# --- COG ---
+class Duelo(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        global contenido
+        contenido = DuelContent(RUTA_CONTENIDO_DUELOS, CACHE_INSULTOS, IDIOMA_DUELOS)
+        await asyncio.to_thread(contenido.open)
+        await partidas.register_game(DueloState, DueloView)
+
+    async def cog_unload(self):
+        partidas.unregister_game(DueloState.TIPO)
+        contenido.close()
+
+    @app_commands.command(name="duelo", description="Reta a otro miembro a un duelo de insultos.")
+    @app_commands.describe(oponente="El miembro al que quieres retar.")
+    @rate_limits.game_check()
+    async def duelo_command(self, interaction: discord.Interaction, oponente: discord.Member):
+        try:
+            if oponente == interaction.user:
+                await interaction.response.send_message("No puedes retarte a ti mismo, genio. 😒", ephemeral=True)
+                return
+            if oponente.bot:
+                await interaction.response.send_message("No puedes retar a un bot. No tienen sentimientos que herir. 🤖", ephemeral=True)
+                return
+            
+            idioma = contenido.language(interaction.guild_locale)
+            state = DueloState((interaction.user.id, oponente.id), (interaction.user.name, oponente.name), idioma)
+            view = DueloView(state)
+            initial_message = view.get_status_message()
+        
+            await interaction.response.send_message(content=initial_message, view=view)
+            view.bind_message(await interaction.original_response(), interaction.guild_id)
+        
+            game_events.game_event('partida_iniciada', state, interaction, rival=oponente.id)
+        
+        except Exception as e:
+            logger.exception(f"Error en comando duelo: {e}")
+            await interaction.response.send_message("Ocurrió un error iniciando el duelo.", ephemeral=True)
+
+    async def start_pvp(self, channel: discord.abc.Messageable, guild_id: int, jugadores: tuple, nombres: tuple) -> discord.Message:
+        """Arranca en `channel` un duelo entre dos jugadores emparejados por /buscar (con el idioma predeterminado)."""
+        state = DueloState(jugadores, nombres, contenido.language(None))
+        view = DueloView(state)
+        message = await channel.send(content=view.get_status_message(), view=view)
+        view.bind_message(message, guild_id)
+        game_events.game_event('partida_iniciada', state, rival=jugadores[1], emparejada=True)
+        return message
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Duelo(bot))
@@ -0,0 +1,311 @@
+"""
+Extensión de k en raya: comando /enraya (Conecta 4 y Gomoku) y su vista.
+
+La IA usa kinarow_engine. Sus búsquedas se ejecutan en un pool de procesos con
+un presupuesto de tiempo por jugada, para que una búsqueda profunda nunca
+bloquee el bucle de eventos.
+"""
+import discord
+from discord import app_commands, ui
+from discord.ext import commands
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import game_events
+import game_records
+import partidas
+import rate_limits
+from partidas import PartidaView
+import kinarow_engine
+from config import PROCESOS_MOTOR
+from game_state import EnRayaState
+
+logger = logging.getLogger('discord_bot')
+
+# --- CONSTANTES ---
+SIMBOLOS = ('🔴', '🟡')
+EMOJI_VACIA = '⚪'
+NUMEROS = ('1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟')
+NOMBRES_VARIANTE = {"conecta4": "Conecta 4", "gomoku": "Gomoku 5x5 (4 en raya)"}
+MARGEN_BUSQUEDA = 2.0  # Segundos de espera extra sobre el presupuesto antes de abandonar el pool
+
+# --- BÚSQUEDA EN SEGUNDO PLANO ---
+_pool = None
+_pensando = set()  # game_id de las partidas cuya jugada de la IA está en curso
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Crea el pool de búsqueda la primera vez que hace falta."""
+    global _pool
+    if _pool is None:
+        # 'spawn' como en cluster.py: hacer fork de un proceso con hilos (logging) no es seguro
+        _pool = ProcessPoolExecutor(max_workers=PROCESOS_MOTOR, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def ia_search(state: EnRayaState) -> int:
+    """Calcula la jugada de la IA en el pool de procesos y devuelve su casilla."""
+    global _pool
+    args = state.search_args()
+    presupuesto = args[-2]
+    try:
+        casilla, valor, profundidad = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(_get_pool(), kinarow_engine.search, *args),
+            presupuesto + MARGEN_BUSQUEDA
+        )
+        game_events.game_event('busqueda_ia', state, nivel=logging.DEBUG, casilla=casilla, valor=valor, profundidad=profundidad)
+        return casilla
+    except (asyncio.TimeoutError, BrokenProcessPool) as e:
+        # Pool saturado o caído: jugada rápida en el propio proceso, con poca profundidad
+        logger.warning(f"[EnRaya] Búsqueda en el pool fallida ({type(e).__name__}); se usa una búsqueda corta local.")
+        if isinstance(e, BrokenProcessPool):
+            _pool = None
+        return kinarow_engine.search(*args[:-2], 0.05, 2)[0]
+
+# --- VISTA ---
+class EnRayaView(PartidaView):
+    TIMEOUT = 600
+
+    def __init__(self, state: EnRayaState):
+        super().__init__(state)
+        self.update_board_display()
+
+    def update_board_display(self, terminada: bool = False):
+        """
+        Fija los botones según el estado (ver render_cache.py). Con gravedad
+        solo dependen de qué columnas están llenas; sin ella, del tablero.
+        """
+        state = self.state
+        g = state.geometria
+        terminada = terminada or state.is_full()
+        if g.gravedad:
+            ocupadas = state.fichas[0] | state.fichas[1]
+            tablero = tuple(g.drop(ocupadas, c) == -1 for c in range(g.ancho))
+        else:
+            tablero = tuple(state.fichas)
+        self.use_template((state.TIPO, state.variante, tablero, terminada), lambda: self.build_board(terminada))
+
+    def build_board(self, terminada: bool):
+        """Construye los botones a partir del estado: uno por columna con gravedad, uno por casilla sin ella."""
+        state = self.state
+        g = state.geometria
+        ocupadas = state.fichas[0] | state.fichas[1]
+        if g.gravedad:
+            for c in range(g.ancho):
+                llena = g.drop(ocupadas, c) == -1
+                self.add_item(ui.Button(style=discord.ButtonStyle.secondary, label=str(c + 1), disabled=terminada or llena,
+                                        custom_id=self.make_custom_id(str(c)), row=c // 5))
+            return
+        for fila in reversed(range(g.alto)):
+            for c in range(g.ancho):
+                index = g.index(c, fila)
+                ocupante = state.casilla(index)
+                if ocupante is None:
+                    button = ui.Button(style=discord.ButtonStyle.secondary, label=EMOJI_VACIA, disabled=terminada,
+                                       custom_id=self.make_custom_id(str(index)), row=g.alto - 1 - fila)
+                else:
+                    button = ui.Button(style=discord.ButtonStyle.secondary, label=SIMBOLOS[ocupante], disabled=True,
+                                       custom_id=self.make_custom_id(str(index)), row=g.alto - 1 - fila)
+                self.add_item(button)
+
+    def board_text(self) -> str:
+        """Dibuja el tablero en el mensaje (solo con gravedad; sin ella lo muestran los botones)."""
+        g = self.state.geometria
+        if not g.gravedad:
+            return ""
+        filas = []
+        for fila in reversed(range(g.alto)):
+            filas.append(''.join(
+                EMOJI_VACIA if (ocupante := self.state.casilla(g.index(c, fila))) is None else SIMBOLOS[ocupante]
+                for c in range(g.ancho)
+            ))
+        filas.append(''.join(NUMEROS[c] for c in range(g.ancho)))
+        return '\n'.join(filas) + '\n\n'
+
+    def get_status_message(self, winner: int = None, is_draw_game: bool = False, pensando: bool = False) -> str:
+        """Genera el mensaje de estado del juego."""
+        state = self.state
+        cabecera = f"**{NOMBRES_VARIANTE[state.variante]}**: <@{state.jugadores[0]}> {SIMBOLOS[0]} vs <@{state.jugadores[1]}> {SIMBOLOS[1]}\n"
+        if winner is not None:
+            estado = f"🎉 **<@{state.jugadores[winner]}> ha ganado la partida con {SIMBOLOS[winner]}!** 🎉"
+        elif is_draw_game:
+            estado = "🤝 **¡Es un empate!** 🤝"
+        elif pensando:
+            estado = "🤖 La IA está pensando..."
+        else:
+            estado = f"Turno de **<@{state.jugadores[state.turno]}>** ({SIMBOLOS[state.turno]})."
+        return cabecera + self.board_text() + estado
+
+    async def end_if_over(self, interaction: discord.Interaction, jugador: int) -> bool:
+        """Termina la partida si `jugador` acaba de ganar o el tablero está lleno."""
+        state = self.state
+        if state.has_won(jugador):
+            self.finish(game_records.victory(jugador))
+            self.record_match(jugador, state.variante)
+            self.update_board_display(terminada=True)
+            await self.render(interaction, self.get_status_message(winner=jugador))
+            game_events.game_event('partida_terminada', state, interaction, variante=state.variante, resultado='victoria',
+                                   ganador=state.jugadores[jugador], ia=state.ia and jugador == 1)
+            return True
+        if state.is_full():
+            self.finish(game_records.EMPATE)
+            self.record_match(juego=state.variante)
+            self.update_board_display()
+            await self.render(interaction, self.get_status_message(is_draw_game=True))
+            game_events.game_event('partida_terminada', state, interaction, variante=state.variante, resultado='empate')
+            return True
+        return False
+
+    async def process_move(self, interaction: discord.Interaction, index: int):
+        """Procesa un movimiento del jugador."""
+        try:
+            state = self.state
+            jugador = state.turno
+            game_events.game_event('jugada', state, interaction, casilla=index, jugador=jugador)
+            state.place(index, jugador)
+            if await self.end_if_over(interaction, jugador):
+                return
+
+            state.turno = 1 - jugador
+            self.persist()
+            self.update_board_display()
+            if state.ia:
+                await self.process_ia_move(interaction)
+            else:
+                await self.render(interaction, self.get_status_message())
+
+        except Exception as e:
+            logger.exception(f"Error en process_move de EnRaya: {e}")
+            await interaction.followup.send("Ocurrió un error procesando el movimiento.", ephemeral=True)
+
+    async def process_ia_move(self, interaction: discord.Interaction):
+        """Procesa el movimiento de la IA sin bloquear el bucle mientras busca."""
+        state = self.state
+        _pensando.add(state.game_id)
+        try:
+            busqueda = asyncio.ensure_future(ia_search(state))
+            await self.render(interaction, self.get_status_message(pensando=True))
+            index = await busqueda
+        except Exception as e:
+            logger.exception(f"Error en process_ia_move de EnRaya: {e}")
+            return
+        finally:
+            _pensando.discard(state.game_id)
+
+        if not self.is_active() or state.turno != 1:
+            return  # La partida expiró o se recargó mientras la IA pensaba
+        try:
+            if index != -1:
+                state.place(index, 1)
+                game_events.game_event('jugada', state, casilla=index, jugador=1, ia=True)
+                if await self.end_if_over(interaction, 1):
+                    return
+            state.turno = 0
+            self.persist()
+            self.update_board_display()
+            await self.render(interaction, self.get_status_message())
+        except Exception as e:
+            logger.exception(f"Error en process_ia_move de EnRaya: {e}")
+
+    async def dispatch(self, interaction: discord.Interaction, sufijo: str):
+        await self.button_callback(interaction, int(sufijo))
+
+    async def button_callback(self, interaction: discord.Interaction, accion: int):
+        """Callback para los botones de columna o casilla."""
+        try:
+            state = self.state
+            if state.ia and state.turno == 1 and state.game_id not in _pensando:
+                # La jugada de la IA se interrumpió (p. ej. por una recarga): se retoma
+                await interaction.response.defer()
+                await self.process_ia_move(interaction)
+                return
+
+            if interaction.user.id != state.jugadores[state.turno]:
+                await interaction.response.send_message("¡Espera tu turno! 🕰️", ephemeral=True)
+                return
+
+            index = state.target(accion)
+            if index == -1:
+                await interaction.response.send_message("Ahí no se puede jugar. Elige otra.", ephemeral=True)
+                return
+
+            await interaction.response.defer()
+            await self.process_move(interaction, index)
+
+        except Exception as e:
+            logger.exception(f"Error en button_callback de EnRaya: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("Ocurrió un error inesperado.", ephemeral=True)
+
+    async def on_timeout(self):
+        """Se ejecuta cuando expira el timeout."""
+        self.update_board_display(terminada=True)
+        try:
+            await self.render_expiry(f"{self.board_text()}⌛ La partida ha expirado por inactividad. ⌛")
+            game_events.game_event('partida_expirada', self.state, nivel=logging.WARNING, variante=self.state.variante)
+        except discord.NotFound:
+            logger.warning("Mensaje no encontrado durante timeout de EnRaya")
+        except Exception as e:
+            logger.exception(f"Error durante timeout de EnRaya: {e}")
+
+# --- COG ---
+class EnRaya(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        await partidas.register_game(EnRayaState, EnRayaView)
+
+    async def cog_unload(self):
+        partidas.unregister_game(EnRayaState.TIPO)
+        _shutdown_pool()
+
+    @app_commands.command(name="enraya", description="Juega a Conecta 4 o Gomoku contra la IA o contra otro miembro.")
+    @app_commands.describe(
+        juego="Variante del juego.",
+        oponente="Opcional: Menciona a un jugador para JvJ. Si se omite, jugarás contra la IA.",
+        dificultad="Opcional: Nivel de la IA (solo contra la IA)."
+    )
+    @app_commands.choices(
+        juego=[app_commands.Choice(name=nombre, value=clave) for clave, nombre in NOMBRES_VARIANTE.items()],
+        dificultad=[
+            app_commands.Choice(name="Fácil", value="facil"),
+            app_commands.Choice(name="Normal", value="normal"),
+            app_commands.Choice(name="Difícil", value="dificil"),
+        ],
+    )
+    @rate_limits.game_check()
+    async def enraya_command(self, interaction: discord.Interaction, juego: str, oponente: discord.Member = None,
+                             dificultad: str = kinarow_engine.NIVEL_POR_DEFECTO):
+        try:
+            if oponente == interaction.user:
+                await interaction.response.send_message("No puedes jugar contra ti mismo. 😅", ephemeral=True)
+                return
+            if oponente == self.bot.user:
+                oponente = None
+
+            rival = oponente or self.bot.user # Se asigna el bot como jugador 2 si es IA
+            state = EnRayaState(
+                (interaction.user.id, rival.id), (interaction.user.name, rival.name), juego,
+                ia=oponente is None, dificultad=dificultad
+            )
+            view = EnRayaView(state)
+
+            await interaction.response.send_message(content=view.get_status_message(), view=view)
+            view.bind_message(await interaction.original_response(), interaction.guild_id)
+
+            game_events.game_event('partida_iniciada', state, interaction, variante=juego, rival=rival.id, ia=state.ia, dificultad=dificultad)
+
+        except Exception as e:
+            logger.exception(f"Error en comando enraya: {e}")
+            await interaction.response.send_message("Ocurrió un error iniciando el juego.", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(EnRaya(bot))
@@ -0,0 +1,105 @@
+"""
+Extensión de estadísticas: comandos /ranking y /estadisticas.
+
+Ambos se responden desde la memoria de player_stats (el top-K de cada ámbito y
+los marcadores agregados), sin consultar la base de datos.
+"""
+import discord
+from discord import app_commands
+from discord.ext import commands
+import logging
+
+import game_events
+import partidas
+import player_stats
+
+logger = logging.getLogger('discord_bot')
+
+# --- CONSTANTES ---
+# Clave de las estadísticas -> nombre que se muestra
+NOMBRES_JUEGO = {
+    "ttt": "Tres en Raya",
+    "conecta4": "Conecta 4",
+    "gomoku": "Gomoku",
+    "duelo": "Duelo de insultos",
+    "adv": "Adivina el Número",
+}
+MEDALLAS = ('🥇', '🥈', '🥉')
+
+def describir(marcador: player_stats.Marcador, juego: str) -> str:
+    if juego == "adv": # Sin rival: solo aciertos, fallos y la mejor marca
+        texto = f"{marcador.victorias} aciertos, {marcador.derrotas} fallos"
+        if marcador.mejor is not None:
+            texto += f" (mejor: {marcador.mejor} intentos)"
+        return texto
+    return f"{marcador.puntos} pts · {marcador.victorias}V {marcador.empates}E {marcador.derrotas}D"
+
+# --- COG ---
+class Estadisticas(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="ranking", description="Muestra la clasificación de los mejores jugadores.")
+    @app_commands.describe(
+        juego="Opcional: Juego concreto. Si se omite, se suman todos.",
+        ambito="Opcional: Este servidor (por defecto) o todos."
+    )
+    @app_commands.choices(
+        juego=[app_commands.Choice(name=nombre, value=clave) for clave, nombre in NOMBRES_JUEGO.items()],
+        ambito=[
+            app_commands.Choice(name="Este servidor", value="servidor"),
+            app_commands.Choice(name="Global", value="global"),
+        ],
+    )
+    async def ranking_command(self, interaction: discord.Interaction, juego: str = player_stats.TODOS, ambito: str = "servidor"):
+        try:
+            guild_id = interaction.guild_id if ambito == "servidor" else player_stats.GLOBAL
+            if guild_id is None:
+                ambito = "global" # En mensajes directos solo hay ranking global
+            top = partidas.stats.top(guild_id, juego)
+
+            titulo = NOMBRES_JUEGO.get(juego, "Todos los juegos")
+            cabecera = f"🏆 **Ranking {'global' if ambito == 'global' else 'del servidor'}: {titulo}** 🏆\n"
+            if not top:
+                await interaction.response.send_message(cabecera + "Todavía no hay partidas registradas.", ephemeral=True)
+                return
+            lineas = [
+                f"{MEDALLAS[i] if i < len(MEDALLAS) else f'**{i + 1}.**'} <@{user_id}> — {describir(marcador, juego)}"
+                for i, (user_id, marcador) in enumerate(top)
+            ]
+            # Las menciones solo sirven para mostrar el nombre: no se notifica a nadie
+            await interaction.response.send_message(
+                cabecera + '\n'.join(lineas), allowed_mentions=discord.AllowedMentions.none()
+            )
+            game_events.event('ranking', guild_id=interaction.guild_id, user_id=interaction.user.id, ambito=ambito, juego=juego)
+
+        except Exception as e:
+            logger.exception(f"Error en comando ranking: {e}")
+            await interaction.response.send_message("Ocurrió un error mostrando el ranking.", ephemeral=True)
+
+    @app_commands.command(name="estadisticas", description="Muestra tus estadísticas o las de otro miembro.")
+    @app_commands.describe(usuario="Opcional: Miembro cuyas estadísticas quieres ver.")
+    async def estadisticas_command(self, interaction: discord.Interaction, usuario: discord.User = None):
+        try:
+            usuario = usuario or interaction.user
+            total = partidas.stats.get(usuario.id)
+            if total is None:
+                await interaction.response.send_message(f"**{usuario.display_name}** todavía no ha jugado ninguna partida.", ephemeral=True)
+                return
+
+            lineas = [f"📊 **Estadísticas de {usuario.display_name}** 📊"]
+            lineas.append(f"Total: {total.partidas} partidas · {describir(total, player_stats.TODOS)}")
+            for juego, marcador in sorted(partidas.stats.games_of(usuario.id).items()):
+                lineas.append(f"• {NOMBRES_JUEGO.get(juego, juego)}: {describir(marcador, juego)}")
+            if interaction.guild_id is not None:
+                puestos = [user_id for user_id, _ in partidas.stats.top(interaction.guild_id)]
+                if usuario.id in puestos:
+                    lineas.append(f"Puesto en este servidor: **{puestos.index(usuario.id) + 1}**")
+            await interaction.response.send_message('\n'.join(lineas), ephemeral=True)
+
+        except Exception as e:
+            logger.exception(f"Error en comando estadisticas: {e}")
+            await interaction.response.send_message("Ocurrió un error mostrando las estadísticas.", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Estadisticas(bot))
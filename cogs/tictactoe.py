@@ -0,0 +1,231 @@
+"""
+Extensión del Tres en Raya: comando /tictactoe y su vista.
+
+También arranca las partidas JvJ que forma /buscar (ver `start_pvp`).
+"""
+import discord
+from discord import app_commands, ui
+from discord.ext import commands
+import logging
+
+import game_events
+import game_records
+import partidas
+import rate_limits
+from partidas import PartidaView
+import tictactoe_engine
+from game_state import TicTacToeState
+
+logger = logging.getLogger('discord_bot')
+
+# --- CONSTANTES Y LÓGICA DE JUEGO ---
+SIMBOLO_X = '❌'
+SIMBOLO_O = '⭕'
+EMOJI_VACIA = '⬜'
+
+def intro_message(jugador: int, oponente: int = None, dificultad: str = None) -> str:
+    """Mensaje inicial de la partida; `oponente` es None contra la IA."""
+    if oponente is None:
+        mensaje = f"**¡Tres en Raya contra la IA!** 🤖 (nivel {dificultad})\n<@{jugador}> eres {SIMBOLO_X}."
+    else:
+        mensaje = f"**¡Tres en Raya JvJ!** 🤝\n<@{jugador}> ({SIMBOLO_X}) vs <@{oponente}> ({SIMBOLO_O})."
+    return mensaje + f"\n\nTurno de **<@{jugador}>** ({SIMBOLO_X}). ¡Haz clic en una casilla!"
+
+# --- VISTA ---
+class TicTacToeView(PartidaView):
+    TIMEOUT = 300
+    SIMBOLOS = (SIMBOLO_X, SIMBOLO_O)
+
+    def __init__(self, state: TicTacToeState):
+        super().__init__(state)
+        self.update_board_display()
+
+    def update_board_display(self, winner: int = None, terminada: bool = False):
+        """Fija los botones del tablero según el estado: una plantilla por tablero y fase (ver render_cache.py)."""
+        terminada = terminada or winner is not None or self.state.is_full()
+        self.use_template((self.state.TIPO, self.state.tablero, terminada), lambda: self.build_board(terminada))
+
+    def build_board(self, terminada: bool):
+        """Construye los botones del tablero a partir del estado."""
+        for i in range(9):
+            ocupante = self.state.casilla(i)
+            if ocupante == 0:
+                button = ui.Button(style=discord.ButtonStyle.danger, label=SIMBOLO_X, disabled=True, custom_id=self.make_custom_id(str(i)), row=i//3)
+            elif ocupante == 1:
+                button = ui.Button(style=discord.ButtonStyle.success, label=SIMBOLO_O, disabled=True, custom_id=self.make_custom_id(str(i)), row=i//3)
+            else:
+                button = ui.Button(style=discord.ButtonStyle.secondary, label=EMOJI_VACIA, disabled=terminada, custom_id=self.make_custom_id(str(i)), row=i//3)
+            self.add_item(button)
+
+    def get_status_message(self, winner: int = None, is_draw_game: bool = False) -> str:
+        """Genera el mensaje de estado del juego."""
+        if winner is not None:
+            return f"🎉 **<@{self.state.jugadores[winner]}> ha ganado la partida con {self.SIMBOLOS[winner]}!** 🎉"
+        if is_draw_game:
+            return "🤝 **¡Es un empate!** 🤝"
+        turno = self.state.turno
+        return f"Turno de **<@{self.state.jugadores[turno]}>** ({self.SIMBOLOS[turno]}). ¡Elige tu casilla!"
+
+    async def process_move(self, interaction: discord.Interaction, index: int):
+        """Procesa un movimiento del jugador."""
+        try:
+            state = self.state
+            jugador = state.turno
+            game_events.game_event('jugada', state, interaction, casilla=index, jugador=jugador)
+            state.place(index, jugador)
+            
+            if state.has_won(jugador):
+                self.finish(game_records.victory(jugador))
+                self.record_match(jugador)
+                self.update_board_display(winner=jugador)
+                await self.render(interaction, self.get_status_message(winner=jugador))
+                game_events.game_event('partida_terminada', state, interaction, resultado='victoria', ganador=interaction.user.id)
+                return
+                
+            if state.is_full():
+                self.finish(game_records.EMPATE)
+                self.record_match()
+                self.update_board_display()
+                await self.render(interaction, self.get_status_message(is_draw_game=True))
+                game_events.game_event('partida_terminada', state, interaction, resultado='empate')
+                return
+                
+            state.turno = 1 - jugador
+            
+            if state.ia:
+                await self.process_ia_move(interaction)
+            else:
+                self.persist()
+                self.update_board_display()
+                await self.render(interaction, self.get_status_message())
+                
+        except Exception as e:
+            logger.exception(f"Error en process_move: {e}")
+            await interaction.followup.send("Ocurrió un error procesando el movimiento.", ephemeral=True)
+
+    async def process_ia_move(self, interaction: discord.Interaction):
+        """Procesa el movimiento de la IA."""
+        try:
+            state = self.state
+            ia_index = state.ia_move()
+            
+            if ia_index != -1:
+                state.place(ia_index, 1)
+                game_events.game_event('jugada', state, casilla=ia_index, jugador=1, ia=True)
+                
+                if state.has_won(1):
+                    self.finish(game_records.victory(1))
+                    self.record_match(1)
+                    self.update_board_display(winner=1)
+                    await self.render(interaction, self.get_status_message(winner=1))
+                    game_events.game_event('partida_terminada', state, interaction, resultado='victoria', ganador=state.jugadores[1], ia=True)
+                    return
+                    
+                if state.is_full():
+                    self.finish(game_records.EMPATE)
+                    self.record_match()
+                    self.update_board_display()
+                    await self.render(interaction, self.get_status_message(is_draw_game=True))
+                    game_events.game_event('partida_terminada', state, interaction, resultado='empate')
+                    return
+                    
+            state.turno = 0
+            self.persist()
+            self.update_board_display()
+            await self.render(interaction, self.get_status_message())
+            
+        except Exception as e:
+            logger.exception(f"Error en process_ia_move: {e}")
+
+    async def dispatch(self, interaction: discord.Interaction, sufijo: str):
+        await self.button_callback(interaction, int(sufijo))
+
+    async def button_callback(self, interaction: discord.Interaction, index: int):
+        """Callback para los botones del tablero."""
+        try:
+            if interaction.user.id != self.state.jugadores[self.state.turno]:
+                await interaction.response.send_message("¡Espera tu turno! 🕰️", ephemeral=True)
+                return
+                
+            if not self.state.is_free(index):
+                await interaction.response.send_message("Esa casilla ya está ocupada. Elige otra.", ephemeral=True)
+                return
+                
+            await interaction.response.defer()
+            await self.process_move(interaction, index)
+            
+        except Exception as e:
+            logger.exception(f"Error en button_callback: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("Ocurrió un error inesperado.", ephemeral=True)
+
+    async def on_timeout(self):
+        """Se ejecuta cuando expira el timeout."""
+        self.update_board_display(terminada=True)
+        try:
+            await self.render_expiry("⌛ La partida ha expirado por inactividad. ⌛")
+            game_events.game_event('partida_expirada', self.state, nivel=logging.WARNING)
+        except discord.NotFound:
+            logger.warning("Mensaje no encontrado durante timeout de TicTacToe")
+        except Exception as e:
+            logger.exception(f"Error durante timeout de TicTacToe: {e}")
+
+# --- COG ---
+class TicTacToe(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        await partidas.register_game(TicTacToeState, TicTacToeView)
+
+    async def cog_unload(self):
+        partidas.unregister_game(TicTacToeState.TIPO)
+
+    @app_commands.command(name="tictactoe", description="Inicia Tres en Raya.")
+    @app_commands.describe(
+        oponente="Opcional: Menciona a un jugador para JvJ. Si se omite, jugarás contra la IA.",
+        dificultad="Opcional: Nivel de la IA (solo contra la IA)."
+    )
+    @app_commands.choices(dificultad=[
+        app_commands.Choice(name="Fácil", value="facil"),
+        app_commands.Choice(name="Normal", value="normal"),
+        app_commands.Choice(name="Difícil", value="dificil"),
+    ])
+    @rate_limits.game_check()
+    async def tictactoe_command(self, interaction: discord.Interaction, oponente: discord.Member = None, dificultad: str = tictactoe_engine.NIVEL_POR_DEFECTO):
+        try:
+            if oponente == interaction.user:
+                await interaction.response.send_message("No puedes jugar contra ti mismo. 😅", ephemeral=True)
+                return
+            
+            if oponente == self.bot.user:
+                oponente = None
+            
+            rival = oponente or self.bot.user # Se asigna el bot como jugador 2 si es IA
+            state = TicTacToeState(
+                (interaction.user.id, rival.id), (interaction.user.name, rival.name),
+                ia=oponente is None, dificultad=dificultad
+            )
+            view = TicTacToeView(state)
+            initial_message = intro_message(interaction.user.id, None if oponente is None else oponente.id, dificultad)
+        
+            await interaction.response.send_message(content=initial_message, view=view)
+            view.bind_message(await interaction.original_response(), interaction.guild_id)
+        
+            game_events.game_event('partida_iniciada', state, interaction, rival=rival.id, ia=state.ia, dificultad=dificultad)
+        
+        except Exception as e:
+            logger.exception(f"Error en comando tictactoe: {e}")
+            await interaction.response.send_message("Ocurrió un error iniciando el juego.", ephemeral=True)
+
+    async def start_pvp(self, channel: discord.abc.Messageable, guild_id: int, jugadores: tuple, nombres: tuple) -> discord.Message:
+        """Arranca en `channel` una partida JvJ entre dos jugadores emparejados por /buscar."""
+        state = TicTacToeState(jugadores, nombres)
+        view = TicTacToeView(state)
+        message = await channel.send(content=intro_message(*jugadores), view=view)
+        view.bind_message(message, guild_id)
+        game_events.game_event('partida_iniciada', state, rival=jugadores[1], ia=False, emparejada=True)
+        return message
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TicTacToe(bot))
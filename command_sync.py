@@ -0,0 +1,75 @@
+"""
+Sincronización de comandos slash condicionada a cambios.
+
+El árbol de comandos se serializa y se resume con SHA-256. La huella se compara
+con la de la última sincronización correcta, guardada en un archivo local, y
+solo se llama a la API de Discord (un endpoint con rate limit estricto) si el
+árbol ha cambiado.
+"""
+import hashlib
+import json
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger('discord_bot.command_sync')
+
+RUTA_CACHE = '.comandos_sincronizados.json'
+
+def serialize_tree(tree: discord.app_commands.CommandTree, guild: discord.abc.Snowflake = None) -> list:
+    """Devuelve la carga JSON que se enviaría a Discord para el árbol de comandos."""
+    carga = []
+    for comando in tree.get_commands(guild=guild):
+        try:
+            carga.append(comando.to_dict(tree)) # discord.py >= 2.4
+        except TypeError:
+            carga.append(comando.to_dict())
+    return sorted(carga, key=lambda c: (c.get('type', 1), c['name']))
+
+def tree_hash(carga: list) -> str:
+    texto = json.dumps(carga, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def _load_cache(ruta: str) -> dict:
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(ruta: str, cache: dict):
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temporal, ruta)
+
+async def sync_commands(bot, guild_id: int = None, forzar: bool = False, ruta_cache: str = RUTA_CACHE):
+    """
+    Sincroniza el árbol de comandos solo si ha cambiado desde la última vez.
+
+    Args:
+        bot: El bot cuyo árbol de comandos se sincroniza.
+        guild_id: Si se indica, modo desarrollo: los comandos globales se copian
+            a ese servidor y se sincronizan solo allí (se aplican al instante).
+        forzar: Sincroniza aunque la huella no haya cambiado.
+        ruta_cache: Archivo donde se guardan las huellas de cada ámbito.
+
+    Returns:
+        La lista de comandos sincronizados, o None si no hacía falta sincronizar.
+    """
+    guild = discord.Object(id=guild_id) if guild_id else None
+    if guild is not None:
+        bot.tree.copy_global_to(guild=guild)
+
+    huella = tree_hash(serialize_tree(bot.tree, guild))
+    clave = f"{bot.application_id}:{f'guild:{guild_id}' if guild_id else 'global'}"
+    cache = _load_cache(ruta_cache)
+    if not forzar and cache.get(clave) == huella:
+        logger.info(f"Comandos sin cambios ({clave}); se omite la sincronización.")
+        return None
+
+    synced = await bot.tree.sync(guild=guild)
+    cache[clave] = huella
+    _save_cache(ruta_cache, cache)
+    return synced
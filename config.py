@@ -4,4 +4,101 @@ Almacena aquí las variables sensibles como tokens y claves de API.
 """
 
 # Reemplaza 'TU_TOKEN_AQUÍ' con el token real de tu bot de Discord.
-DISCORD_TOKEN = "TU_TOKEN_AQUÍ"
\ No newline at end of file
+DISCORD_TOKEN = "TU_TOKEN_AQUÍ"
+
+# Usa AutoShardedBot en un solo proceso, con el número de shards recomendado por Discord.
+# Para repartir los shards entre varios procesos, usa cluster.py.
+USAR_AUTOSHARDING = False
+
+# Modo ligero de gateway: el bot solo se suscribe a los eventos de servidores y no guarda en
+# caché mensajes ni miembros, ni los pide al conectar. Los juegos solo usan interacciones, así
+# que no pierden nada, y la memoria por servidor baja mucho (ver bench_gateway.py).
+# False vuelve a los intents por defecto de discord.py.
+MODO_LIGERO = True
+
+# Modo desarrollo: si se indica el ID de un servidor, los comandos slash se sincronizan
+# solo en él (se aplican al instante). None sincroniza los comandos globales.
+# La sincronización solo se hace si el árbol de comandos cambió; para forzarla,
+# borra el archivo '.comandos_sincronizados.json'.
+GUILD_DESARROLLO_ID = None
+
+# Extensiones que se cargan al arrancar: cada juego es un módulo de cogs/ que se puede
+# cargar, descargar o recargar en caliente con /extension sin reiniciar el bot.
+EXTENSIONES = ['cogs.tictactoe', 'cogs.adivinar', 'cogs.duelo', 'cogs.enraya', 'cogs.estadisticas', 'cogs.buscar', 'cogs.admin']
+
+# Procesos dedicados a las búsquedas de la IA de /enraya (Conecta 4, Gomoku).
+# Cada proceso del clúster tiene su propio pool.
+PROCESOS_MOTOR = 2
+
+# Emparejamiento de /buscar: diferencia de nivel aceptada al entrar en la cola, cuánto crece
+# cada INTERVALO segundos de espera y su máximo, y segundos de espera antes de abandonar.
+EMPAREJAMIENTO_VENTANA_INICIAL = 100
+EMPAREJAMIENTO_AMPLIACION = 50
+EMPAREJAMIENTO_INTERVALO = 5.0
+EMPAREJAMIENTO_VENTANA_MAXIMA = 1000
+EMPAREJAMIENTO_ESPERA_MAXIMA = 600.0
+
+# Ritmo máximo al que se editan los mensajes de partidas expiradas por inactividad.
+# Las partidas terminan al instante; solo se reparte en el tiempo la edición de sus mensajes.
+EXPIRACIONES_POR_SEGUNDO = 20
+
+# Segundos que una interacción espera a que termine la anterior de la misma partida (p. ej.
+# mientras piensa la IA) antes de darse por duplicada. Debe quedar por debajo de los 3 s que
+# da Discord para reconocerla.
+ESPERA_MAXIMA_TURNO = 2.0
+
+# Límites de los comandos que abren partidas (ver rate_limits.py). Cada límite es una cubeta de
+# fichas (capacidad, fichas por segundo): la capacidad es la ráfaga permitida y el ritmo, lo que
+# se recupera. Se aplican por usuario, por servidor y por comando (entre todos los usuarios).
+# En modo clúster cada proceso lleva sus propias cuentas.
+LIMITE_USUARIO = (5, 1 / 10)
+LIMITE_SERVIDOR = (60, 1.0)
+LIMITE_COMANDO = (300, 20.0)
+# Partidas activas a la vez como máximo por usuario y por servidor.
+MAX_PARTIDAS_POR_USUARIO = 3
+MAX_PARTIDAS_POR_SERVIDOR = 500
+
+# Jugadores que muestra /ranking. Las clasificaciones se mantienen en memoria con este tamaño.
+# En modo clúster cada proceso tiene sus propias estadísticas: el ranking global solo
+# incluye los servidores de sus shards.
+TAMANO_RANKING = 10
+
+# Tamaño (en bytes) a partir del cual el registro binario de partidas terminadas empieza
+# un segmento nuevo (ver game_records.py). Una partida ocupa unos 10-20 bytes.
+TAMANO_SEGMENTO_REGISTROS = 8 * 1024 * 1024
+
+# Contenido del Duelo de Insultos (ver duel_content.py): fichero con los paquetes de insultos,
+# idioma de los servidores sin paquete en el suyo e insultos que se mantienen en caché. El fichero
+# es de solo lectura para el bot y lo comparten todos los procesos del clúster.
+RUTA_CONTENIDO_DUELOS = 'duelos.db'
+IDIOMA_DUELOS = 'es'
+CACHE_INSULTOS = 1024
+
+# Plantillas de componentes que guarda la caché de renderizado (ver render_cache.py), compartidas
+# por todas las partidas. El Tres en Raya tiene menos de 12.000 (tablero y fase); el Conecta 4,
+# 256; cada insulto del duelo, unas pocas por cada forma de barajar sus respuestas.
+CACHE_RENDER = 16384
+
+# Endpoint local de métricas en formato Prometheus (http://HOST:PUERTO/metrics).
+# None lo desactiva. En modo clúster cada proceso usa PUERTO + su ID.
+METRICAS_HOST = '127.0.0.1'
+METRICAS_PUERTO = 9100
+
+# Perfilado opcional (ver profiling.py), que también se activa y consulta en caliente con /perf.
+# Fracción de interacciones de componentes y modales que se ejecutan bajo cProfile (0 lo desactiva),
+# si se mide además su memoria con tracemalloc, y umbral en segundos a partir del cual el modo debug
+# de asyncio avisa de un callback que bloquea el bucle (None lo desactiva: el modo debug tiene un
+# coste apreciable). Las muestras y los callbacks lentos se guardan en búferes de PERFILADO_MUESTRAS.
+PERFILADO_MUESTREO = 0.0
+PERFILADO_MEMORIA = False
+PERFILADO_CALLBACK_LENTO = None
+PERFILADO_MUESTRAS = 50
+
+# Muestreo de los eventos estructurados (ver game_events.py): fracción de eventos de cada tipo
+# que se registran en los logs. Los que no aparecen se registran siempre, igual que los
+# avisos y errores. Los eventos muestreados llevan el campo 'muestreo' para reponderarlos.
+MUESTREO_EVENTOS = {
+    'jugada': 0.1,
+    'intento': 0.1,
+    'respuesta': 0.1,
+}
@@ -0,0 +1,206 @@
+"""
+Contenido del Duelo de Insultos: paquetes de insultos por idioma.
+
+Los insultos viven en un fichero SQLite indexado por (idioma, índice), de
+solo lectura para el bot, que SQLite lee por mmap: las páginas las comparte
+el sistema entre procesos (modo clúster) y no cuentan como memoria propia. Al
+abrir solo se cuenta cuántos insultos tiene cada idioma; las entradas se leen
+bajo demanda y las más usadas se quedan en una caché LRU, ya con sus
+`SelectOption` construidas y compartidas por todas las partidas. Así la
+memoria al arrancar y por partida no crece con el contenido: cada partida
+solo guarda el idioma, la semilla de su mazo y su posición en él (ver
+`DueloState`).
+
+Si el fichero no existe se crea con el paquete predeterminado. Los paquetes
+se importan desde JSON con el mismo formato que PAQUETE_PREDETERMINADO
+(insulto -> {"correcta": ..., "incorrectas": [...]}):
+
+    python duel_content.py importar insultos_en.json --idioma en
+    python duel_content.py listar
+
+Importar un idioma reemplaza el que hubiera. El bot lee el contenido al cargar
+la extensión del duelo: tras importar, basta con recargarla (/extension).
+"""
+import argparse
+import functools
+import itertools
+import json
+import logging
+import os
+import sqlite3
+
+import discord
+
+logger = logging.getLogger('discord_bot.duel_content')
+
+MIN_INCORRECTAS = 2  # Cada turno muestra dos respuestas incorrectas
+MAX_INCORRECTAS = 3  # El registro de partidas guarda el código de la respuesta en 2 bits
+LARGO_OPCION = 100   # Longitud máxima de la etiqueta de una opción en Discord
+MMAP_BYTES = 256 * 1024 * 1024
+
+_generaciones = itertools.count(1)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS insultos (
+    idioma      TEXT NOT NULL,
+    indice      INTEGER NOT NULL,
+    insulto     TEXT NOT NULL,
+    correcta    TEXT NOT NULL,
+    incorrectas TEXT NOT NULL,
+    PRIMARY KEY (idioma, indice)
+) WITHOUT ROWID
+"""
+
+# --- PAQUETE PREDETERMINADO ---
+PAQUETE_PREDETERMINADO = {
+    "¡Luchas como un granjero!": {
+        "correcta": "¡Qué apropiado! ¡Tú peleas como una vaca!",
+        "incorrectas": ["¡No soy un granjero!", "¡Tu mamá es una granjera!", "¡Cállate!"]
+    },
+    "¡Pronto detendré tu absurdo comportamiento de pirata!": {
+        "correcta": "Si quisiera un sermón, iría a la iglesia.",
+        "incorrectas": ["¡No soy un pirata!", "¿Ah, sí?", "¡Eso es imposible!"]
+    },
+    "¡Mi pañuelo limpiará tu sangre!": {
+        "correcta": "Ah, ¿entonces ya has elegido uno?",
+        "incorrectas": ["¡Qué asco!", "¡No vas a tocarme!", "¡Qué amenaza tan tonta!"]
+    },
+    "¡He hablado con simios más educados que tú!": {
+        "correcta": "Me alegra que asistieras a tu reunión familiar.",
+        "incorrectas": ["¡No soy un simio!", "¿Y qué?", "¡Estás mintiendo!"]
+    },
+    "¡No hay palabras para describir mi náusea!": {
+        "correcta": "Sí que las hay, solo que nunca las aprendiste.",
+        "incorrectas": ["¿Te sientes mal?", "¡Pues vete!", "¡Hueles peor!"]
+    }
+}
+IDIOMA_PREDETERMINADO = 'es'
+
+class Insulto:
+    """
+    Un insulto con sus respuestas: el código 0 es la correcta y el k, la
+    k-ésima incorrecta. `opciones[codigo]` es la opción del menú ya construida.
+    """
+    __slots__ = ('texto', 'respuestas', 'opciones')
+
+    def __init__(self, texto: str, respuestas: tuple):
+        self.texto = texto
+        self.respuestas = respuestas
+        self.opciones = tuple(discord.SelectOption(label=respuesta, value=str(codigo)) for codigo, respuesta in enumerate(respuestas))
+
+    @property
+    def n_incorrectas(self) -> int:
+        return len(self.respuestas) - 1
+
+# --- LECTURA ---
+class DuelContent:
+    def __init__(self, ruta: str = 'duelos.db', tamano_cache: int = 1024, idioma: str = IDIOMA_PREDETERMINADO):
+        self.ruta = ruta
+        self.tamano_cache = tamano_cache
+        self.idioma = idioma  # Idioma de las partidas sin idioma propio (o sin paquete en el suyo)
+        self._conexion = None
+        self._tamanos = {}  # idioma -> número de insultos
+        self.generacion = 0  # Distinta en cada apertura: identifica el contenido en claves de caché ajenas
+        self.entry = functools.lru_cache(maxsize=tamano_cache)(self._load)
+
+    def open(self):
+        """Abre el contenido (creándolo con el paquete predeterminado si no existe) y cuenta los insultos de cada idioma."""
+        if not os.path.exists(self.ruta):
+            logger.info(f"No existe {self.ruta}: se crea con el paquete predeterminado.")
+            import_pack(self.ruta, IDIOMA_PREDETERMINADO, PAQUETE_PREDETERMINADO)
+        self._conexion = sqlite3.connect(f'file:{self.ruta}?mode=ro', uri=True, check_same_thread=False)
+        self._conexion.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+        self._tamanos = dict(self._conexion.execute("SELECT idioma, COUNT(*) FROM insultos GROUP BY idioma"))
+        self.generacion = next(_generaciones)
+        if not self._tamanos:
+            raise ValueError(f"{self.ruta} no contiene ningún insulto")
+        if self.idioma not in self._tamanos:
+            self.idioma = next(iter(self._tamanos))
+        logger.info(f"Contenido del duelo: {', '.join(f'{idioma} ({n})' for idioma, n in self._tamanos.items())}.")
+
+    def close(self):
+        self.entry.cache_clear()
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def languages(self) -> dict:
+        """Idioma -> número de insultos."""
+        return dict(self._tamanos)
+
+    def size(self, idioma: str) -> int:
+        return self._tamanos[idioma]
+
+    def has(self, idioma: str, indice: int) -> bool:
+        """Si existe el insulto `indice` de `idioma` en el contenido abierto."""
+        return 0 <= indice < self._tamanos.get(idioma, 0)
+
+    def language(self, locale) -> str:
+        """Idioma del paquete para un locale de Discord ('es-ES', 'en-US', ...), o el predeterminado."""
+        if locale is not None:
+            idioma = str(locale).split('-')[0]
+            if idioma in self._tamanos:
+                return idioma
+        return self.idioma
+
+    def _load(self, idioma: str, indice: int) -> Insulto:
+        """Lee un insulto (se llama a través de la caché `entry`). Es una consulta por clave primaria."""
+        insulto, correcta, incorrectas = self._conexion.execute(
+            "SELECT insulto, correcta, incorrectas FROM insultos WHERE idioma = ? AND indice = ?", (idioma, indice)).fetchone()
+        return Insulto(insulto, (correcta, *json.loads(incorrectas)))
+
+# --- IMPORTACIÓN ---
+def import_pack(ruta: str, idioma: str, paquete: dict):
+    """
+    Reemplaza los insultos de `idioma` en `ruta` por los de `paquete`. Si el
+    fichero no existía se escribe aparte y se mueve al final, para que ningún
+    proceso lo abra a medias.
+    """
+    filas = []
+    for indice, (insulto, datos) in enumerate(paquete.items()):
+        respuestas = [datos['correcta'], *datos['incorrectas']]
+        if not MIN_INCORRECTAS <= len(respuestas) - 1 <= MAX_INCORRECTAS:
+            raise ValueError(f"'{insulto}': debe tener entre {MIN_INCORRECTAS} y {MAX_INCORRECTAS} respuestas incorrectas")
+        if any(len(respuesta) > LARGO_OPCION for respuesta in respuestas):
+            raise ValueError(f"'{insulto}': las respuestas no pueden pasar de {LARGO_OPCION} caracteres")
+        filas.append((idioma, indice, insulto, datos['correcta'], json.dumps(datos['incorrectas'], ensure_ascii=False)))
+
+    nuevo = not os.path.exists(ruta)
+    destino = f'{ruta}.{os.getpid()}.tmp' if nuevo else ruta
+    conexion = sqlite3.connect(destino, isolation_level=None)
+    try:
+        conexion.execute(_ESQUEMA)
+        conexion.execute("BEGIN")
+        conexion.execute("DELETE FROM insultos WHERE idioma = ?", (idioma,))
+        conexion.executemany("INSERT INTO insultos VALUES (?, ?, ?, ?, ?)", filas)
+        conexion.execute("COMMIT")
+    finally:
+        conexion.close()
+    if nuevo:
+        os.replace(destino, ruta)
+
+# --- HERRAMIENTA DE LÍNEA DE COMANDOS ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestiona los paquetes de insultos del Duelo.")
+    parser.add_argument('--bd', default='duelos.db', help="Fichero de contenido (por defecto, duelos.db).")
+    acciones = parser.add_subparsers(dest='accion', required=True)
+    importar = acciones.add_parser('importar', help="Importa (reemplaza) el paquete de un idioma desde JSON.")
+    importar.add_argument('paquete', help="Fichero JSON: insulto -> {\"correcta\": ..., \"incorrectas\": [...]}.")
+    importar.add_argument('--idioma', required=True, help="Código del idioma, p. ej. es o en.")
+    acciones.add_parser('listar', help="Muestra cuántos insultos hay de cada idioma.")
+    args = parser.parse_args(argv)
+
+    if args.accion == 'importar':
+        with open(args.paquete, encoding='utf-8') as f:
+            paquete = json.load(f)
+        import_pack(args.bd, args.idioma, paquete)
+        print(f"{len(paquete)} insultos importados en '{args.idioma}'.")
+    else:
+        contenido = DuelContent(args.bd)
+        contenido.open()
+        for idioma, n in sorted(contenido.languages().items()):
+            print(f"{idioma}\t{n}")
+        contenido.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Eventos estructurados de las partidas.
+
+Sustituye a los mensajes de log construidos con f-strings en el camino de cada
+interacción. Un evento es un nombre (``jugada``, ``partida_terminada``...) y
+unos campos simples (game_id, guild_id, user_id, latencia...). El coste en el
+bucle de eventos es mínimo:
+
+- El muestreo se decide antes de construir nada: los eventos de mucho volumen
+  (ver config.MUESTREO_EVENTOS) solo se registran en una fracción de los casos.
+  Los de nivel WARNING o superior nunca se muestrean.
+- El mensaje no se formatea al registrarlo: se formatea en el hilo del listener
+  de logs (ver log_setup.py), que además escribe cada evento como una línea
+  JSON en 'eventos.jsonl' para analizarlo después.
+"""
+import logging
+import random
+import time
+
+import metrics
+from config import MUESTREO_EVENTOS
+
+logger = logging.getLogger('discord_bot.eventos')
+
+# Evento -> fracción de eventos que se registran (1.0 si no aparece)
+TASAS = dict(MUESTREO_EVENTOS)
+
+class Mensaje:
+    """Mensaje de un evento que solo se convierte en texto cuando un manejador lo formatea."""
+    __slots__ = ('evento', 'campos')
+
+    def __init__(self, evento: str, campos: dict):
+        self.evento = evento
+        self.campos = campos
+
+    def __str__(self) -> str:
+        return f"[{self.evento}] " + ' '.join(f"{clave}={valor}" for clave, valor in self.campos.items())
+
+def _muestreado(nombre: str, nivel: int):
+    """Devuelve la tasa de muestreo si el evento debe registrarse, o None si se descarta."""
+    tasa = TASAS.get(nombre, 1.0) if nivel < logging.WARNING else 1.0
+    if tasa < 1.0 and random.random() >= tasa:
+        return None
+    if not logger.isEnabledFor(nivel):
+        return None
+    return tasa
+
+def event(nombre: str, nivel: int = logging.INFO, **campos):
+    """Registra un evento con campos arbitrarios (números, cadenas, booleanos o None)."""
+    tasa = _muestreado(nombre, nivel)
+    if tasa is None:
+        return
+    if tasa < 1.0:
+        campos['muestreo'] = tasa # Para reponderar al analizar
+    logger.log(nivel, Mensaje(nombre, campos), extra={'evento': nombre, 'campos': campos})
+
+def game_event(nombre: str, state, interaction=None, nivel: int = logging.INFO, **campos):
+    """
+    Registra un evento de una partida con sus campos comunes: juego, game_id y
+    guild_id y, si se indica la interacción, user_id y la latencia desde que
+    Discord la creó.
+    """
+    tasa = _muestreado(nombre, nivel)
+    if tasa is None:
+        return
+    comunes = {'juego': state.TIPO, 'game_id': f"{state.game_id:x}", 'guild_id': state.guild_id}
+    if interaction is not None:
+        comunes['user_id'] = interaction.user.id
+        comunes['latencia_ms'] = round((time.time() - metrics.created_at(interaction)) * 1000, 1)
+    comunes.update(campos)
+    if tasa < 1.0:
+        comunes['muestreo'] = tasa
+    logger.log(nivel, Mensaje(nombre, comunes), extra={'evento': nombre, 'campos': comunes})
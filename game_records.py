@@ -0,0 +1,370 @@
+"""
+Registro binario de partidas terminadas.
+
+Cada partida que termina (con ganador, en empate o por inactividad) se añade
+a un registro de solo escritura al final, en segmentos de tamaño acotado
+('registros/seg-000001.bin', ...). Cada registro es:
+
+    tipo (B) | resultado, IA y dificultad (B) | extra (B) | instante (I) | n (B) | jugadas
+
+y las n jugadas van empaquetadas con un ancho fijo de bits según el juego (4
+bits por casilla en el Tres en Raya: una partida completa son 13 bytes). Las
+escrituras se acumulan en memoria y se vuelcan en lotes desde un hilo aparte,
+como en game_store.py.
+
+La lectura recorre los segmentos con mmap, registro a registro, sin cargar
+nada en memoria. Ejecutado como script, es una herramienta de análisis:
+
+    python game_records.py replay --juego ttt --limite 20
+    python game_records.py stats --desde 2026-01-01 --ia
+"""
+import argparse
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+
+logger = logging.getLogger('discord_bot.game_records')
+
+MAGIA = b'BJRG\x01\x00\x00\x00'  # Cabecera de cada segmento: firma y versión
+_CABECERA = struct.Struct('<BBBIB')
+
+# Resultados (2 bits). En Adivina el Número, "gana el jugador 1" es que se acabaron los intentos.
+EMPATE, GANA_JUGADOR_0, GANA_JUGADOR_1, EXPIRADA = 0, 1, 2, 3
+NOMBRES_RESULTADO = ('empate', 'gana_j0', 'gana_j1', 'expirada')
+
+# Tipo de partida (el TIPO de game_state) <-> código en el registro
+CODIGOS_TIPO = {'ttt': 1, 'kr': 2, 'adv': 3, 'duelo': 4}
+TIPOS = {codigo: tipo for tipo, codigo in CODIGOS_TIPO.items()}
+CODIGOS_DIFICULTAD = {None: 0, 'facil': 1, 'normal': 2, 'dificil': 3}
+DIFICULTADES = {codigo: dificultad for dificultad, codigo in CODIGOS_DIFICULTAD.items()}
+CODIGOS_VARIANTE = {'conecta4': 0, 'gomoku': 1}
+VARIANTES = {codigo: variante for variante, codigo in CODIGOS_VARIANTE.items()}
+
+# Bits por jugada según (código de tipo, extra)
+_BITS_JUGADA = {
+    (1, 0): 4,  # Tres en Raya: casilla 0-8
+    (2, 0): 3,  # Conecta 4: columna 0-6
+    (2, 1): 5,  # Gomoku 5x5: casilla del bitboard 0-28
+    (3, None): 6,  # Adivina el Número: 1-50 (extra es el número secreto)
+    (4, 0): 2,  # Duelo: código de la respuesta 0-3
+}
+
+def victory(jugador: int) -> int:
+    """Resultado de una partida que gana `jugador` (0 o 1)."""
+    return GANA_JUGADOR_0 + jugador
+
+def _bits(codigo_tipo: int, extra: int) -> int:
+    return _BITS_JUGADA[(codigo_tipo, None if codigo_tipo == 3 else extra)]
+
+def encode(state, resultado: int, instante: float) -> bytes:
+    """Codifica una partida terminada (ver game_state.py) como un registro."""
+    codigo_tipo = CODIGOS_TIPO[state.TIPO]
+    jugadas = state.jugadas
+    extra = 0
+    if state.TIPO == 'adv':
+        extra = state.numero_secreto
+    elif state.TIPO == 'kr':
+        extra = CODIGOS_VARIANTE[state.variante]
+        if state.geometria.gravedad:
+            jugadas = bytes(casilla // state.geometria.paso for casilla in jugadas)  # Solo la columna
+    flags = resultado
+    if getattr(state, 'ia', False):
+        flags |= 0x04 | CODIGOS_DIFICULTAD.get(state.dificultad, 0) << 3
+    bits = _bits(codigo_tipo, extra)
+    empaquetadas = 0
+    for i, jugada in enumerate(jugadas):
+        if jugada >> bits:
+            raise ValueError(f"Jugada {jugada} fuera de rango para {state.TIPO}")
+        empaquetadas |= jugada << (i * bits)
+    return _CABECERA.pack(codigo_tipo, flags, extra, int(instante), len(jugadas)) + \
+        empaquetadas.to_bytes((len(jugadas) * bits + 7) // 8, 'little')
+
+Registro = namedtuple('Registro', 'tipo resultado ia dificultad extra instante jugadas')
+
+# --- ESCRITURA ---
+class RecordLog:
+    def __init__(self, directorio: str = 'registros', tamano_segmento: int = 8 * 1024 * 1024,
+                 intervalo_flush: float = 2.0):
+        self.directorio = directorio
+        self.tamano_segmento = tamano_segmento
+        self.intervalo_flush = intervalo_flush
+        self._archivo = None
+        self._numero = 0          # Número del segmento activo
+        self._pendiente = bytearray()
+        self._lock = threading.Lock()       # Protege _pendiente; append() lo toma desde el bucle de eventos
+        self._escritura = threading.Lock()  # Serializa la E/S de ficheros (flush, close)
+        self._tarea = None
+        self.escritos = 0
+
+    def open(self):
+        """Abre el último segmento para seguir escribiendo (o crea el primero)."""
+        os.makedirs(self.directorio, exist_ok=True)
+        existentes = segments(self.directorio)
+        if existentes:
+            ruta = existentes[-1]
+            self._numero = int(os.path.basename(ruta)[4:10])
+            # Si el proceso murió a mitad de un lote, se corta el registro incompleto del final
+            validos = _valid_length(ruta)
+            with open(ruta, 'r+b') as f:
+                f.truncate(validos)
+            if validos >= self.tamano_segmento:
+                self._numero += 1
+        else:
+            self._numero = 1
+        self._open_segment()
+
+    def _open_segment(self):
+        ruta = os.path.join(self.directorio, f"seg-{self._numero:06d}.bin")
+        self._archivo = open(ruta, 'ab')
+        if self._archivo.tell() == 0:
+            self._archivo.write(MAGIA)
+
+    def start(self):
+        """Lanza la tarea de escritura diferida. Debe llamarse con el bucle de eventos activo."""
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle_flush())
+
+    async def _bucle_flush(self):
+        while True:
+            await asyncio.sleep(self.intervalo_flush)
+            if self._pendiente:
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception:
+                    logger.exception("Error escribiendo el registro de partidas")
+
+    def append(self, registro: bytes):
+        """Anota un registro para escribirlo en el próximo lote."""
+        with self._lock:
+            self._pendiente += registro
+            self.escritos += 1
+
+    def flush(self):
+        """
+        Escribe los registros pendientes y, si el segmento se llenó, empieza
+        otro. El buffer se toma bajo el cerrojo y se escribe fuera de él, para
+        que `append` no espere al disco. Si la escritura falla, el segmento
+        vuelve a su tamaño anterior y los registros quedan pendientes, delante
+        de los anotados después.
+        """
+        with self._escritura:
+            with self._lock:
+                pendiente, self._pendiente = self._pendiente, bytearray()
+            if not pendiente:
+                return
+            try:
+                if self._archivo is None:
+                    raise RuntimeError("el registro de partidas está cerrado")
+                inicio = self._archivo.tell()
+                try:
+                    self._archivo.write(pendiente)
+                    self._archivo.flush()
+                except Exception:
+                    self._archivo.truncate(inicio)  # Sin registros a medias en mitad del segmento
+                    raise
+            except Exception:
+                with self._lock:
+                    self._pendiente[:0] = pendiente
+                raise
+            if self._archivo.tell() >= self.tamano_segmento:
+                # El segmento queda sellado: ya no cambia y los lectores lo recorren con mmap
+                self._archivo.close()
+                self._numero += 1
+                self._open_segment()
+
+    def close(self):
+        """Detiene la escritura diferida, escribe lo pendiente y cierra el segmento activo."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+        if self._archivo is not None:
+            self.flush()
+            with self._escritura:  # Espera a un flush que aún esté en curso en otro hilo
+                self._archivo.close()
+                self._archivo = None
+
+# --- LECTURA ---
+def segments(directorio: str) -> list:
+    """Rutas de los segmentos, en orden."""
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directorio, n) for n in sorted(nombres) if n.startswith('seg-') and n.endswith('.bin')]
+
+def _scan(datos, inicio: int = len(MAGIA)):
+    """Recorre los registros completos de un buffer: devuelve (registro crudo, posición siguiente)."""
+    pos = inicio
+    fin = len(datos)
+    tamano_cabecera = _CABECERA.size
+    while pos + tamano_cabecera <= fin:
+        codigo_tipo, flags, extra, instante, n = _CABECERA.unpack_from(datos, pos)
+        longitud = (n * _bits(codigo_tipo, extra) + 7) // 8
+        siguiente = pos + tamano_cabecera + longitud
+        if siguiente > fin:
+            return  # Registro incompleto al final del segmento activo
+        yield codigo_tipo, flags, extra, instante, n, pos + tamano_cabecera, longitud, siguiente
+        pos = siguiente
+
+def _valid_length(ruta: str) -> int:
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    if not datos.startswith(MAGIA):
+        return 0
+    validos = len(MAGIA)
+    for *_, siguiente in _scan(datos):
+        validos = siguiente
+    return validos
+
+def read_segment(ruta: str):
+    """Itera los registros de un segmento leyéndolo con mmap."""
+    with open(ruta, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIA):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            if datos[:len(MAGIA)] != MAGIA:
+                raise ValueError(f"{ruta} no es un segmento de registros de partidas")
+            for codigo_tipo, flags, extra, instante, n, inicio, longitud, _ in _scan(datos):
+                bits = _bits(codigo_tipo, extra)
+                empaquetadas = int.from_bytes(datos[inicio:inicio + longitud], 'little')
+                mascara = (1 << bits) - 1
+                yield Registro(
+                    TIPOS[codigo_tipo], flags & 0x03, bool(flags & 0x04), DIFICULTADES[flags >> 3 & 0x03],
+                    extra, instante, tuple((empaquetadas >> (i * bits)) & mascara for i in range(n))
+                )
+
+def read_all(directorio: str):
+    """Itera todos los registros de todos los segmentos, en orden."""
+    for ruta in segments(directorio):
+        yield from read_segment(ruta)
+
+# --- HERRAMIENTA DE ANÁLISIS ---
+def _filtro(args):
+    desde = datetime.fromisoformat(args.desde).replace(tzinfo=timezone.utc).timestamp() if args.desde else None
+    hasta = datetime.fromisoformat(args.hasta).replace(tzinfo=timezone.utc).timestamp() if args.hasta else None
+    variante = CODIGOS_VARIANTE.get(args.juego)
+
+    def acepta(r: Registro) -> bool:
+        if args.juego is not None:
+            if variante is not None:
+                if r.tipo != 'kr' or r.extra != variante:
+                    return False
+            elif r.tipo != args.juego:
+                return False
+        if args.ia is not None and r.ia != args.ia:
+            return False
+        if args.resultado is not None and NOMBRES_RESULTADO[r.resultado] != args.resultado:
+            return False
+        if desde is not None and r.instante < desde:
+            return False
+        if hasta is not None and r.instante >= hasta:
+            return False
+        return True
+    return acepta
+
+def _nombre_juego(r: Registro) -> str:
+    return VARIANTES[r.extra] if r.tipo == 'kr' else r.tipo
+
+def _describir(r: Registro) -> str:
+    instante = datetime.fromtimestamp(r.instante, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    ia = f" IA({r.dificultad})" if r.ia else ""
+    texto = f"{instante} {_nombre_juego(r)}{ia} {NOMBRES_RESULTADO[r.resultado]}"
+    if r.tipo == 'ttt':
+        tablero = ['.'] * 9
+        for i, casilla in enumerate(r.jugadas):
+            tablero[casilla] = 'XO'[i % 2]
+        filas = ' / '.join(''.join(tablero[f * 3:f * 3 + 3]) for f in range(3))
+        return f"{texto} jugadas={list(r.jugadas)} [{filas}]"
+    if r.tipo == 'adv':
+        return f"{texto} secreto={r.extra} intentos={list(r.jugadas)}"
+    return f"{texto} jugadas={list(r.jugadas)}"
+
+def replay(args):
+    acepta = _filtro(args)
+    mostrados = 0
+    for registro in read_all(args.directorio):
+        if not acepta(registro):
+            continue
+        print(_describir(registro))
+        mostrados += 1
+        if args.limite and mostrados >= args.limite:
+            break
+
+def stats(args):
+    """Agrega en una sola pasada, con memoria acotada (contadores por clave pequeña)."""
+    acepta = _filtro(args)
+    total = 0
+    resultados = Counter()          # (juego, resultado)
+    aperturas = Counter()           # (juego, primera jugada, resultado)
+    ia = Counter()                  # (juego, dificultad, resultado), solo contra la IA
+    intentos = Counter()            # nº de intentos de las partidas acertadas
+    primeros = Counter()            # primer número probado
+    for r in read_all(args.directorio):
+        if not acepta(r):
+            continue
+        total += 1
+        juego = _nombre_juego(r)
+        resultados[juego, r.resultado] += 1
+        if r.tipo in ('ttt', 'kr') and r.jugadas:
+            aperturas[juego, r.jugadas[0], r.resultado] += 1
+        if r.ia:
+            ia[juego, r.dificultad, r.resultado] += 1
+        if r.tipo == 'adv' and r.jugadas:
+            primeros[r.jugadas[0]] += 1
+            if r.resultado == GANA_JUGADOR_0:
+                intentos[len(r.jugadas)] += 1
+
+    print(f"Partidas: {total}")
+    juegos = sorted({juego for juego, _ in resultados})
+    for juego in juegos:
+        n = sum(resultados[juego, res] for res in range(4))
+        partes = ', '.join(f"{NOMBRES_RESULTADO[res]} {resultados[juego, res] / n:.1%}" for res in range(4) if resultados[juego, res])
+        print(f"  {juego}: {n} ({partes})")
+
+    for juego in juegos:
+        casillas = sorted({c for j, c, _ in aperturas if j == juego})
+        if not casillas:
+            continue
+        print(f"Aperturas de {juego} (primera jugada: partidas, gana quien abre):")
+        for casilla in sorted(casillas, key=lambda c: -sum(aperturas[juego, c, res] for res in range(4))):
+            n = sum(aperturas[juego, casilla, res] for res in range(4))
+            print(f"  {casilla}: {n} ({aperturas[juego, casilla, GANA_JUGADOR_0] / n:.1%})")
+
+    if ia:
+        print("Contra la IA (la IA es el jugador 1):")
+        for juego, dificultad in sorted({(j, d) for j, d, _ in ia}, key=str):
+            n = sum(ia[juego, dificultad, res] for res in range(4))
+            print(f"  {juego} {dificultad}: {n} partidas, la IA gana {ia[juego, dificultad, GANA_JUGADOR_1] / n:.1%}, "
+                  f"empates {ia[juego, dificultad, EMPATE] / n:.1%}")
+
+    if primeros:
+        print("Adivina el Número: intentos hasta acertar:")
+        for n_intentos in sorted(intentos):
+            print(f"  {n_intentos}: {intentos[n_intentos]}")
+        print("Primeros números más probados: " + ', '.join(f"{num} ({n})" for num, n in primeros.most_common(10)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce, filtra y agrega el registro binario de partidas.")
+    parser.add_argument('accion', choices=('replay', 'stats'), help="replay: muestra las partidas; stats: estadísticas agregadas.")
+    parser.add_argument('--directorio', default='registros', help="Directorio de los segmentos.")
+    parser.add_argument('--juego', choices=('ttt', 'conecta4', 'gomoku', 'adv', 'duelo'), help="Solo partidas de este juego.")
+    parser.add_argument('--resultado', choices=NOMBRES_RESULTADO, help="Solo partidas con este resultado.")
+    parser.add_argument('--ia', dest='ia', action='store_true', default=None, help="Solo partidas contra la IA.")
+    parser.add_argument('--jvj', dest='ia', action='store_false', help="Solo partidas entre jugadores.")
+    parser.add_argument('--desde', help="Fecha ISO (UTC) desde la que contar.")
+    parser.add_argument('--hasta', help="Fecha ISO (UTC) hasta la que contar (excluida).")
+    parser.add_argument('--limite', type=int, default=0, help="replay: máximo de partidas a mostrar (0 = todas).")
+    args = parser.parse_args(argv)
+    try:
+        (replay if args.accion == 'replay' else stats)(args)
+    except BrokenPipeError:
+        sys.stderr.close()  # Salida cortada (p. ej. con `| head`)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+"""
+Estado compacto de las partidas, independiente de discord.ui.
+
+Cada partida se guarda como un objeto con __slots__ que solo contiene enteros,
+cadenas cortas y secuencias de bytes: IDs de jugador (nunca objetos
+discord.User), el tablero como un entero, las vidas como enteros pequeños y el
+mazo de insultos como una semilla y una posición. Las jugadas se guardan en
+orden en `jugadas`, un byte por jugada, para el registro de partidas (ver
+game_records.py). Las vistas de discord.ui se construyen a partir de este
+estado solo en el momento de responder.
+"""
+import random
+import secrets
+
+import kinarow_engine
+import tictactoe_engine
+
+def new_game_id() -> int:
+    """Genera un identificador de partida aleatorio de 64 bits."""
+    return secrets.randbits(64)
+
+_MASCARA_64 = (1 << 64) - 1
+
+def deck_card(posicion: int, n: int, semilla: int) -> int:
+    """
+    Elemento `posicion` de una permutación pseudoaleatoria de range(n)
+    determinada por `semilla`, sin construirla: una red de Feistel de cuatro
+    rondas sobre el menor número par de bits que cubre n, repetida mientras
+    el resultado caiga fuera de range(n). Es una biyección, así que recorrer
+    posicion = 0..n-1 saca cada índice exactamente una vez.
+    """
+    bits = max(2, (n - 1).bit_length())
+    bits += bits & 1
+    mitad = bits // 2
+    mascara = (1 << mitad) - 1
+    x = posicion
+    while True:
+        izquierda, derecha = x >> mitad, x & mascara
+        for ronda in range(4):
+            h = ((derecha ^ semilla) + ronda * 0x9E3779B97F4A7C15) * 0xBF58476D1CE4E5B9 & _MASCARA_64
+            izquierda, derecha = derecha, izquierda ^ (h >> 31 ^ h) & mascara
+        x = izquierda << mitad | derecha
+        if x < n:
+            return x
+
+class GameState:
+    __slots__ = ('game_id', 'guild_id', 'channel_id', 'message_id', 'expira_en')
+    TIPO = None
+
+    def __init__(self, game_id: int = None):
+        self.game_id = new_game_id() if game_id is None else game_id
+        self.guild_id = None  # None en mensajes directos
+        self.channel_id = None
+        self.message_id = None
+        self.expira_en = 0.0  # Epoch; la expiración la programa partidas.temporizadores
+
+    @property
+    def participantes(self) -> tuple:
+        """IDs de los usuarios que juegan la partida (incluido el bot si es la IA)."""
+        return self.jugadores
+
+    @property
+    def secuencia(self) -> int:
+        """
+        Número de jugadas hechas. Va en el custom_id de los componentes para
+        reconocer los clics sobre una versión ya superada del mensaje.
+        """
+        return len(self.jugadas)
+
+    def to_dict(self) -> dict:
+        """Devuelve el estado serializable a JSON."""
+        raise NotImplementedError
+
+    @classmethod
+    def from_dict(cls, game_id: int, datos: dict):
+        """Reconstruye el estado a partir de `to_dict`."""
+        raise NotImplementedError
+
+class TicTacToeState(GameState):
+    """
+    Tres en Raya. El tablero es un entero de 18 bits: los bits 0-8 son las
+    casillas del jugador 0 (X) y los bits 9-17 las del jugador 1 (O).
+    """
+    __slots__ = ('jugadores', 'nombres', 'tablero', 'turno', 'ia', 'dificultad', 'jugadas')
+    TIPO = 'ttt'
+
+    def __init__(self, jugadores: tuple, nombres: tuple, ia: bool = False,
+                 dificultad: str = tictactoe_engine.NIVEL_POR_DEFECTO, game_id: int = None):
+        super().__init__(game_id)
+        self.jugadores = jugadores
+        self.nombres = nombres
+        self.tablero = 0
+        self.turno = 0
+        self.ia = ia
+        self.dificultad = dificultad
+        self.jugadas = bytearray()  # Casillas en orden; los jugadores alternan empezando por el 0
+
+    def mascara(self, jugador: int) -> int:
+        return (self.tablero >> (9 * jugador)) & tictactoe_engine.TABLERO_LLENO
+
+    def casilla(self, index: int):
+        """Devuelve 0 o 1 según quién ocupa la casilla, o None si está libre."""
+        if self.tablero & (1 << index):
+            return 0
+        if self.tablero & (1 << (index + 9)):
+            return 1
+        return None
+
+    def is_free(self, index: int) -> bool:
+        return not (self.tablero >> index) & 0x201  # bit `index` de X o de O
+
+    def place(self, index: int, jugador: int):
+        self.tablero |= 1 << (index + 9 * jugador)
+        self.jugadas.append(index)
+
+    def has_won(self, jugador: int) -> bool:
+        return tictactoe_engine.is_winner(self.mascara(jugador))
+
+    def is_full(self) -> bool:
+        return tictactoe_engine.is_full(self.mascara(0), self.mascara(1))
+
+    def ia_move(self) -> int:
+        """Jugada de la IA (siempre el jugador 1), o -1 si no quedan casillas."""
+        return tictactoe_engine.best_move(self.mascara(1), self.mascara(0), self.dificultad)
+
+    def to_dict(self) -> dict:
+        return {
+            'jugadores': list(self.jugadores),
+            'nombres': list(self.nombres),
+            'tablero': self.tablero,
+            'turno': self.turno,
+            'ia': self.ia,
+            'dificultad': self.dificultad,
+            'jugadas': list(self.jugadas),
+        }
+
+    @classmethod
+    def from_dict(cls, game_id: int, datos: dict):
+        state = cls(tuple(datos['jugadores']), tuple(datos['nombres']), datos['ia'], datos['dificultad'], game_id)
+        state.tablero = datos['tablero']
+        state.turno = datos['turno']
+        state.jugadas = bytearray(datos.get('jugadas', ()))  # Ausente en partidas guardadas antes del registro
+        return state
+
+class EnRayaState(GameState):
+    """
+    k en raya sobre un tablero de N×M (Conecta 4, Gomoku...). `fichas` son los
+    bitboards de cada jugador en el formato de kinarow_engine.
+    """
+    __slots__ = ('jugadores', 'nombres', 'variante', 'fichas', 'turno', 'ia', 'dificultad', 'jugadas')
+    TIPO = 'kr'
+
+    def __init__(self, jugadores: tuple, nombres: tuple, variante: str, ia: bool = False,
+                 dificultad: str = kinarow_engine.NIVEL_POR_DEFECTO, game_id: int = None):
+        super().__init__(game_id)
+        self.jugadores = jugadores
+        self.nombres = nombres
+        self.variante = variante
+        self.fichas = [0, 0]
+        self.turno = 0
+        self.ia = ia
+        self.dificultad = dificultad
+        self.jugadas = bytearray()  # Casillas en orden; los jugadores alternan empezando por el 0
+
+    @property
+    def geometria(self) -> kinarow_engine.Geometria:
+        return kinarow_engine.geometry(*kinarow_engine.VARIANTES[self.variante])
+
+    def casilla(self, index: int):
+        """Devuelve 0 o 1 según quién ocupa la casilla, o None si está libre."""
+        if self.fichas[0] >> index & 1:
+            return 0
+        if self.fichas[1] >> index & 1:
+            return 1
+        return None
+
+    def target(self, accion: int) -> int:
+        """Casilla que ocupa la acción (una columna si hay gravedad), o -1 si no es legal."""
+        g = self.geometria
+        ocupadas = self.fichas[0] | self.fichas[1]
+        if g.gravedad:
+            return g.drop(ocupadas, accion) if 0 <= accion < g.ancho else -1
+        return accion if g.jugables >> accion & 1 and not ocupadas >> accion & 1 else -1
+
+    def place(self, index: int, jugador: int):
+        self.fichas[jugador] |= 1 << index
+        self.jugadas.append(index)
+
+    def has_won(self, jugador: int) -> bool:
+        return self.geometria.is_winner(self.fichas[jugador])
+
+    def is_full(self) -> bool:
+        return self.geometria.is_full(self.fichas[0] | self.fichas[1])
+
+    def search_args(self) -> tuple:
+        """Argumentos de `kinarow_engine.search` para la jugada de la IA (siempre el jugador 1)."""
+        profundidad, presupuesto = kinarow_engine.NIVELES.get(self.dificultad, kinarow_engine.NIVELES[kinarow_engine.NIVEL_POR_DEFECTO])
+        return (*kinarow_engine.VARIANTES[self.variante], self.fichas[1], self.fichas[0], presupuesto, profundidad)
+
+    def to_dict(self) -> dict:
+        return {
+            'jugadores': list(self.jugadores),
+            'nombres': list(self.nombres),
+            'variante': self.variante,
+            'fichas': list(self.fichas),
+            'turno': self.turno,
+            'ia': self.ia,
+            'dificultad': self.dificultad,
+            'jugadas': list(self.jugadas),
+        }
+
+    @classmethod
+    def from_dict(cls, game_id: int, datos: dict):
+        state = cls(tuple(datos['jugadores']), tuple(datos['nombres']), datos['variante'], datos['ia'], datos['dificultad'], game_id)
+        state.fichas = list(datos['fichas'])
+        state.turno = datos['turno']
+        state.jugadas = bytearray(datos.get('jugadas', ()))
+        return state
+
+class AdivinaState(GameState):
+    __slots__ = ('autor', 'nombre', 'numero_secreto', 'intentos', 'jugadas')
+    TIPO = 'adv'
+    MAX_INTENTOS = 7
+
+    def __init__(self, autor: int, nombre: str, game_id: int = None):
+        super().__init__(game_id)
+        self.autor = autor
+        self.nombre = nombre
+        self.numero_secreto = random.randint(1, 50)
+        self.intentos = 0
+        self.jugadas = bytearray()  # Números probados, en orden
+
+    @property
+    def participantes(self) -> tuple:
+        return (self.autor,)
+
+    def guess(self, numero: int):
+        self.intentos += 1
+        self.jugadas.append(numero)
+
+    def to_dict(self) -> dict:
+        return {
+            'autor': self.autor,
+            'nombre': self.nombre,
+            'numero_secreto': self.numero_secreto,
+            'intentos': self.intentos,
+            'jugadas': list(self.jugadas),
+        }
+
+    @classmethod
+    def from_dict(cls, game_id: int, datos: dict):
+        state = cls(datos['autor'], datos['nombre'], game_id)
+        state.numero_secreto = datos['numero_secreto']
+        state.intentos = datos['intentos']
+        state.jugadas = bytearray(datos.get('jugadas', ()))
+        return state
+
+class DueloState(GameState):
+    """
+    Duelo de insultos, con el contenido del paquete `idioma` (ver
+    duel_content.py). El mazo es la permutación de los índices de insultos que
+    fija `semilla` (ver `deck_card`), recorrida con `pos_mazo`: ocupa lo mismo
+    tenga el paquete cinco insultos o cincuenta mil. Las opciones del turno son códigos de respuesta
+    (0 = correcta, k = k-ésima incorrecta) en el orden en que se muestran.
+    """
+    __slots__ = ('jugadores', 'nombres', 'idioma', 'vidas', 'turno', 'semilla', 'pos_mazo', 'insulto', 'opciones', 'jugadas')
+    TIPO = 'duelo'
+    VIDAS_INICIALES = 3
+
+    def __init__(self, jugadores: tuple, nombres: tuple, idioma: str, game_id: int = None):
+        super().__init__(game_id)
+        self.jugadores = jugadores
+        self.nombres = nombres
+        self.idioma = idioma
+        self.vidas = bytearray((self.VIDAS_INICIALES, self.VIDAS_INICIALES))
+        self.turno = 0
+        self.semilla = secrets.randbits(64)
+        self.pos_mazo = 0
+        self.insulto = 0
+        self.opciones = b''
+        self.jugadas = bytearray()  # Código de cada respuesta elegida; responden por turnos empezando por el 0
+
+    def draw_insult(self, n_insultos: int):
+        """Saca el siguiente insulto del mazo, barajándolo de nuevo si se acaba."""
+        if self.pos_mazo >= n_insultos:
+            self.semilla = secrets.randbits(64)
+            self.pos_mazo = 0
+        self.insulto = deck_card(self.pos_mazo, n_insultos, self.semilla)
+        self.pos_mazo += 1
+
+    def deal_options(self, n_incorrectas: int, n_opciones_incorrectas: int = 2):
+        """Elige y baraja las opciones del turno: la correcta y varias incorrectas."""
+        opciones = [0] + random.sample(range(1, n_incorrectas + 1), n_opciones_incorrectas)
+        random.shuffle(opciones)
+        self.opciones = bytes(opciones)
+
+    def answer(self, codigo: int):
+        self.jugadas.append(codigo)
+
+    def to_dict(self) -> dict:
+        return {
+            'jugadores': list(self.jugadores),
+            'nombres': list(self.nombres),
+            'idioma': self.idioma,
+            'vidas': list(self.vidas),
+            'turno': self.turno,
+            'semilla': self.semilla,
+            'pos_mazo': self.pos_mazo,
+            'insulto': self.insulto,
+            'opciones': list(self.opciones),
+            'jugadas': list(self.jugadas),
+        }
+
+    @classmethod
+    def from_dict(cls, game_id: int, datos: dict):
+        # Las partidas guardadas antes de los paquetes de contenido son del paquete en español y
+        # guardaban el mazo entero: se sigue con un mazo nuevo desde la misma posición
+        state = cls(tuple(datos['jugadores']), tuple(datos['nombres']), datos.get('idioma', 'es'), game_id)
+        state.vidas = bytearray(datos['vidas'])
+        state.turno = datos['turno']
+        if 'semilla' in datos:
+            state.semilla = datos['semilla']
+        state.pos_mazo = datos['pos_mazo']
+        state.insulto = datos['insulto']
+        state.opciones = bytes(datos['opciones'])
+        state.jugadas = bytearray(datos.get('jugadas', ()))
+        return state
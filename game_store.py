@@ -0,0 +1,146 @@
+"""
+Almacén persistente de partidas en curso.
+
+Guarda el estado de cada partida en una base de datos SQLite en modo WAL. Las
+escrituras no se hacen en el momento: `save` y `delete` solo anotan el cambio
+en memoria (los cambios sucesivos de una misma partida se combinan) y una
+tarea en segundo plano los confirma en lotes, en una única transacción, desde
+un hilo aparte para no bloquear el bucle de eventos.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger('discord_bot.game_store')
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS partidas (
+    game_id    TEXT PRIMARY KEY,
+    tipo       TEXT NOT NULL,
+    guild_id   INTEGER,
+    channel_id INTEGER,
+    message_id INTEGER,
+    expira_en  REAL,
+    estado     TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+class GameStore:
+    def __init__(self, ruta: str = 'partidas.db', intervalo_flush: float = 1.0):
+        self.ruta = ruta
+        self.intervalo_flush = intervalo_flush
+        self._conexion = None
+        # game_id -> fila pendiente de guardar, o None si hay que borrarla
+        self._pendientes = {}
+        self._lock = threading.Lock()       # Protege _pendientes; se toma desde el bucle de eventos
+        self._escritura = threading.Lock()  # Serializa las escrituras en la base de datos (flush, close)
+        self._tarea = None
+
+    def open(self):
+        """Abre la base de datos y crea el esquema si no existe."""
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(_ESQUEMA)
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(partidas)")}
+        if 'guild_id' not in columnas: # Bases de datos anteriores a la columna guild_id
+            self._conexion.execute("ALTER TABLE partidas ADD COLUMN guild_id INTEGER")
+
+    def start(self):
+        """Lanza la tarea de escritura diferida. Debe llamarse con el bucle de eventos activo."""
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle_flush())
+
+    async def _bucle_flush(self):
+        while True:
+            await asyncio.sleep(self.intervalo_flush)
+            if self._pendientes:
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception:
+                    logger.exception("Error guardando partidas en el almacén")
+
+    def save(self, game_id: str, tipo: str, guild_id: int, channel_id: int, message_id: int, expira_en: float, estado: dict):
+        """Anota el estado actual de una partida para guardarlo en el próximo lote."""
+        fila = (game_id, tipo, guild_id, channel_id, message_id, expira_en, json.dumps(estado, separators=(',', ':')))
+        with self._lock:
+            self._pendientes[game_id] = fila
+
+    def delete(self, game_id: str):
+        """Anota que una partida ha terminado y debe borrarse del almacén."""
+        with self._lock:
+            self._pendientes[game_id] = None
+
+    def flush(self):
+        """
+        Confirma en una sola transacción todos los cambios pendientes. El lote
+        se toma bajo el cerrojo y se escribe fuera de él, para que `save` y
+        `delete` no esperen a la base de datos. Si la transacción falla, los
+        cambios vuelven a quedar pendientes (salvo los que ya tengan una
+        versión más reciente).
+        """
+        with self._escritura:
+            with self._lock:
+                pendientes, self._pendientes = self._pendientes, {}
+            if not pendientes:
+                return
+            if self._conexion is None:
+                self._requeue(pendientes)
+                return
+            guardar = [fila for fila in pendientes.values() if fila is not None]
+            borrar = [(game_id,) for game_id, fila in pendientes.items() if fila is None]
+
+            conexion = self._conexion
+            try:
+                conexion.execute("BEGIN")
+                try:
+                    if guardar:
+                        conexion.executemany("INSERT OR REPLACE INTO partidas (game_id, tipo, guild_id, channel_id, message_id, expira_en, estado) VALUES (?, ?, ?, ?, ?, ?, ?)", guardar)
+                    if borrar:
+                        conexion.executemany("DELETE FROM partidas WHERE game_id = ?", borrar)
+                    conexion.execute("COMMIT")
+                except Exception:
+                    conexion.execute("ROLLBACK")
+                    raise
+            except Exception:
+                self._requeue(pendientes)
+                raise
+
+    def _requeue(self, pendientes: dict):
+        """Devuelve a pendientes un lote no escrito, sin pisar los cambios anotados después."""
+        with self._lock:
+            for game_id, fila in pendientes.items():
+                self._pendientes.setdefault(game_id, fila)
+
+    def load_all(self, tipo: str = None) -> list:
+        """Devuelve las partidas guardadas (todas, o solo las de `tipo`) como diccionarios, con una sola consulta."""
+        consulta = "SELECT game_id, tipo, guild_id, channel_id, message_id, expira_en, estado FROM partidas"
+        if tipo is None:
+            cursor = self._conexion.execute(consulta)
+        else:
+            cursor = self._conexion.execute(consulta + " WHERE tipo = ?", (tipo,))
+        return [
+            {
+                'game_id': game_id,
+                'tipo': tipo,
+                'guild_id': guild_id,
+                'channel_id': channel_id,
+                'message_id': message_id,
+                'expira_en': expira_en,
+                'estado': json.loads(estado),
+            }
+            for game_id, tipo, guild_id, channel_id, message_id, expira_en, estado in cursor.fetchall()
+        ]
+
+    def close(self):
+        """Detiene la escritura diferida, guarda lo pendiente y cierra la base de datos."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+        if self._conexion is not None:
+            self.flush()
+            with self._escritura:  # Espera a un flush que aún esté en curso en otro hilo
+                self._conexion.close()
+                self._conexion = None
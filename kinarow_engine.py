@@ -0,0 +1,302 @@
+"""
+Motor generalizado de k en raya (Conecta 4, Gomoku pequeño...) basado en bitboards.
+
+Cada jugador se representa con un entero en el que las casillas se numeran por
+columnas: la casilla (columna c, fila f), con la fila 0 abajo, es el bit
+``c * (alto + 1) + f``. Cada columna reserva un bit extra por encima de la fila
+superior que siempre vale 0; así, las líneas que se saldrían del tablero por un
+borde se cortan en ese bit y la detección de k en raya se reduce a
+desplazamientos y AND en las cuatro direcciones.
+
+La IA es un negamax con poda alfa-beta, profundización iterativa y tabla de
+transposición indexada por hash de Zobrist. `search` respeta un presupuesto de
+tiempo y es una función de nivel de módulo con argumentos simples, para poder
+ejecutarla en un ProcessPoolExecutor sin bloquear el bucle de eventos.
+"""
+import random
+import time
+from functools import lru_cache
+
+# Variantes disponibles: (ancho, alto, k, gravedad)
+VARIANTES = {
+    "conecta4": (7, 6, 4, True),
+    "gomoku": (5, 5, 4, False),
+}
+
+# Niveles de dificultad: (profundidad máxima o None, presupuesto de tiempo en segundos)
+NIVELES = {
+    "facil": (1, 0.2),
+    "normal": (4, 1.0),
+    "dificil": (None, 2.5),
+}
+NIVEL_POR_DEFECTO = "normal"
+
+# Puntuaciones negamax desde el punto de vista del jugador que mueve.
+# Las victorias más rápidas valen más que las lentas.
+VICTORIA = 1_000_000
+_DECIDIDA = VICTORIA - 1000  # Por encima de esto, la puntuación es una victoria forzada
+
+MAX_TABLA = 500_000  # Entradas de la tabla de transposición antes de vaciarla
+
+_EXACTA, _INFERIOR, _SUPERIOR = 0, 1, 2
+
+
+def _to_table(valor: int, ply: int) -> int:
+    """Puntuación para la tabla: las victorias y derrotas, contadas desde el nodo y no desde la raíz."""
+    if valor > _DECIDIDA:
+        return valor + ply
+    if valor < -_DECIDIDA:
+        return valor - ply
+    return valor
+
+
+def _from_table(valor: int, ply: int) -> int:
+    """Inversa de `_to_table`: la puntuación de la tabla vista desde la raíz de esta búsqueda."""
+    if valor > _DECIDIDA:
+        return valor - ply
+    if valor < -_DECIDIDA:
+        return valor + ply
+    return valor
+
+
+class Geometria:
+    """Máscaras y tablas precalculadas de una variante. Se obtiene con `geometry`."""
+    __slots__ = ('ancho', 'alto', 'k', 'gravedad', 'paso', 'jugables', 'abajo', 'columnas',
+                 'desplazamientos', 'ventanas', 'pesos', 'orden', 'zobrist', 'zobrist_turno')
+
+    def __init__(self, ancho: int, alto: int, k: int, gravedad: bool):
+        self.ancho = ancho
+        self.alto = alto
+        self.k = k
+        self.gravedad = gravedad
+        self.paso = alto + 1
+        self.columnas = tuple(((1 << alto) - 1) << (c * self.paso) for c in range(ancho))
+        self.jugables = sum(self.columnas)
+        self.abajo = sum(1 << (c * self.paso) for c in range(ancho))
+        # Vertical, horizontal y las dos diagonales
+        self.desplazamientos = (1, self.paso, self.paso - 1, self.paso + 1)
+
+        # Todas las ventanas de k casillas seguidas dentro del tablero
+        ventanas = []
+        for c in range(ancho):
+            for f in range(alto):
+                for dc, df in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    fin_c, fin_f = c + dc * (k - 1), f + df * (k - 1)
+                    if 0 <= fin_c < ancho and 0 <= fin_f < alto:
+                        ventanas.append(sum(self.bit(c + dc * i, f + df * i) for i in range(k)))
+        self.ventanas = tuple(ventanas)
+        # Valor de una ventana según cuántas fichas propias tiene (y ninguna rival)
+        self.pesos = (0,) + tuple(4 ** (n - 1) for n in range(1, k + 1))
+
+        # Orden de exploración: primero lo más cercano al centro
+        centro_c, centro_f = (ancho - 1) / 2, (alto - 1) / 2
+        if gravedad:
+            self.orden = tuple(sorted(range(ancho), key=lambda c: abs(c - centro_c)))
+        else:
+            casillas = [(c, f) for c in range(ancho) for f in range(alto)]
+            casillas.sort(key=lambda cf: abs(cf[0] - centro_c) + abs(cf[1] - centro_f))
+            self.orden = tuple(self.index(c, f) for c, f in casillas)
+
+        azar = random.Random(f"{ancho}x{alto}k{k}{'g' if gravedad else ''}")
+        self.zobrist = tuple(tuple(azar.getrandbits(64) for _ in range(ancho * self.paso)) for _ in range(2))
+        self.zobrist_turno = azar.getrandbits(64)
+
+    def index(self, columna: int, fila: int) -> int:
+        return columna * self.paso + fila
+
+    def bit(self, columna: int, fila: int) -> int:
+        return 1 << (columna * self.paso + fila)
+
+    def is_winner(self, mascara: int) -> bool:
+        """Indica si la máscara de un jugador contiene k fichas en raya."""
+        for d in self.desplazamientos:
+            m = mascara
+            for i in range(1, self.k):
+                m &= mascara >> (i * d)
+                if not m:
+                    break
+            if m:
+                return True
+        return False
+
+    def is_full(self, ocupadas: int) -> bool:
+        return ocupadas & self.jugables == self.jugables
+
+    def drop(self, ocupadas: int, columna: int) -> int:
+        """Casilla donde cae una ficha en `columna`, o -1 si está llena."""
+        columna_mascara = self.columnas[columna]
+        libre = ((ocupadas & columna_mascara) + (self.abajo & columna_mascara)) & columna_mascara
+        return libre.bit_length() - 1 if libre else -1
+
+    def moves(self, ocupadas: int) -> list:
+        """Casillas jugables, de la más a la menos prometedora a priori."""
+        if self.gravedad:
+            jugadas = []
+            for c in self.orden:
+                casilla = self.drop(ocupadas, c)
+                if casilla != -1:
+                    jugadas.append(casilla)
+            return jugadas
+        if not ocupadas:
+            return [self.orden[0]]
+        # Sin gravedad solo se consideran casillas vecinas de alguna ficha
+        vecinas = 0
+        for d in self.desplazamientos:
+            vecinas |= (ocupadas << d) | (ocupadas >> d)
+        vecinas &= self.jugables & ~ocupadas
+        return [casilla for casilla in self.orden if vecinas >> casilla & 1]
+
+    def evaluate(self, propia: int, rival: int) -> int:
+        """Valoración heurística para quien mueve: ventanas abiertas de cada jugador."""
+        pesos = self.pesos
+        valor = 0
+        for ventana in self.ventanas:
+            p = propia & ventana
+            r = rival & ventana
+            if not r:
+                if p:
+                    valor += pesos[bin(p).count("1")]
+            elif not p:
+                valor -= pesos[bin(r).count("1")]
+        return valor
+
+    def hash(self, propia: int, rival: int) -> int:
+        h = 0
+        for color, mascara in ((0, propia), (1, rival)):
+            while mascara:
+                bit = mascara & -mascara
+                h ^= self.zobrist[color][bit.bit_length() - 1]
+                mascara ^= bit
+        return h
+
+
+@lru_cache(maxsize=None)
+def geometry(ancho: int, alto: int, k: int, gravedad: bool) -> Geometria:
+    return Geometria(ancho, alto, k, gravedad)
+
+
+# Tabla de transposición de cada variante. Vive en el proceso que busca, así que
+# se reutiliza entre jugadas atendidas por el mismo proceso del pool.
+_TABLAS = {}
+
+
+class _TiempoAgotado(Exception):
+    pass
+
+
+class _Busqueda:
+    __slots__ = ('g', 'limite', 'tabla', 'nodos')
+
+    def __init__(self, g: Geometria, limite: float):
+        self.g = g
+        self.limite = limite
+        self.tabla = _TABLAS.setdefault((g.ancho, g.alto, g.k, g.gravedad), {})
+        if len(self.tabla) > MAX_TABLA:
+            self.tabla.clear()
+        self.nodos = 0
+
+    def negamax(self, propia: int, rival: int, h: int, color: int, profundidad: int,
+                alfa: int, beta: int, ply: int, primera: int = -1) -> tuple:
+        """Devuelve (valor, mejor casilla) de la posición para el jugador que mueve."""
+        self.nodos += 1
+        if not self.nodos & 1023 and time.monotonic() > self.limite:
+            raise _TiempoAgotado
+
+        g = self.g
+        alfa_original = alfa
+        entrada = self.tabla.get(h)
+        if entrada is not None:
+            prof_entrada, valor, cota, mejor_tabla = entrada
+            valor = _from_table(valor, ply)
+            if prof_entrada >= profundidad and ply > 0:
+                if cota == _EXACTA:
+                    return valor, mejor_tabla
+                if cota == _INFERIOR:
+                    alfa = max(alfa, valor)
+                else:
+                    beta = min(beta, valor)
+                if alfa >= beta:
+                    return valor, mejor_tabla
+            if primera == -1:
+                primera = mejor_tabla
+
+        if profundidad == 0:
+            return g.evaluate(propia, rival), -1
+
+        ocupadas = propia | rival
+        jugadas = g.moves(ocupadas)
+        if not jugadas:
+            return 0, -1
+        if primera in jugadas:
+            jugadas.remove(primera)
+            jugadas.insert(0, primera)
+
+        zobrist = g.zobrist[color]
+        mejor_valor, mejor = -VICTORIA - 1, jugadas[0]
+        for casilla in jugadas:
+            nueva = propia | (1 << casilla)
+            if g.is_winner(nueva):
+                valor = VICTORIA - ply - 1
+            elif g.is_full(nueva | rival):
+                valor = 0
+            else:
+                valor = -self.negamax(rival, nueva, h ^ zobrist[casilla] ^ g.zobrist_turno, 1 - color,
+                                      profundidad - 1, -beta, -alfa, ply + 1)[0]
+            if valor > mejor_valor:
+                mejor_valor, mejor = valor, casilla
+            alfa = max(alfa, valor)
+            if alfa >= beta:
+                break
+
+        if mejor_valor <= alfa_original:
+            cota = _SUPERIOR
+        elif mejor_valor >= beta:
+            cota = _INFERIOR
+        else:
+            cota = _EXACTA
+        self.tabla[h] = (profundidad, _to_table(mejor_valor, ply), cota, mejor)
+        return mejor_valor, mejor
+
+
+def search(ancho: int, alto: int, k: int, gravedad: bool, propia: int, rival: int,
+           presupuesto: float, profundidad_max: int = None) -> tuple:
+    """
+    Busca la mejor jugada para `propia` con profundización iterativa.
+
+    Args:
+        ancho, alto, k, gravedad: La variante (ver VARIANTES).
+        propia: Bitboard del jugador que mueve.
+        rival: Bitboard del rival.
+        presupuesto: Segundos disponibles; se devuelve la mejor jugada de la
+            última profundidad completada.
+        profundidad_max: Límite de profundidad, o None para buscar hasta agotar el tiempo.
+
+    Returns:
+        (casilla, valor, profundidad alcanzada); casilla es -1 si no hay jugadas.
+    """
+    limite = time.monotonic() + presupuesto
+    g = geometry(ancho, alto, k, gravedad)
+    jugadas = g.moves(propia | rival)
+    if not jugadas:
+        return -1, 0, 0
+    if len(jugadas) == 1:
+        return jugadas[0], 0, 0
+    for casilla in jugadas:
+        if g.is_winner(propia | (1 << casilla)):
+            return casilla, VICTORIA - 1, 1
+
+    busqueda = _Busqueda(g, limite)
+    h = g.hash(propia, rival)
+    libres = bin(g.jugables & ~(propia | rival)).count("1")
+    mejor, valor, alcanzada = jugadas[0], 0, 0
+    profundidad = 1
+    while profundidad <= libres and (profundidad_max is None or profundidad <= profundidad_max):
+        try:
+            valor, mejor = busqueda.negamax(propia, rival, h, 0, profundidad, -VICTORIA - 1, VICTORIA + 1, 0, mejor)
+        except _TiempoAgotado:
+            break
+        alcanzada = profundidad
+        if abs(valor) >= _DECIDIDA or time.monotonic() > limite:
+            break
+        profundidad += 1
+    return mejor, valor, alcanzada
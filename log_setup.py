@@ -1,48 +1,237 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import queue
 import sys
 
-def setup_logging():
+# Políticas de desbordamiento para la cola de logs
+POLITICA_DESCARTAR = 'drop'   # Descarta los registros por debajo de WARNING si la cola está llena
+POLITICA_BLOQUEAR = 'block'   # Espera a que haya hueco en la cola
+
+_listener = None
+
+class _FlushPorLotesMixin:
+    """
+    Permite aplazar el flush de un manejador mientras se procesa un lote.
+
+    El listener activa `en_lote` antes de emitir un grupo de registros y hace
+    un único flush al terminar, en lugar de uno por registro.
+    """
+    en_lote = False
+
+    def flush(self):
+        if not self.en_lote:
+            super().flush()
+
+class _StreamHandlerPorLotes(_FlushPorLotesMixin, logging.StreamHandler):
+    pass
+
+class _RotatingFileHandlerPorLotes(_FlushPorLotesMixin, RotatingFileHandler):
+    pass
+
+class _FileHandlerPorLotes(_FlushPorLotesMixin, logging.FileHandler):
+    pass
+
+class FormatoJSON(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON. Los eventos estructurados (ver
+    game_events.py) vuelcan sus campos; el resto de registros van como evento
+    'log' con su mensaje.
+    """
+    def __init__(self, id_proceso: str = None):
+        super().__init__()
+        self.id_proceso = id_proceso
+
+    def format(self, record) -> str:
+        datos = {'ts': round(record.created, 3), 'nivel': record.levelname, 'logger': record.name}
+        if self.id_proceso:
+            datos['proceso'] = self.id_proceso
+        evento = getattr(record, 'evento', None)
+        if evento is None:
+            datos['evento'] = 'log'
+            datos['mensaje'] = record.getMessage()
+        else:
+            datos['evento'] = evento
+            datos.update(record.campos)
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+class ColaAcotadaHandler(QueueHandler):
+    """
+    QueueHandler con cola acotada y política de desbordamiento configurable.
+
+    Con la política 'drop' los registros por debajo de WARNING nunca bloquean
+    al hilo que registra (el bucle de eventos): si la cola está llena se
+    descartan y se cuentan en `descartados`. Los avisos y errores siempre se
+    encolan, esperando hueco si hace falta.
+    """
+    def __init__(self, cola: queue.Queue, politica: str = POLITICA_DESCARTAR):
+        super().__init__(cola)
+        if politica not in (POLITICA_DESCARTAR, POLITICA_BLOQUEAR):
+            raise ValueError(f"Política de desbordamiento desconocida: {politica}")
+        self.politica = politica
+        self.descartados = 0
+
+    def prepare(self, record):
+        # Los eventos estructurados solo llevan campos simples: se encolan sin
+        # formatear y el mensaje se construye en el hilo del listener.
+        if getattr(record, 'evento', None) is not None and record.exc_info is None:
+            return record
+        return super().prepare(record)
+
+    def enqueue(self, record):
+        if self.politica == POLITICA_BLOQUEAR or record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+class ListenerPorLotes(QueueListener):
+    """
+    QueueListener que vacía la cola en lotes y hace un solo flush por lote.
+    """
+    def __init__(self, cola: queue.Queue, *handlers, tamano_lote: int = 64):
+        super().__init__(cola, *handlers, respect_handler_level=True)
+        self.tamano_lote = tamano_lote
+
+    def enqueue_sentinel(self):
+        # La cola es acotada: el centinela debe esperar hueco en lugar de fallar.
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        cola = self.queue
+        while True:
+            lote = [cola.get()]
+            while len(lote) < self.tamano_lote:
+                try:
+                    lote.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            parar = False
+            for handler in self.handlers:
+                handler.en_lote = True
+            try:
+                for record in lote:
+                    if record is self._sentinel:
+                        parar = True
+                        continue
+                    self.handle(record)
+            finally:
+                for handler in self.handlers:
+                    handler.en_lote = False
+                    handler.flush()
+                for _ in lote:
+                    cola.task_done()
+
+            if parar:
+                break
+
+def setup_logging(max_cola: int = 10000, politica_desbordamiento: str = POLITICA_DESCARTAR, tamano_lote: int = 64,
+                  id_proceso: str = None):
     """
     Configura el sistema de logging para la aplicación.
 
-    Esta función configura tres manejadores para el logger raíz:
+    El logger raíz solo tiene un QueueHandler, que encola los registros sin
+    hacer E/S en el hilo que los emite (el bucle de eventos de asyncio). Un
+    hilo en segundo plano (ListenerPorLotes) vacía la cola en lotes y los
+    reparte entre cuatro manejadores:
     1. StreamHandler: Muestra los logs de nivel INFO y superior en la consola.
     2. RotatingFileHandler: Guarda los logs de nivel INFO y superior en 'info.log',
        con rotación de archivos para evitar que crezcan indefinidamente.
     3. FileHandler: Guarda los logs de nivel WARNING y superior en 'error.log',
        para un fácil diagnóstico de problemas.
+    4. RotatingFileHandler: Guarda los logs de nivel INFO y superior en
+       'eventos.jsonl', un objeto JSON por línea, para analizarlos después.
+       Los eventos estructurados de game_events.py llevan sus campos.
+
+    Args:
+        max_cola: Número máximo de registros pendientes en la cola.
+        politica_desbordamiento: 'drop' para descartar registros (por debajo de
+            WARNING) cuando la cola está llena, o 'block' para esperar a que
+            haya hueco.
+        tamano_lote: Número máximo de registros escritos entre dos flush.
+        id_proceso: Identificador del proceso en modo clúster. Si se indica, los
+            archivos pasan a ser 'info-<id>.log', 'error-<id>.log' y
+            'eventos-<id>.jsonl' y cada línea lleva la etiqueta del proceso.
 
     No devuelve nada, ya que configura el logger raíz que es accesible
-    globalmente a través de `logging.getLogger()`.
+    globalmente a través de `logging.getLogger()`. Llama a `shutdown_logging()`
+    al apagar el bot para vaciar la cola (también se registra con atexit).
     """
+    global _listener
+
     # Configurar un formato común para los logs
     dt_fmt = '%Y-%m-%d %H:%M:%S'
-    formatter = logging.Formatter('[{asctime}] [{levelname:<8}] {name}: {message}', dt_fmt, style='{')
+    etiqueta = f'[{id_proceso}] ' if id_proceso else ''
+    formatter = logging.Formatter(etiqueta + '[{asctime}] [{levelname:<8}] {name}: {message}', dt_fmt, style='{')
+    sufijo = f'-{id_proceso}' if id_proceso else ''
 
     # Obtener el logger raíz. Todos los demás loggers heredarán de este.
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO) # Nivel mínimo para que los logs pasen a los handlers
 
     # Crear un manejador para mostrar los logs en la consola (stdout)
-    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler = _StreamHandlerPorLotes(sys.stdout)
     stream_handler.setFormatter(formatter)
     stream_handler.setLevel(logging.INFO) # Muestra INFO y superior en consola
 
     # Crear un manejador de archivo rotativo para logs de información
     # Rota cuando el archivo alcanza 5MB, mantiene 5 archivos de respaldo.
-    info_handler = RotatingFileHandler(
-        filename='info.log', maxBytes=5*1024*1024, backupCount=5, encoding='utf-8'
+    info_handler = _RotatingFileHandlerPorLotes(
+        filename=f'info{sufijo}.log', maxBytes=5*1024*1024, backupCount=5, encoding='utf-8'
     )
     info_handler.setFormatter(formatter)
     info_handler.setLevel(logging.INFO) # Solo logs de INFO y superior
 
     # Crear un manejador de archivo para logs de error
-    error_handler = logging.FileHandler(filename='error.log', encoding='utf-8', mode='a')
+    error_handler = _FileHandlerPorLotes(filename=f'error{sufijo}.log', encoding='utf-8', mode='a')
     error_handler.setFormatter(formatter)
     error_handler.setLevel(logging.WARNING) # Solo logs de WARNING y superior
 
-    # Añadir los manejadores al logger raíz
-    root_logger.addHandler(stream_handler)
-    root_logger.addHandler(info_handler)
-    root_logger.addHandler(error_handler)
\ No newline at end of file
+    # Crear un manejador de archivo rotativo para los logs en formato JSON (uno por línea)
+    json_handler = _RotatingFileHandlerPorLotes(
+        filename=f'eventos{sufijo}.jsonl', maxBytes=20*1024*1024, backupCount=5, encoding='utf-8'
+    )
+    json_handler.setFormatter(FormatoJSON(id_proceso))
+    json_handler.setLevel(logging.INFO)
+
+    # La E/S real se hace en el hilo del listener; el logger raíz solo encola.
+    cola = queue.Queue(maxsize=max_cola)
+    queue_handler = ColaAcotadaHandler(cola, politica_desbordamiento)
+    root_logger.addHandler(queue_handler)
+
+    _listener = ListenerPorLotes(cola, stream_handler, info_handler, error_handler, json_handler, tamano_lote=tamano_lote)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """
+    Vacía la cola de logs, detiene el hilo del listener y cierra los archivos.
+
+    Es seguro llamarla varias veces.
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+
+    root_logger = logging.getLogger()
+    descartados = 0
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, ColaAcotadaHandler) and handler.queue is listener.queue:
+            descartados += handler.descartados
+            root_logger.removeHandler(handler)
+
+    listener.stop()
+    for handler in listener.handlers:
+        if descartados and handler.level <= logging.WARNING:
+            handler.handle(logging.makeLogRecord({
+                'name': 'log_setup', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Se descartaron {descartados} registros por desbordamiento de la cola de logs.",
+            }))
+        handler.close()
@@ -0,0 +1,167 @@
+"""
+Cola de emparejamiento por nivel para las partidas JvJ (/buscar).
+
+Cada cola (un juego en un servidor, o un juego entre todos los servidores) es
+una lista ordenada por nivel. Al entrar un jugador se busca con `bisect` su
+vecino más cercano por nivel, en O(log n); si la diferencia cabe en la ventana
+aceptable, se emparejan al momento. La ventana de cada jugador se amplía con
+el tiempo que lleva esperando, así que `tick` (llamado periódicamente desde el
+bucle de eventos) repasa cada cola en una sola pasada: en una lista ordenada,
+el rival más cercano de cada jugador siempre es uno de sus dos vecinos.
+
+Este módulo no depende de discord: la extensión cogs/buscar.py crea las
+solicitudes, lanza el `tick` y arranca las partidas de las parejas formadas.
+"""
+import itertools
+import time
+from bisect import bisect_left
+
+NIVEL_BASE = 1000
+PUNTOS_POR_PARTIDA = 20  # Nivel que se gana por victoria (y se pierde por derrota)
+
+def rating(marcador) -> int:
+    """Nivel de un jugador a partir de su marcador en el juego (ver player_stats.Marcador)."""
+    if marcador is None:
+        return NIVEL_BASE
+    return NIVEL_BASE + PUNTOS_POR_PARTIDA * (marcador.victorias - marcador.derrotas)
+
+class Solicitud:
+    """Un jugador esperando rival en una cola."""
+    __slots__ = ('user_id', 'nombre', 'rating', 'cola', 'inicio', 'orden', 'datos')
+
+    def __init__(self, user_id: int, nombre: str, rating: int, cola: tuple, datos=None):
+        self.user_id = user_id
+        self.nombre = nombre
+        self.rating = rating
+        self.cola = cola     # (juego, guild_id), o (juego, None) para la cola entre servidores
+        self.inicio = time.monotonic()
+        self.orden = 0       # Lo asigna Emparejador.add; desempata a igual nivel por antigüedad
+        self.datos = datos   # Lo que necesite quien arranca la partida (canal, interacción...)
+
+    @property
+    def clave(self) -> tuple:
+        return (self.rating, self.orden)
+
+class Emparejador:
+    def __init__(self, ventana_inicial: int = 100, ampliacion: int = 50, intervalo: float = 5.0,
+                 ventana_maxima: int = 1000, espera_maxima: float = 600.0):
+        self.ventana_inicial = ventana_inicial
+        self.ampliacion = ampliacion        # Cuánto crece la ventana...
+        self.intervalo = intervalo          # ...cada tantos segundos de espera
+        self.ventana_maxima = ventana_maxima
+        self.espera_maxima = espera_maxima  # Segundos en cola antes de abandonar la búsqueda
+        # Cola -> lista ordenada de (rating, orden, Solicitud)
+        self._colas = {}
+        # user_id -> Solicitud: cada jugador solo puede estar en una cola
+        self._por_usuario = {}
+        self._orden = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._por_usuario)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._por_usuario
+
+    def waiting(self) -> dict:
+        """Jugadores en espera por cola."""
+        return {cola: len(entradas) for cola, entradas in self._colas.items()}
+
+    def window(self, solicitud: Solicitud, ahora: float) -> int:
+        """Diferencia de nivel que acepta una solicitud según lo que lleva esperando."""
+        pasos = int((ahora - solicitud.inicio) // self.intervalo)
+        return min(self.ventana_maxima, self.ventana_inicial + pasos * self.ampliacion)
+
+    def _compatibles(self, a: Solicitud, b: Solicitud, ahora: float) -> bool:
+        # Basta con que la acepte uno: quien lleva más tiempo esperando se vuelve menos exigente
+        return abs(a.rating - b.rating) <= max(self.window(a, ahora), self.window(b, ahora))
+
+    def add(self, solicitud: Solicitud):
+        """
+        Pone una solicitud en su cola. Si ya hay un rival compatible lo saca de
+        la cola y lo devuelve; si no, devuelve None y la solicitud queda esperando.
+        """
+        if solicitud.user_id in self._por_usuario:
+            raise ValueError(f"El usuario {solicitud.user_id} ya está en una cola")
+        solicitud.orden = next(self._orden)
+        entradas = self._colas.setdefault(solicitud.cola, [])
+        i = bisect_left(entradas, solicitud.clave)
+        # El vecino más cercano por nivel está justo a un lado u otro de la posición
+        candidato = None
+        for j in (i - 1, i):
+            if 0 <= j < len(entradas):
+                rival = entradas[j][2]
+                if candidato is None or abs(rival.rating - solicitud.rating) < abs(candidato[1].rating - solicitud.rating):
+                    candidato = (j, rival)
+        ahora = time.monotonic()
+        if candidato is not None and self._compatibles(solicitud, candidato[1], ahora):
+            j, rival = candidato
+            del entradas[j]
+            del self._por_usuario[rival.user_id]
+            if not entradas:
+                del self._colas[solicitud.cola]
+            return rival
+        entradas.insert(i, (solicitud.rating, solicitud.orden, solicitud))
+        self._por_usuario[solicitud.user_id] = solicitud
+        return None
+
+    def get(self, user_id: int):
+        """Solicitud de un jugador que está esperando, o None."""
+        return self._por_usuario.get(user_id)
+
+    def remove(self, user_id: int):
+        """Saca a un jugador de su cola. Devuelve su solicitud, o None si no estaba esperando."""
+        solicitud = self._por_usuario.pop(user_id, None)
+        if solicitud is None:
+            return None
+        entradas = self._colas[solicitud.cola]
+        del entradas[bisect_left(entradas, solicitud.clave)]
+        if not entradas:
+            del self._colas[solicitud.cola]
+        return solicitud
+
+    def tick(self, ahora: float = None) -> tuple:
+        """
+        Repasa todas las colas con las ventanas ya ampliadas.
+
+        Devuelve (parejas, caducadas): las parejas (a, b) formadas, con `a` la
+        solicitud más antigua, y las solicitudes que han superado la espera
+        máxima. Todas salen de las colas.
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        parejas, caducadas = [], []
+        inicial, ampliacion, intervalo, maxima = self.ventana_inicial, self.ampliacion, self.intervalo, self.ventana_maxima
+        limite = ahora - self.espera_maxima
+        for cola, entradas in list(self._colas.items()):
+            quedan = []
+            anterior = None  # Última solicitud que sigue en la cola, y su ventana
+            ventana_anterior = 0
+            for entrada in entradas:
+                solicitud = entrada[2]
+                if solicitud.inicio < limite:
+                    caducadas.append(solicitud)
+                    continue
+                # Igual que window(), sin llamadas por elemento: es el bucle caliente con colas grandes
+                ventana = min(maxima, inicial + int((ahora - solicitud.inicio) // intervalo) * ampliacion)
+                if anterior is not None and solicitud.rating - anterior.rating <= max(ventana, ventana_anterior):
+                    quedan.pop()
+                    parejas.append((anterior, solicitud) if anterior.orden < solicitud.orden else (solicitud, anterior))
+                    anterior = None
+                    continue
+                quedan.append(entrada)
+                anterior, ventana_anterior = solicitud, ventana
+            if quedan:
+                self._colas[cola] = quedan
+            else:
+                del self._colas[cola]
+        for a, b in parejas:
+            del self._por_usuario[a.user_id], self._por_usuario[b.user_id]
+        for solicitud in caducadas:
+            del self._por_usuario[solicitud.user_id]
+        return parejas, caducadas
+
+    def clear(self) -> list:
+        """Vacía todas las colas y devuelve las solicitudes que esperaban."""
+        solicitudes = list(self._por_usuario.values())
+        self._colas.clear()
+        self._por_usuario.clear()
+        return solicitudes
@@ -0,0 +1,264 @@
+"""
+Métricas del bot en formato de texto de Prometheus.
+
+Implementación mínima, sin dependencias, de contadores, gauges e histogramas
+con etiquetas, y un servidor HTTP local (asyncio) que los expone en /metrics.
+Se instrumenta:
+
+- Cada comando slash: número de ejecuciones por resultado y duración.
+- Cada callback de componente o modal: ídem, por juego.
+- El tiempo desde que Discord crea la interacción hasta que el bot la
+  reconoce (defer, send_message, edit_message o send_modal), que debe
+  quedar por debajo de los 3 segundos.
+- Partidas activas por juego, expiraciones, estado del planificador de
+  renderizado y retraso (lag) del bucle de eventos.
+"""
+import asyncio
+import functools
+import logging
+import time
+
+import discord
+from discord import app_commands
+
+logger = logging.getLogger('discord_bot.metrics')
+
+# Buckets por defecto, en segundos
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_ACK = (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0)
+PLAZO_ACK = 3.0  # Discord invalida la interacción si no se reconoce en este plazo
+
+_registro = []
+
+def _formatear_etiquetas(nombres: tuple, valores: tuple, extra: str = '') -> str:
+    partes = [f'{n}="{v}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+class _Metrica:
+    TIPO = None
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        _registro.append(self)
+
+    def render(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.TIPO}"]
+        lineas.extend(self.samples())
+        return lineas
+
+    def samples(self) -> list:
+        raise NotImplementedError
+
+class Counter(_Metrica):
+    TIPO = 'counter'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores = {}
+
+    def inc(self, *valores, n: float = 1):
+        self._valores[valores] = self._valores.get(valores, 0) + n
+
+    def total(self) -> float:
+        """Suma de todas las etiquetas."""
+        return sum(self._valores.values())
+
+    def samples(self) -> list:
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, v)} {total}" for v, total in self._valores.items()]
+
+class Gauge(_Metrica):
+    """Gauge cuyo valor se calcula al exportar: `funcion` devuelve un número o un dict etiquetas -> número."""
+    TIPO = 'gauge'
+
+    def __init__(self, nombre: str, ayuda: str, funcion, etiquetas: tuple = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+
+    def samples(self) -> list:
+        try:
+            valor = self.funcion()
+        except Exception:
+            logger.exception(f"Error calculando la métrica {self.nombre}")
+            return []
+        if not isinstance(valor, dict):
+            return [f"{self.nombre} {valor}"]
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, v if isinstance(v, tuple) else (v,))} {n}" for v, n in valor.items()]
+
+class CounterFunc(Gauge):
+    """Contador cuyo valor se lee de otro objeto al exportar (ver Gauge)."""
+    TIPO = 'counter'
+
+class Histogram(_Metrica):
+    TIPO = 'histogram'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), buckets: tuple = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = buckets
+        self._series = {}  # etiquetas -> [cuentas por bucket..., +Inf, suma]
+
+    def observe(self, valor: float, *valores):
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie[i] += 1
+                break
+        else:
+            serie[len(self.buckets)] += 1
+        serie[-1] += valor
+
+    def samples(self) -> list:
+        lineas = []
+        for valores, serie in self._series.items():
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets + ('+Inf',), serie):
+                acumulado += cuenta
+                le = f'le="{limite}"'
+                lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+            etiquetas = _formatear_etiquetas(self.etiquetas, valores)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {serie[-1]}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {acumulado}")
+        return lineas
+
+def render() -> str:
+    lineas = []
+    for metrica in _registro:
+        lineas.extend(metrica.render())
+    return '\n'.join(lineas) + '\n'
+
+# --- MÉTRICAS DEL BOT ---
+comandos = Counter('bot_comandos_total', 'Comandos slash ejecutados.', ('comando', 'resultado'))
+duracion_comandos = Histogram('bot_comando_duracion_segundos', 'Duración de los comandos slash.', ('comando',))
+callbacks = Counter('bot_callbacks_total', 'Callbacks de componentes y modales ejecutados.', ('juego', 'resultado'))
+duracion_callbacks = Histogram('bot_callback_duracion_segundos', 'Duración de los callbacks de componentes y modales.', ('juego',))
+ack = Histogram('bot_ack_segundos', 'Tiempo desde que Discord crea la interacción hasta que el bot la reconoce.', ('tipo',), BUCKETS_ACK)
+ack_tardios = Counter('bot_ack_tardios_total', f'Interacciones reconocidas después de {PLAZO_ACK:.0f} s.', ('tipo',))
+descartadas = Counter('bot_interacciones_descartadas_total', 'Interacciones de componentes reconocidas sin procesar.', ('juego', 'motivo'))
+expiraciones = Counter('bot_expiraciones_total', 'Partidas terminadas por inactividad.', ('juego',))
+lag_bucle = Histogram('bot_lag_bucle_segundos', 'Retraso del bucle de eventos respecto a lo programado.', buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+def register_gauges(games: dict, render_scheduler, temporizadores, expiraciones_pendientes):
+    """Gauges calculados a partir del registro de partidas, su expiración y el planificador de renderizado."""
+    def por_juego():
+        cuentas = {}
+        for state in games.values():
+            cuentas[state.TIPO] = cuentas.get(state.TIPO, 0) + 1
+        return cuentas
+    Gauge('bot_partidas_activas', 'Partidas activas por juego.', por_juego, ('juego',))
+    Gauge('bot_temporizadores', 'Partidas con la expiración programada en la rueda de temporizadores.', lambda: len(temporizadores))
+    Gauge('bot_expiraciones_pendientes', 'Partidas expiradas cuyo mensaje falta por editar.', lambda: len(expiraciones_pendientes))
+    Gauge('bot_render_pendientes', 'Ediciones de mensajes esperando en el planificador.', lambda: len(render_scheduler._pendientes))
+    Gauge('bot_render_en_vuelo', 'Ediciones de mensajes en curso.', lambda: len(render_scheduler._en_vuelo))
+    CounterFunc('bot_render_ediciones_total', 'Ediciones procesadas por el planificador, por resultado.', lambda: {
+        'enviadas': render_scheduler.enviadas,
+        'combinadas': render_scheduler.combinadas,
+        'sin_cambios': render_scheduler.sin_cambios,
+    }, ('resultado',))
+
+# --- INSTRUMENTACIÓN ---
+class InstrumentedTree(app_commands.CommandTree):
+    """Árbol de comandos que anota el inicio de cada comando (ver `command_finished`)."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._inicios = {}  # interaction.id -> perf_counter al empezar el comando
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type == discord.InteractionType.application_command: # No los autocompletados
+            self._inicios[interaction.id] = time.perf_counter()
+        return True
+
+    def command_finished(self, interaction: discord.Interaction, resultado: str):
+        """Se llama al completar un comando (on_app_command_completion) o al fallar (on_error)."""
+        inicio = self._inicios.pop(interaction.id, None)
+        nombre = interaction.command.qualified_name if interaction.command is not None else 'desconocido'
+        comandos.inc(nombre, resultado)
+        if inicio is not None:
+            duracion_comandos.observe(time.perf_counter() - inicio, nombre)
+
+class measure_callback:
+    """Context manager que cuenta y cronometra un callback de componente o modal."""
+    __slots__ = ('juego', 'inicio')
+
+    def __init__(self, juego: str):
+        self.juego = juego
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        callbacks.inc(self.juego, 'ok' if tipo_exc is None else 'error')
+        duracion_callbacks.observe(time.perf_counter() - self.inicio, self.juego)
+        return False
+
+def created_at(interaction: discord.Interaction) -> float:
+    """Momento (epoch) en que Discord creó la interacción, según su snowflake."""
+    return ((interaction.id >> 22) + 1420070400000) / 1000
+
+def instrument_responses():
+    """
+    Envuelve los métodos de InteractionResponse que reconocen una interacción
+    para medir el tiempo hasta el reconocimiento en un único sitio, sin
+    tocar cada callback.
+    """
+    for nombre in ('defer', 'send_message', 'edit_message', 'send_modal'):
+        original = getattr(discord.InteractionResponse, nombre)
+        if getattr(original, '_instrumentado', False):
+            continue
+        setattr(discord.InteractionResponse, nombre, _wrap_response(original))
+
+def _wrap_response(original):
+    @functools.wraps(original)
+    async def envoltura(self, *args, **kwargs):
+        primera = not self.is_done()
+        resultado = await original(self, *args, **kwargs)
+        if primera:
+            interaction = self._parent
+            tipo = interaction.type.name
+            espera = max(0.0, time.time() - created_at(interaction))
+            ack.observe(espera, tipo)
+            if espera > PLAZO_ACK:
+                ack_tardios.inc(tipo)
+        return resultado
+    envoltura._instrumentado = True
+    return envoltura
+
+async def monitor_loop_lag(intervalo: float = 0.5):
+    """Mide periódicamente cuánto se retrasa el bucle de eventos respecto a un sleep."""
+    while True:
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        lag_bucle.observe(max(0.0, time.perf_counter() - inicio - intervalo))
+
+# --- SERVIDOR HTTP ---
+async def _handle_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        peticion = await asyncio.wait_for(reader.readline(), timeout=5)
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+            pass  # Se ignoran las cabeceras
+        partes = peticion.decode('latin-1').split()
+        if len(partes) >= 2 and partes[0] == 'GET' and partes[1].split('?')[0] == '/metrics':
+            estado, tipo, cuerpo = '200 OK', 'text/plain; version=0.0.4; charset=utf-8', render().encode('utf-8')
+        else:
+            estado, tipo, cuerpo = '404 Not Found', 'text/plain; charset=utf-8', b'Not Found\n'
+        writer.write(
+            f"HTTP/1.1 {estado}\r\nContent-Type: {tipo}\r\nContent-Length: {len(cuerpo)}\r\nConnection: close\r\n\r\n".encode('latin-1') + cuerpo
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    except Exception:
+        logger.exception("Error atendiendo una petición de métricas")
+    finally:
+        writer.close()
+
+async def start_server(host: str, puerto: int) -> asyncio.AbstractServer:
+    """Arranca el servidor de métricas en el bucle actual."""
+    servidor = await asyncio.start_server(_handle_http, host, puerto)
+    logger.info(f"Métricas disponibles en http://{host}:{puerto}/metrics")
+    return servidor
@@ -0,0 +1,439 @@
+"""
+Infraestructura común de las partidas.
+
+Contiene lo que comparten todos los juegos y no se recarga con ellos: el
+registro de partidas activas, el almacén persistente, las estadísticas de
+los jugadores, el registro binario de partidas terminadas, el planificador de renderizado, la expiración por inactividad y el enrutado de componentes por
+custom_id, que ejecuta las interacciones de cada partida de una en una. Cada juego es una extensión de cogs/ que, al cargarse, registra aquí
+su clase de estado y su vista con `register_game`, y las da de baja al
+descargarse con `unregister_game`.
+
+Al dar de baja un juego sus partidas activas se guardan y salen de memoria; al
+volver a registrarlo (por ejemplo, tras una recarga en caliente) se restauran
+desde el almacén con el código nuevo.
+"""
+import asyncio
+import functools
+import logging
+import time
+from collections import Counter, deque
+
+import discord
+from discord import ui
+
+import game_records
+import metrics
+from config import TAMANO_RANKING, EXPIRACIONES_POR_SEGUNDO, TAMANO_SEGMENTO_REGISTROS, ESPERA_MAXIMA_TURNO
+import player_stats
+import profiling
+import render_cache
+from game_store import GameStore
+from player_stats import PlayerStats
+from render_scheduler import RenderScheduler, PRIORIDAD_JUGADA, PRIORIDAD_EXPIRACION
+from timer_wheel import TimerWheel
+
+logger = logging.getLogger('discord_bot')
+
+bot = None    # Se asigna en configure()
+store = None  # Se asigna en configure()
+stats = None  # Se asigna en configure()
+registros = None  # Se asigna en configure()
+# Todas las ediciones diferidas de mensajes de partidas pasan por el planificador
+render_scheduler = RenderScheduler()
+# Una sola rueda de temporizadores para la expiración de todas las partidas: game_id -> estado
+temporizadores = TimerWheel()
+# Vistas de partidas ya expiradas cuyo mensaje falta por editar (ver _trabajador_expiraciones)
+expiraciones_pendientes = deque()
+_hay_expiraciones = None  # asyncio.Event, se crea en start()
+# Partidas activas: game_id -> estado compacto (ver game_state.py)
+games = {}
+# Partidas activas por usuario y por servidor, para los topes de rate_limits.py
+activas_por_usuario = Counter()
+activas_por_servidor = Counter()
+# Partidas con alguna interacción en curso o esperando turno: game_id -> _Turno
+_turnos = {}
+# Juegos registrados por las extensiones cargadas: TIPO -> clase de estado / clase de vista
+TIPOS_PARTIDA = {}
+VISTAS_PARTIDA = {}
+
+def configure(cliente, ruta_bd: str, ruta_estadisticas: str, directorio_registros: str):
+    """
+    Asocia el bot y crea el almacén de partidas, el de estadísticas y el
+    registro de partidas terminadas. Se llama una vez, antes de arrancar.
+    """
+    global bot, store, stats, registros
+    bot = cliente
+    store = GameStore(ruta_bd)
+    stats = PlayerStats(ruta_estadisticas, tamano_top=TAMANO_RANKING)
+    registros = game_records.RecordLog(directorio_registros, TAMANO_SEGMENTO_REGISTROS)
+
+class PartidaView(ui.View):
+    """
+    Base para las vistas de juego.
+
+    Las vistas son efímeras: se construyen a partir del estado de la partida
+    solo cuando hay que responder a una interacción o expirar, y se descartan
+    después. Se marcan como terminadas al crearlas para que discord.py no las
+    registre; las interacciones se enrutan por custom_id desde
+    `handle_component`. Una partida sigue activa mientras su estado esté en
+    `games`.
+
+    Las vistas pueden tomar sus componentes de render_cache con
+    `use_template`; desde ese momento se serializan desde la plantilla y sus
+    `children` no cuentan.
+    """
+    TIMEOUT = None  # Segundos de inactividad antes de expirar
+
+    def __init__(self, state):
+        super().__init__(timeout=None)
+        self.state = state
+        self._plantilla = None  # Plantilla de render_cache, o None si se usan los children
+        self._prefijo = None    # Prefijo de los custom_id de la plantilla
+        self.stop()
+
+    def make_custom_id(self, sufijo: str) -> str:
+        state = self.state
+        return f"{state.TIPO}:{state.game_id:x}:{state.secuencia:x}:{sufijo}"
+
+    def is_active(self) -> bool:
+        return games.get(self.state.game_id) is self.state
+
+    def use_template(self, clave, construir):
+        """
+        Fija los componentes de la vista a la plantilla `clave` de render_cache.
+        Si no está, `construir()` añade los componentes a la vista con el estado
+        actual y se congelan en una plantilla nueva. Los custom_id se fijan
+        ahora, como si se hubieran construido los componentes.
+        """
+        self._plantilla = render_cache.cache.get(clave, lambda: self._freeze(construir))
+        self._prefijo = self.make_custom_id('')
+
+    def _freeze(self, construir) -> tuple:
+        self.clear_items()
+        construir()
+        filas = super().to_components()
+        self.clear_items()
+        return render_cache.freeze(filas)
+
+    def to_components(self) -> list:
+        if self._plantilla is None:
+            return super().to_components()
+        return render_cache.expand(self._plantilla, self._prefijo)
+
+    def bind_message(self, message: discord.Message, guild_id: int = None):
+        """Activa la partida asociándola a su mensaje, la guarda y programa su expiración."""
+        state = self.state
+        state.guild_id = guild_id
+        state.channel_id = message.channel.id
+        state.message_id = message.id
+        state.expira_en = time.time() + self.TIMEOUT
+        games[state.game_id] = state
+        _count(state, 1)
+        self.persist()
+        schedule_expiry(state)
+
+    def persist(self):
+        """Anota el estado actual en el almacén (se escribe en el próximo lote)."""
+        if self.is_active():
+            _save(self.state)
+
+    def finish(self, resultado: int = None):
+        """
+        Termina la partida y la elimina del registro y del almacén. Si se indica
+        el resultado (ver game_records.py), la partida se archiva en el registro
+        de partidas terminadas.
+        """
+        state = self.state
+        if games.pop(state.game_id, None) is not None:
+            _count(state, -1)
+            store.delete(f"{state.game_id:x}")
+            if resultado is not None:
+                try:
+                    registros.append(game_records.encode(state, resultado, time.time()))
+                except Exception as e:
+                    logger.exception(f"Error archivando la partida {state.game_id:x}: {e}")
+        temporizadores.cancel(state.game_id)
+
+    def record_result(self, user_id: int, resultado: str, juego: str = None, mejor: int = None):
+        """Anota el resultado de un jugador en las estadísticas. El bot (la IA) no cuenta."""
+        if bot.user is not None and user_id == bot.user.id:
+            return
+        stats.record(self.state.guild_id, user_id, juego or self.state.TIPO, resultado, mejor)
+
+    def record_match(self, ganador: int = None, juego: str = None):
+        """Anota una partida de dos jugadores: `ganador` es 0 o 1, o None si hay empate."""
+        for i, user_id in enumerate(self.state.jugadores):
+            if ganador is None:
+                resultado = player_stats.EMPATE
+            else:
+                resultado = player_stats.VICTORIA if i == ganador else player_stats.DERROTA
+            self.record_result(user_id, resultado, juego)
+
+    async def render(self, interaction: discord.Interaction, content: str):
+        """
+        Edita el mensaje de la partida tras una jugada ya reconocida con `defer`.
+        La edición va por el webhook de la interacción, que tiene su propio rate
+        limit: su ruta es el token, no el canal.
+
+        Solo se programa: no se espera a que llegue a Discord, para que el turno
+        de la partida (ver `run_exclusive`) se libere en cuanto cambia el estado.
+        Los errores del envío se registran en el log.
+        """
+        futuro = render_scheduler.submit(
+            self.state.message_id, interaction.token,
+            lambda: interaction.edit_original_response(content=content, view=self),
+            content, self, PRIORIDAD_JUGADA
+        )
+        futuro.add_done_callback(functools.partial(_log_render_error, self.state.game_id))
+
+    async def render_expiry(self, content: str):
+        """Edita el mensaje de la partida para indicar que ha expirado."""
+        mensaje = bot.get_partial_messageable(self.state.channel_id).get_partial_message(self.state.message_id)
+        await render_scheduler.submit(
+            self.state.message_id, self.state.channel_id,
+            lambda: mensaje.edit(content=content, view=self),
+            content, self, PRIORIDAD_EXPIRACION
+        )
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Cualquier interacción reinicia el contador de inactividad. La rueda no se toca:
+        # al vencer el plazo anterior se comprueba `expira_en` y se reprograma (ver _expire_batch)
+        self.state.expira_en = time.time() + self.TIMEOUT
+        return True
+
+    async def dispatch(self, interaction: discord.Interaction, sufijo: str):
+        """Ejecuta la acción del componente identificado por `sufijo`."""
+        raise NotImplementedError
+
+def _count(state, delta: int):
+    """Suma `delta` a las partidas activas de los participantes y del servidor de una partida."""
+    for user_id in state.participantes:
+        activas_por_usuario[user_id] += delta
+        if not activas_por_usuario[user_id]:
+            del activas_por_usuario[user_id]
+    if state.guild_id is not None:
+        activas_por_servidor[state.guild_id] += delta
+        if not activas_por_servidor[state.guild_id]:
+            del activas_por_servidor[state.guild_id]
+
+def _log_render_error(game_id: int, futuro: asyncio.Future):
+    if not futuro.cancelled() and futuro.exception() is not None:
+        error = futuro.exception()
+        logger.error(f"Error editando el mensaje de la partida {game_id:x}: {error}", exc_info=error)
+
+def _save(state):
+    store.save(f"{state.game_id:x}", state.TIPO, state.guild_id, state.channel_id, state.message_id, state.expira_en, state.to_dict())
+
+# --- EXPIRACIÓN ---
+def schedule_expiry(state):
+    temporizadores.schedule(state.game_id, state.expira_en, state)
+
+def start():
+    """Lanza la expiración de partidas. Debe llamarse con el bucle de eventos activo."""
+    global _hay_expiraciones
+    if _hay_expiraciones is None:
+        _hay_expiraciones = asyncio.Event()
+        asyncio.create_task(_bucle_expiracion())
+        asyncio.create_task(_trabajador_expiraciones())
+
+async def _bucle_expiracion():
+    """Avanza la rueda en cada tick y expira de una vez todas las partidas que vencen en él."""
+    while True:
+        await asyncio.sleep(max(0.0, temporizadores.next_tick() - time.time()))
+        try:
+            _expire_batch(temporizadores.advance())
+        except Exception:
+            logger.exception("Error procesando las expiraciones de partidas")
+
+def _expire_batch(vencidas: list):
+    ahora = time.time()
+    expiradas = 0
+    for state in vencidas:
+        if games.get(state.game_id) is not state:
+            continue
+        if state.expira_en > ahora:
+            schedule_expiry(state)  # Hubo actividad desde que se programó
+            continue
+        vista = VISTAS_PARTIDA.get(state.TIPO)
+        if vista is None:
+            continue  # El juego se ha descargado; la partida se restaurará (y expirará) al volver a cargarlo
+        metrics.expiraciones.inc(state.TIPO)
+        view = vista(state)
+        view.finish(game_records.EXPIRADA)
+        expiraciones_pendientes.append(view)
+        expiradas += 1
+    if expiradas:
+        _hay_expiraciones.set()
+
+async def _trabajador_expiraciones():
+    """
+    Edita los mensajes de las partidas expiradas a un ritmo máximo de
+    EXPIRACIONES_POR_SEGUNDO, para que una oleada de expiraciones no compita
+    con las jugadas en vivo. Las partidas ya están terminadas: solo falta el mensaje.
+    """
+    while True:
+        await _hay_expiraciones.wait()
+        _hay_expiraciones.clear()
+        while expiraciones_pendientes:
+            asyncio.create_task(_run_timeout(expiraciones_pendientes.popleft()))
+            await asyncio.sleep(1 / EXPIRACIONES_POR_SEGUNDO)
+
+async def _run_timeout(view):
+    try:
+        await view.on_timeout()
+    except Exception as e:
+        logger.exception(f"Error expirando la partida {view.state.game_id:x}: {e}")
+
+# --- REGISTRO DE JUEGOS ---
+async def register_game(state_cls, view_cls):
+    """Registra un juego y restaura sus partidas guardadas. Se llama desde `cog_load`."""
+    TIPOS_PARTIDA[state_cls.TIPO] = state_cls
+    VISTAS_PARTIDA[state_cls.TIPO] = view_cls
+    await restore_games(state_cls.TIPO)
+
+def unregister_game(tipo: str):
+    """Da de baja un juego guardando sus partidas activas y sacándolas de memoria. Se llama desde `cog_unload`."""
+    TIPOS_PARTIDA.pop(tipo, None)
+    VISTAS_PARTIDA.pop(tipo, None)
+    guardadas = 0
+    for game_id, state in list(games.items()):
+        if state.TIPO != tipo:
+            continue
+        del games[game_id]
+        _count(state, -1)
+        temporizadores.cancel(game_id)
+        _save(state)
+        guardadas += 1
+    if guardadas:
+        logger.info(f"Guardadas {guardadas} partidas de tipo '{tipo}' al descargar el juego.")
+
+async def restore_games(tipo: str):
+    """Carga de una vez las partidas guardadas de un tipo y las vuelve a activar."""
+    inicio = time.perf_counter()
+    # Confirma antes los cambios pendientes para no resucitar partidas ya terminadas
+    await asyncio.to_thread(store.flush)
+    filas = await asyncio.to_thread(store.load_all, tipo)
+    restauradas = 0
+    for fila in filas:
+        try:
+            game_id = int(fila['game_id'], 16)
+            if game_id in games:
+                continue
+            state = TIPOS_PARTIDA[tipo].from_dict(game_id, fila['estado'])
+            state.guild_id = fila['guild_id']
+            state.channel_id = fila['channel_id']
+            state.message_id = fila['message_id']
+            state.expira_en = fila['expira_en']
+            games[game_id] = state
+            _count(state, 1)
+            schedule_expiry(state)
+            restauradas += 1
+        except Exception as e:
+            logger.exception(f"Error restaurando la partida {fila['game_id']}: {e}")
+            store.delete(fila['game_id'])
+    logger.info(f"Restauradas {restauradas} partidas de tipo '{tipo}' en {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+
+# --- EJECUCIÓN POR PARTIDA ---
+class _Turno:
+    """Cola de las interacciones de una partida: se ejecutan de una en una."""
+    __slots__ = ('cerrojo', 'pendientes')
+
+    def __init__(self):
+        self.cerrojo = asyncio.Lock()
+        self.pendientes = 0  # Interacciones ejecutándose o esperando
+
+async def run_exclusive(state, interaction: discord.Interaction, accion, secuencia: int = None, nombre: str = None):
+    """
+    Ejecuta `accion()` (una corrutina) con la partida en exclusiva: las
+    interacciones de una misma partida se procesan en orden de llegada y nunca
+    se solapan, aunque esperen a Discord o a la IA. La edición del mensaje con
+    el resultado no cuenta: `PartidaView.render` solo la programa y el turno
+    pasa a la siguiente interacción sin esperar a que llegue a Discord.
+
+    Al llegar su turno, la interacción se descarta sin hacer nada si la partida
+    ya terminó o, cuando se indica `secuencia`, si la partida ha avanzado desde
+    que se pintó el componente pulsado (un doble clic, o dos jugadores
+    pulsando a la vez). También se descarta si espera más de
+    ESPERA_MAXIMA_TURNO: la anterior todavía está en curso y casi seguro la
+    dejará obsoleta.
+
+    Una fracción de las acciones se ejecuta bajo el perfilador (ver
+    profiling.py) con el nombre `nombre`, por defecto el tipo de juego.
+    """
+    turno = _turnos.get(state.game_id)
+    if turno is None:
+        turno = _turnos[state.game_id] = _Turno()
+    turno.pendientes += 1
+    try:
+        if turno.cerrojo.locked():
+            try:
+                await asyncio.wait_for(turno.cerrojo.acquire(), ESPERA_MAXIMA_TURNO)
+            except asyncio.TimeoutError:
+                await _discard(interaction, state.TIPO, 'ocupada')
+                return
+        else:
+            await turno.cerrojo.acquire()  # Libre: se toma sin ceder el bucle
+        try:
+            if games.get(state.game_id) is not state:
+                metrics.descartadas.inc(state.TIPO, 'terminada')
+                await interaction.response.send_message("Esta partida ya ha terminado o ha expirado.", ephemeral=True)
+            elif secuencia is not None and secuencia != state.secuencia:
+                await _discard(interaction, state.TIPO, 'obsoleta')
+            else:
+                await profiling.sample(nombre or state.TIPO, accion())
+        finally:
+            turno.cerrojo.release()
+    finally:
+        turno.pendientes -= 1
+        if not turno.pendientes:
+            del _turnos[state.game_id]
+
+async def _discard(interaction: discord.Interaction, tipo: str, motivo: str):
+    """Reconoce una interacción sin procesarla: el mensaje no cambia."""
+    metrics.descartadas.inc(tipo, motivo)
+    try:
+        await interaction.response.defer()
+    except discord.HTTPException:
+        pass  # Ya caducó: no hay nada que reconocer
+
+# --- ENRUTADO DE COMPONENTES ---
+async def handle_component(interaction: discord.Interaction):
+    """
+    Enruta una interacción de componente a la vista de su partida según el
+    custom_id ('tipo:game_id:secuencia:sufijo'; los mensajes anteriores a la
+    secuencia no la llevan).
+    """
+    partes = interaction.data.get('custom_id', '').split(':')
+    if len(partes) == 4:
+        tipo, game_id, secuencia, sufijo = partes
+    elif len(partes) == 3:
+        tipo, game_id, sufijo = partes
+        secuencia = None
+    else:
+        return
+    try:
+        game_id = int(game_id, 16)
+        secuencia = None if secuencia is None else int(secuencia, 16)
+    except ValueError:
+        return
+    vista = VISTAS_PARTIDA.get(tipo)
+    if vista is None:
+        # Juego descargado (o en plena recarga): sus partidas siguen guardadas
+        await interaction.response.send_message("Este juego no está disponible ahora mismo. Inténtalo en un rato.", ephemeral=True)
+        return
+    state = games.get(game_id)
+    if state is None or state.TIPO != tipo:
+        await interaction.response.send_message("Esta partida ya ha terminado o ha expirado.", ephemeral=True)
+        return
+    if secuencia is not None and secuencia != state.secuencia:
+        # Clic sobre una versión ya superada del mensaje: se descarta sin esperar turno
+        await _discard(interaction, tipo, 'obsoleta')
+        return
+
+    async def accion():
+        with metrics.measure_callback(tipo):
+            view = vista(state)
+            if await view.interaction_check(interaction):
+                await view.dispatch(interaction, sufijo)
+
+    await run_exclusive(state, interaction, accion, secuencia)
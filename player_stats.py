@@ -0,0 +1,243 @@
+"""
+Estadísticas de los jugadores: victorias, derrotas y empates por juego.
+
+Los resultados se agregan en memoria por usuario, por servidor y por juego, y
+también en global y para todos los juegos a la vez. A la base de datos SQLite
+solo van las filas concretas (servidor, usuario, juego) y no en cada partida:
+`record` acumula incrementos en memoria y una tarea en segundo plano los
+confirma en lotes, en una única transacción, desde un hilo aparte (como en
+game_store.py).
+
+Las clasificaciones se responden desde un top-K por ámbito que se mantiene de
+forma incremental al anotar cada resultado, así que consultar `/ranking` nunca
+recorre la base de datos ni todos los jugadores. Como las puntuaciones solo
+crecen, un jugador solo puede entrar en el top-K cuando cambia su propia
+puntuación y el top-K es siempre exacto.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+
+logger = logging.getLogger('discord_bot.stats')
+
+VICTORIA, DERROTA, EMPATE = 'victoria', 'derrota', 'empate'
+TODOS = '*'  # Juego comodín: todos los juegos a la vez
+GLOBAL = None  # Servidor comodín: todos los servidores a la vez
+SIN_SERVIDOR = 0  # guild_id con el que se guardan las partidas de mensajes directos
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS estadisticas (
+    guild_id  INTEGER NOT NULL,
+    user_id   INTEGER NOT NULL,
+    juego     TEXT NOT NULL,
+    victorias INTEGER NOT NULL DEFAULT 0,
+    derrotas  INTEGER NOT NULL DEFAULT 0,
+    empates   INTEGER NOT NULL DEFAULT 0,
+    mejor     INTEGER,
+    PRIMARY KEY (guild_id, user_id, juego)
+) WITHOUT ROWID
+"""
+
+# Suma los incrementos a la fila existente; `mejor` (menos intentos) se queda con el mínimo
+_UPSERT = """
+INSERT INTO estadisticas (guild_id, user_id, juego, victorias, derrotas, empates, mejor)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (guild_id, user_id, juego) DO UPDATE SET
+    victorias = victorias + excluded.victorias,
+    derrotas = derrotas + excluded.derrotas,
+    empates = empates + excluded.empates,
+    mejor = CASE
+        WHEN excluded.mejor IS NULL THEN mejor
+        WHEN mejor IS NULL OR excluded.mejor < mejor THEN excluded.mejor
+        ELSE mejor
+    END
+"""
+
+class Marcador:
+    """Resultados acumulados de un jugador en un ámbito."""
+    __slots__ = ('victorias', 'derrotas', 'empates', 'mejor')
+
+    def __init__(self, victorias: int = 0, derrotas: int = 0, empates: int = 0, mejor: int = None):
+        self.victorias = victorias
+        self.derrotas = derrotas
+        self.empates = empates
+        self.mejor = mejor  # Mejor marca (p. ej. menos intentos), o None
+
+    @property
+    def partidas(self) -> int:
+        return self.victorias + self.derrotas + self.empates
+
+    @property
+    def puntos(self) -> int:
+        return 3 * self.victorias + self.empates
+
+    def add(self, victorias: int, derrotas: int, empates: int, mejor: int = None):
+        self.victorias += victorias
+        self.derrotas += derrotas
+        self.empates += empates
+        if mejor is not None and (self.mejor is None or mejor < self.mejor):
+            self.mejor = mejor
+
+class _TopK:
+    """Los K mejores de un ámbito, como lista ordenada de (-puntos, user_id)."""
+    __slots__ = ('k', 'entradas', 'puntos')
+
+    def __init__(self, k: int, marcadores: dict):
+        self.k = k
+        self.entradas = sorted((-m.puntos, user_id) for user_id, m in marcadores.items())[:k]
+        self.puntos = {user_id: -p for p, user_id in self.entradas}
+
+    def update(self, user_id: int, puntos: int):
+        anterior = self.puntos.get(user_id)
+        if anterior == puntos:
+            return
+        if anterior is not None:
+            del self.entradas[bisect_left(self.entradas, (-anterior, user_id))]
+        elif len(self.entradas) >= self.k and (-puntos, user_id) >= self.entradas[-1]:
+            return
+        insort(self.entradas, (-puntos, user_id))
+        self.puntos[user_id] = puntos
+        if len(self.entradas) > self.k:
+            _, fuera = self.entradas.pop()
+            del self.puntos[fuera]
+
+class PlayerStats:
+    def __init__(self, ruta: str = 'estadisticas.db', intervalo_flush: float = 5.0, tamano_top: int = 10):
+        self.ruta = ruta
+        self.intervalo_flush = intervalo_flush
+        self.tamano_top = tamano_top
+        self._conexion = None
+        # (guild_id o GLOBAL, juego o TODOS) -> user_id -> Marcador
+        self._marcadores = {}
+        # Índice por jugador: (guild_id o GLOBAL, user_id) -> juego (sin TODOS) -> el mismo Marcador
+        self._por_jugador = {}
+        # Mismo ámbito -> _TopK, creado en la primera consulta
+        self._tops = {}
+        # (guild_id, user_id, juego) -> [victorias, derrotas, empates, mejor] pendientes de guardar
+        self._pendientes = {}
+        self._lock = threading.Lock()       # Protege _pendientes; se toma desde el bucle de eventos
+        self._escritura = threading.Lock()  # Serializa las escrituras en la base de datos (flush, close)
+        self._tarea = None
+
+    def open(self):
+        """Abre la base de datos, crea el esquema si no existe y carga los marcadores en memoria."""
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(_ESQUEMA)
+        filas = self._conexion.execute(
+            "SELECT guild_id, user_id, juego, victorias, derrotas, empates, mejor FROM estadisticas"
+        ).fetchall()
+        for guild_id, user_id, juego, victorias, derrotas, empates, mejor in filas:
+            self._add(guild_id, user_id, juego, victorias, derrotas, empates, mejor)
+        logger.info(f"Cargadas {len(filas)} filas de estadísticas.")
+
+    def start(self):
+        """Lanza la tarea de escritura diferida. Debe llamarse con el bucle de eventos activo."""
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle_flush())
+
+    async def _bucle_flush(self):
+        while True:
+            await asyncio.sleep(self.intervalo_flush)
+            if self._pendientes:
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception:
+                    logger.exception("Error guardando estadísticas")
+
+    def _add(self, guild_id: int, user_id: int, juego: str, victorias: int, derrotas: int, empates: int, mejor: int):
+        """Suma un resultado a los cuatro ámbitos que lo contienen y actualiza sus top-K."""
+        for ambito in ((guild_id, juego), (guild_id, TODOS), (GLOBAL, juego), (GLOBAL, TODOS)):
+            marcadores = self._marcadores.get(ambito)
+            if marcadores is None:
+                marcadores = self._marcadores[ambito] = {}
+            marcador = marcadores.get(user_id)
+            if marcador is None:
+                marcador = marcadores[user_id] = Marcador()
+                if ambito[1] != TODOS:
+                    self._por_jugador.setdefault((ambito[0], user_id), {})[ambito[1]] = marcador
+            marcador.add(victorias, derrotas, empates, mejor)
+            top = self._tops.get(ambito)
+            if top is not None:
+                top.update(user_id, marcador.puntos)
+
+    def record(self, guild_id: int, user_id: int, juego: str, resultado: str, mejor: int = None):
+        """Anota el resultado de un jugador en una partida. Se guarda en el próximo lote."""
+        victorias, derrotas, empates = resultado == VICTORIA, resultado == DERROTA, resultado == EMPATE
+        if guild_id is None:
+            guild_id = SIN_SERVIDOR
+        self._add(guild_id, user_id, juego, victorias, derrotas, empates, mejor)
+        with self._lock:
+            self._accumulate((guild_id, user_id, juego), victorias, derrotas, empates, mejor)
+
+    def _accumulate(self, clave: tuple, victorias: int, derrotas: int, empates: int, mejor: int):
+        """Suma un incremento a los pendientes. Hay que llamarla con el cerrojo tomado."""
+        pendiente = self._pendientes.get(clave)
+        if pendiente is None:
+            self._pendientes[clave] = [int(victorias), int(derrotas), int(empates), mejor]
+            return
+        pendiente[0] += victorias
+        pendiente[1] += derrotas
+        pendiente[2] += empates
+        if mejor is not None and (pendiente[3] is None or mejor < pendiente[3]):
+            pendiente[3] = mejor
+
+    def get(self, user_id: int, guild_id: int = GLOBAL, juego: str = TODOS) -> Marcador:
+        """Marcador de un jugador en un ámbito, o None si no ha jugado."""
+        return self._marcadores.get((guild_id, juego), {}).get(user_id)
+
+    def games_of(self, user_id: int, guild_id: int = GLOBAL) -> dict:
+        """Marcadores de un jugador por juego (sin el comodín) en un servidor o en global."""
+        return dict(self._por_jugador.get((guild_id, user_id), {}))
+
+    def top(self, guild_id: int = GLOBAL, juego: str = TODOS, n: int = None) -> list:
+        """Los `n` mejores jugadores de un ámbito como lista de (user_id, Marcador), sin tocar la base de datos."""
+        ambito = (guild_id, juego)
+        marcadores = self._marcadores.get(ambito, {})
+        top = self._tops.get(ambito)
+        if top is None:
+            top = self._tops[ambito] = _TopK(self.tamano_top, marcadores)
+        return [(user_id, marcadores[user_id]) for _, user_id in top.entradas[:n]]
+
+    def flush(self):
+        """
+        Confirma en una sola transacción todos los incrementos pendientes. El
+        lote se toma bajo el cerrojo y se escribe fuera de él, para que
+        `record` no espere a la base de datos. Si la transacción falla, sus
+        incrementos se vuelven a sumar a los pendientes.
+        """
+        with self._escritura:
+            with self._lock:
+                pendientes, self._pendientes = self._pendientes, {}
+            if not pendientes:
+                return
+            try:
+                if self._conexion is None:
+                    raise RuntimeError("la base de datos de estadísticas está cerrada")
+                conexion = self._conexion
+                conexion.execute("BEGIN")
+                try:
+                    conexion.executemany(_UPSERT, [clave + tuple(valores) for clave, valores in pendientes.items()])
+                    conexion.execute("COMMIT")
+                except Exception:
+                    conexion.execute("ROLLBACK")
+                    raise
+            except Exception:
+                with self._lock:
+                    for clave, valores in pendientes.items():
+                        self._accumulate(clave, *valores)
+                raise
+
+    def close(self):
+        """Detiene la escritura diferida, guarda lo pendiente y cierra la base de datos."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+        if self._conexion is not None:
+            self.flush()
+            with self._escritura:  # Espera a un flush que aún esté en curso en otro hilo
+                self._conexion.close()
+                self._conexion = None
@@ -0,0 +1,202 @@
+"""
+Perfilado en caliente, opcional, de las interacciones de las partidas.
+
+Una fracción de las interacciones de componentes y modales (PERFILADO_MUESTREO)
+se ejecuta bajo cProfile. El perfilador solo está activo durante los pasos de
+la propia interacción, entre sus `await`, así que las demás tareas del bucle
+no se cuelan en su perfil. Por cada interacción muestreada se guarda:
+
+- la duración total (incluidas las esperas a Discord, al planificador o a la IA),
+- el tiempo de sus pasos en el bucle (CPU), y la diferencia es lo que esperó,
+- la memoria neta que asignaron sus pasos, si PERFILADO_MEMORIA activa tracemalloc.
+
+Aparte, con PERFILADO_CALLBACK_LENTO se activa el modo debug de asyncio, que
+avisa de cada callback que bloquea el bucle más de ese umbral; los avisos se
+recogen aquí. Las muestras y los callbacks lentos se guardan en búferes
+circulares de PERFILADO_MUESTRAS elementos.
+
+Todo se consulta y se cambia sin reiniciar con /perf (ver cogs/admin.py). La
+exportación es un fichero pstats con todas las muestras combinadas, que abren
+directamente `python -m pstats`, snakeviz o flameprof (gráfico de llamas).
+"""
+import asyncio
+import cProfile
+import logging
+import marshal
+import os
+import pstats
+import random
+import time
+import tracemalloc
+import types
+from collections import deque
+
+from config import PERFILADO_MUESTREO, PERFILADO_MEMORIA, PERFILADO_CALLBACK_LENTO, PERFILADO_MUESTRAS
+
+logger = logging.getLogger('discord_bot.profiling')
+
+muestreo = 0.0          # Fracción de interacciones perfiladas; se asigna en configure()
+memoria = False         # Si se mide la memoria de las interacciones perfiladas
+callback_lento = None   # Umbral en segundos del modo debug de asyncio, o None
+_tracemalloc_propio = False  # Si tracemalloc lo arrancó este módulo (y debe pararlo)
+
+class Muestra:
+    """Una interacción perfilada."""
+    __slots__ = ('nombre', 'instante', 'duracion', 'cpu', 'memoria', 'perfil')
+
+    def __init__(self, nombre: str, duracion: float, cpu: float, memoria, perfil: cProfile.Profile):
+        self.nombre = nombre
+        self.instante = time.time()
+        self.duracion = duracion
+        self.cpu = cpu
+        self.memoria = memoria  # Bytes netos asignados, o None si no se midió
+        self.perfil = perfil
+
+muestras = deque(maxlen=PERFILADO_MUESTRAS)
+# (instante, descripción del callback, segundos)
+callbacks_lentos = deque(maxlen=PERFILADO_MUESTRAS)
+
+# --- CONFIGURACIÓN ---
+def configure(fraccion: float = None, medir_memoria: bool = None, umbral_lento=...):
+    """
+    Cambia la configuración en caliente. Los argumentos omitidos no cambian;
+    `umbral_lento=None` desactiva el seguimiento de callbacks lentos. Se llama
+    con el bucle de eventos activo.
+    """
+    global muestreo, memoria, callback_lento, _tracemalloc_propio
+    if fraccion is not None:
+        muestreo = min(1.0, max(0.0, fraccion))
+    if medir_memoria is not None:
+        memoria = medir_memoria
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_propio = True
+        elif not memoria and _tracemalloc_propio:
+            tracemalloc.stop()
+            _tracemalloc_propio = False
+    if umbral_lento is not ...:
+        callback_lento = umbral_lento
+        bucle = asyncio.get_running_loop()
+        bucle.set_debug(umbral_lento is not None)
+        if umbral_lento is not None:
+            bucle.slow_callback_duration = umbral_lento
+    logger.info(f"Perfilado: muestreo {muestreo:.1%}, memoria {'sí' if memoria else 'no'}, "
+                f"callbacks lentos {'no' if callback_lento is None else f'> {callback_lento * 1000:.0f} ms'}.")
+
+def start():
+    """Aplica la configuración de config.py. Se llama una vez, con el bucle de eventos activo."""
+    logging.getLogger('asyncio').addHandler(_ManejadorCallbacksLentos())
+    configure(PERFILADO_MUESTREO, PERFILADO_MEMORIA, PERFILADO_CALLBACK_LENTO)
+
+def clear():
+    muestras.clear()
+    callbacks_lentos.clear()
+
+class _ManejadorCallbacksLentos(logging.Handler):
+    """Recoge los avisos de callbacks lentos que emite asyncio en modo debug."""
+    def emit(self, record: logging.LogRecord):
+        # asyncio: logger.warning('Executing %s took %.3f seconds', handle, dt)
+        if record.msg == 'Executing %s took %.3f seconds' and len(record.args) == 2:
+            callbacks_lentos.append((record.created, str(record.args[0]), record.args[1]))
+
+# --- MUESTREO ---
+def sample(nombre: str, corrutina):
+    """
+    Devuelve `corrutina` para esperarla: tal cual o, en la fracción muestreada,
+    envuelta en el perfilador. Sin perfilado activo solo cuesta una comparación.
+    """
+    if not muestreo or random.random() >= muestreo:
+        return corrutina
+    return _profiled(nombre, corrutina)
+
+async def _profiled(nombre: str, corrutina):
+    perfil = cProfile.Profile()
+    cuentas = [0.0, 0]  # Tiempo en los pasos, bytes asignados en los pasos
+    medir_memoria = memoria and tracemalloc.is_tracing()
+    inicio = time.perf_counter()
+    try:
+        return await _steps(corrutina, perfil, cuentas, medir_memoria)
+    finally:
+        muestras.append(Muestra(nombre, time.perf_counter() - inicio, cuentas[0], cuentas[1] if medir_memoria else None, perfil))
+
+@types.coroutine
+def _steps(corrutina, perfil: cProfile.Profile, cuentas: list, medir_memoria: bool):
+    """Ejecuta `corrutina` paso a paso, con el perfilador activo solo mientras corre ella."""
+    enviar, valor = corrutina.send, None
+    while True:
+        memoria_antes = tracemalloc.get_traced_memory()[0] if medir_memoria else 0
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            futuro = enviar(valor)
+        except StopIteration as fin:
+            return fin.value
+        finally:
+            perfil.disable()
+            cuentas[0] += time.perf_counter() - inicio
+            if medir_memoria:
+                cuentas[1] += tracemalloc.get_traced_memory()[0] - memoria_antes
+        # Lo que espera la corrutina (un futuro) pasa tal cual a la tarea que la ejecuta
+        try:
+            valor = yield futuro
+            enviar = corrutina.send
+        except GeneratorExit:
+            corrutina.close()
+            raise
+        except BaseException as e:  # Cancelación incluida: se reenvía a la corrutina
+            valor = e
+            enviar = corrutina.throw
+
+# --- INFORMES ---
+def _label(funcion: tuple) -> str:
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        return nombre  # Funciones de C: '<built-in method ...>'
+    return f"{os.path.basename(archivo)}:{linea}({nombre})"
+
+def _own_time(estadisticas: pstats.Stats) -> list:
+    """(función, llamadas, tiempo propio) ordenadas por tiempo propio, sin el propio perfilador."""
+    filas = [(funcion, llamadas, propio) for funcion, (_, llamadas, propio, _, _) in estadisticas.stats.items()
+             if funcion[2] != "<method 'disable' of '_lsprof.Profiler' objects>"]
+    return sorted(filas, key=lambda fila: fila[2], reverse=True)
+
+def _combined(copia: list) -> pstats.Stats:
+    return pstats.Stats(*(muestra.perfil for muestra in copia)) if copia else None
+
+def summary(n: int = 8) -> str:
+    """
+    Resumen en texto: configuración, interacciones más lentas, funciones más
+    costosas y callbacks lentos. Se puede llamar desde otro hilo: trabaja
+    sobre copias de los búferes.
+    """
+    copia, lentos = list(muestras), list(callbacks_lentos)
+    lineas = [
+        f"Perfilado: muestreo {muestreo:.1%} · memoria {'sí' if memoria else 'no'} · callbacks lentos "
+        + ('no' if callback_lento is None else f"> {callback_lento * 1000:.0f} ms"),
+        f"Interacciones perfiladas: {len(copia)} (se guardan las últimas {muestras.maxlen})",
+    ]
+    if copia:
+        lineas.append("\nMás lentas (total · en el bucle · memoria → función con más tiempo propio):")
+        for muestra in sorted(copia, key=lambda m: m.duracion, reverse=True)[:n]:
+            filas = _own_time(pstats.Stats(muestra.perfil))
+            principal = _label(filas[0][0]) if filas else '-'
+            extra = '' if muestra.memoria is None else f" · {muestra.memoria / 1024:+.1f} KB"
+            lineas.append(f"  {muestra.nombre}: {muestra.duracion * 1000:.1f} ms · {muestra.cpu * 1000:.1f} ms{extra} → {principal}")
+        lineas.append("\nFunciones con más tiempo propio (todas las muestras):")
+        for funcion, llamadas, propio in _own_time(_combined(copia))[:n]:
+            lineas.append(f"  {propio * 1000:8.2f} ms {llamadas:7d} llamadas  {_label(funcion)}")
+    if lentos:
+        lineas.append("\nCallbacks lentos del bucle (los más lentos):")
+        for instante, descripcion, segundos in sorted(lentos, key=lambda c: c[2], reverse=True)[:n]:
+            hora = time.strftime('%H:%M:%S', time.localtime(instante))
+            lineas.append(f"  {hora} {segundos * 1000:.0f} ms {descripcion[:120]}")
+    if memoria and tracemalloc.is_tracing():
+        lineas.append("\nMemoria viva por línea (tracemalloc):")
+        for estadistica in tracemalloc.take_snapshot().statistics('lineno')[:n]:
+            lineas.append(f"  {estadistica.size / 1024:9.1f} KB  {estadistica.traceback}")
+    return '\n'.join(lineas)
+
+def export() -> bytes:
+    """Todas las muestras combinadas en formato pstats (lo que escribe `Stats.dump_stats`), o b'' si no hay."""
+    combinadas = _combined(list(muestras))
+    return marshal.dumps(combinadas.stats) if combinadas is not None else b''
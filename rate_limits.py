@@ -0,0 +1,115 @@
+"""
+Límites de los comandos que abren partidas.
+
+Cada comando de juego pasa por `game_check`, un check de app_commands que se
+evalúa antes de ejecutar el comando (y, por tanto, antes de construir ninguna
+vista). Rechaza el comando si:
+
+- el usuario o su servidor ya tienen demasiadas partidas activas
+  (MAX_PARTIDAS_POR_USUARIO, MAX_PARTIDAS_POR_SERVIDOR), o
+- se ha agotado alguna de sus cubetas de fichas: la del usuario, la del
+  servidor o la del comando (LIMITE_USUARIO, LIMITE_SERVIDOR, LIMITE_COMANDO).
+
+Las cubetas viven en memoria y se recargan de forma perezosa al consultarlas:
+no hay ningún temporizador por cubeta. Las que se han llenado del todo se
+descartan, porque equivalen a no tener cubeta. Los rechazos se cuentan en
+bot_comandos_rechazados_total.
+"""
+import math
+import time
+
+import discord
+from discord import app_commands
+
+import metrics
+import partidas
+from config import (LIMITE_USUARIO, LIMITE_SERVIDOR, LIMITE_COMANDO,
+                    MAX_PARTIDAS_POR_USUARIO, MAX_PARTIDAS_POR_SERVIDOR)
+
+class TokenBuckets:
+    """Cubetas de fichas independientes por clave, todas con la misma capacidad y ritmo."""
+    def __init__(self, capacidad: float, ritmo: float):
+        self.capacidad = capacidad
+        self.ritmo = ritmo  # Fichas por segundo
+        # clave -> (fichas, instante de la última consulta). Sin entrada = cubeta llena
+        self._cubetas = {}
+        self._ultima_poda = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._cubetas)
+
+    def _tokens(self, clave, ahora: float) -> float:
+        entrada = self._cubetas.get(clave)
+        if entrada is None:
+            return self.capacidad
+        fichas, instante = entrada
+        return min(self.capacidad, fichas + (ahora - instante) * self.ritmo)
+
+    def wait_time(self, clave, ahora: float) -> float:
+        """Segundos hasta que haya una ficha para `clave` (0 si ya la hay). No consume nada."""
+        fichas = self._tokens(clave, ahora)
+        return 0.0 if fichas >= 1 else (1 - fichas) / self.ritmo
+
+    def take(self, clave, ahora: float):
+        """Consume una ficha de `clave` (hay que comprobar antes `wait_time`)."""
+        self._cubetas[clave] = (self._tokens(clave, ahora) - 1, ahora)
+        # Una cubeta se llena en capacidad / ritmo segundos: con esa frecuencia se podan las llenas
+        if ahora - self._ultima_poda > self.capacidad / self.ritmo:
+            self.prune(ahora)
+
+    def prune(self, ahora: float):
+        """Descarta las cubetas que ya se han vuelto a llenar."""
+        self._ultima_poda = ahora
+        self._cubetas = {clave: (fichas, instante) for clave, (fichas, instante) in self._cubetas.items()
+                         if fichas + (ahora - instante) * self.ritmo < self.capacidad}
+
+usuarios = TokenBuckets(*LIMITE_USUARIO)
+servidores = TokenBuckets(*LIMITE_SERVIDOR)
+comandos = TokenBuckets(*LIMITE_COMANDO)
+
+rechazos = metrics.Counter('bot_comandos_rechazados_total', 'Comandos de juego rechazados por los límites, por motivo.', ('comando', 'motivo'))
+metrics.Gauge('bot_limites_cubetas', 'Cubetas de fichas en memoria (las llenas no ocupan).', lambda: {
+    'usuario': len(usuarios), 'servidor': len(servidores), 'comando': len(comandos),
+}, ('limite',))
+
+class LimiteExcedido(app_commands.CheckFailure):
+    """Comando rechazado por un límite. El mensaje es el que se muestra al usuario."""
+    def __init__(self, motivo: str, mensaje: str):
+        super().__init__(mensaje)
+        self.motivo = motivo
+        self.mensaje = mensaje
+
+def _reject(comando: str, motivo: str, mensaje: str):
+    rechazos.inc(comando, motivo)
+    raise LimiteExcedido(motivo, mensaje)
+
+async def _check(interaction: discord.Interaction) -> bool:
+    comando = interaction.command.qualified_name if interaction.command is not None else 'desconocido'
+    user_id = interaction.user.id
+    guild_id = interaction.guild_id
+
+    # Primero los topes de partidas: no cuestan fichas
+    if partidas.activas_por_usuario[user_id] >= MAX_PARTIDAS_POR_USUARIO:
+        _reject(comando, 'partidas_usuario',
+                f"Ya tienes {MAX_PARTIDAS_POR_USUARIO} partidas en marcha. Termina alguna antes de empezar otra.")
+    if guild_id is not None and partidas.activas_por_servidor[guild_id] >= MAX_PARTIDAS_POR_SERVIDOR:
+        _reject(comando, 'partidas_servidor', "Hay demasiadas partidas en marcha en este servidor. Inténtalo en un rato.")
+
+    # Después las cubetas: solo se consume si hay ficha en todas
+    ahora = time.monotonic()
+    espera = usuarios.wait_time(user_id, ahora)
+    if espera:
+        _reject(comando, 'ritmo_usuario', f"⏳ Vas demasiado rápido. Podrás empezar otra partida en {math.ceil(espera)} s.")
+    if guild_id is not None and servidores.wait_time(guild_id, ahora):
+        _reject(comando, 'ritmo_servidor', "⏳ Se están empezando demasiadas partidas en este servidor. Inténtalo en unos segundos.")
+    if comandos.wait_time(comando, ahora):
+        _reject(comando, 'ritmo_comando', "⏳ El bot está muy ocupado ahora mismo. Inténtalo en unos segundos.")
+    usuarios.take(user_id, ahora)
+    if guild_id is not None:
+        servidores.take(guild_id, ahora)
+    comandos.take(comando, ahora)
+    return True
+
+def game_check():
+    """Decorador para los comandos que abren partidas: aplica los límites antes de ejecutarlos."""
+    return app_commands.check(_check)
@@ -0,0 +1,74 @@
+"""
+Caché de renderizado de los componentes de las partidas.
+
+Los componentes de una partida (botones del tablero, menús) solo dependen de
+una parte pequeña de su estado: en el Tres en Raya, del tablero y de si la
+partida ha terminado. Esa parte es la clave que la vista pasa a
+`PartidaView.use_template(clave, construir)` para elegir una plantilla
+compartida por todas las partidas: las filas de componentes ya
+serializadas como los diccionarios que se envían a Discord, sin el custom_id,
+que es lo único propio de cada partida (ver `PartidaView.make_custom_id`).
+
+Al fallar la caché, la plantilla se construye por el camino de siempre (la
+vista añade sus ui.Button/ui.Select y discord.py los serializa) y se congela;
+en un acierto, renderizar es una búsqueda en un diccionario más poner los
+custom_id. Las plantillas se descartan por LRU (CACHE_RENDER).
+"""
+from collections import OrderedDict
+
+import metrics
+from config import CACHE_RENDER
+
+class RenderCache:
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self._plantillas = OrderedDict()  # clave -> plantilla (ver freeze)
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self) -> int:
+        return len(self._plantillas)
+
+    def get(self, clave, construir):
+        """Plantilla de `clave`; si no está, la crea con `construir()`."""
+        plantilla = self._plantillas.get(clave)
+        if plantilla is not None:
+            self.aciertos += 1
+            self._plantillas.move_to_end(clave)
+            return plantilla
+        self.fallos += 1
+        plantilla = self._plantillas[clave] = construir()
+        if len(self._plantillas) > self.capacidad:
+            self._plantillas.popitem(last=False)
+        return plantilla
+
+    def clear(self):
+        self._plantillas.clear()
+
+cache = RenderCache(CACHE_RENDER)
+
+metrics.CounterFunc('bot_render_cache_total', 'Búsquedas en la caché de renderizado de componentes, por resultado.',
+                    lambda: {'acierto': cache.aciertos, 'fallo': cache.fallos}, ('resultado',))
+metrics.Gauge('bot_render_cache_plantillas', 'Plantillas de componentes en la caché de renderizado.', lambda: len(cache))
+
+def freeze(filas: list) -> tuple:
+    """
+    Convierte las filas serializadas de una vista en una plantilla: por fila,
+    pares (sufijo del custom_id, componente sin custom_id).
+    """
+    plantilla = []
+    for fila in filas:
+        componentes = []
+        for componente in fila['components']:
+            componente = dict(componente)
+            sufijo = componente.pop('custom_id').rpartition(':')[2]
+            componentes.append((sufijo, componente))
+        plantilla.append(tuple(componentes))
+    return tuple(plantilla)
+
+def expand(plantilla: tuple, prefijo: str) -> list:
+    """Filas listas para enviar: la plantilla con los custom_id `prefijo + sufijo`."""
+    return [
+        {'type': 1, 'components': [{**componente, 'custom_id': prefijo + sufijo} for sufijo, componente in fila]}
+        for fila in plantilla
+    ]
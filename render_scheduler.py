@@ -0,0 +1,228 @@
+"""
+Planificador central de ediciones de mensajes de partidas.
+
+Todas las ediciones diferidas de los mensajes de juego (respuestas a jugadas
+ya reconocidas con `defer` y mensajes de expiración) pasan por aquí para:
+
+1. Descartar ediciones que no cambian nada: se guarda una huella del
+   contenido y los componentes enviados por última vez a cada mensaje.
+2. Combinar ediciones al mismo mensaje dentro de una ventana corta: solo se
+   envía la última.
+3. Dar prioridad a las jugadas en vivo sobre las expiraciones.
+4. Aplicar contrapresión por ruta con un token bucket y limitar el número de
+   peticiones REST en vuelo. La ruta es la de Discord: el canal para
+   `message.edit` y el token de la interacción para
+   `interaction.edit_original_response`, que va por el webhook de la
+   interacción y no gasta el límite del canal.
+
+Las ediciones hechas fuera del planificador (por ejemplo
+`interaction.response.edit_message`, que debe ser inmediata) no actualizan la
+huella; si un mensaje se edita por ambas vías, llama a `invalidate` tras la
+edición directa.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+
+PRIORIDAD_JUGADA = 0
+PRIORIDAD_EXPIRACION = 1
+
+class _BucketRuta:
+    """Token bucket de una ruta: `capacidad` peticiones cada `periodo` segundos."""
+    __slots__ = ('capacidad', 'periodo', 'tokens', 'actualizado')
+
+    def __init__(self, capacidad: int, periodo: float):
+        self.capacidad = capacidad
+        self.periodo = periodo
+        self.tokens = float(capacidad)
+        self.actualizado = time.monotonic()
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.actualizado) * self.capacidad / self.periodo)
+        self.actualizado = ahora
+
+    def reserve(self) -> float:
+        """Consume un token y devuelve 0, o devuelve los segundos hasta que haya uno."""
+        self._recargar()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.periodo / self.capacidad
+
+    def is_idle(self) -> bool:
+        self._recargar()
+        return self.tokens >= self.capacidad
+
+class _Edicion:
+    __slots__ = ('clave', 'ruta', 'prioridad', 'enviar', 'contenido', 'view', 'futuros', 'bloqueada')
+
+    def __init__(self, clave, ruta, prioridad, enviar, contenido, view):
+        self.clave = clave
+        self.ruta = ruta
+        self.prioridad = prioridad
+        self.enviar = enviar
+        self.contenido = contenido
+        self.view = view
+        self.futuros = []
+        self.bloqueada = False
+
+class RenderScheduler:
+    """
+    Args:
+        ventana: Segundos que se espera a otras ediciones del mismo mensaje antes de enviar.
+        capacidad_ruta: Ediciones permitidas por ruta en cada `periodo_ruta`.
+        periodo_ruta: Periodo de recarga del bucket de cada ruta, en segundos.
+        max_en_vuelo: Máximo de peticiones REST de edición simultáneas.
+        max_huellas: Número de mensajes cuya última huella se recuerda (LRU).
+    """
+    def __init__(self, ventana: float = 0.05, capacidad_ruta: int = 5, periodo_ruta: float = 5.0,
+                 max_en_vuelo: int = 20, max_huellas: int = 10000):
+        self.ventana = ventana
+        self.capacidad_ruta = capacidad_ruta
+        self.periodo_ruta = periodo_ruta
+        self.max_en_vuelo = max_en_vuelo
+        self.max_huellas = max_huellas
+
+        self._pendientes = {}          # clave -> _Edicion aún no enviada
+        self._listas = []              # heap de (prioridad, secuencia, _Edicion)
+        self._secuencia = itertools.count()
+        self._en_vuelo = set()         # claves con una petición en curso
+        self._buckets = {}             # ruta -> _BucketRuta
+        self._aparcadas = {}           # ruta -> ediciones esperando a que su bucket se recargue
+        self._huellas = OrderedDict()  # clave -> huella de lo último enviado
+
+        # Contadores para monitorización
+        self.enviadas = 0
+        self.combinadas = 0
+        self.sin_cambios = 0
+
+    def submit(self, clave, ruta, enviar, contenido: str = None, view=None,
+               prioridad: int = PRIORIDAD_JUGADA) -> asyncio.Future:
+        """
+        Programa una edición y devuelve un futuro que se resuelve al enviarla.
+
+        Args:
+            clave: Identificador del mensaje (normalmente su ID).
+            ruta: Clave del bucket de rate limit: el ID del canal, o el token de la interacción si se edita por su webhook.
+            enviar: Función sin argumentos que devuelve la corrutina que edita el mensaje.
+            contenido: Contenido del mensaje, usado para detectar ediciones sin cambios.
+            view: Vista del mensaje, usada para detectar ediciones sin cambios.
+            prioridad: PRIORIDAD_JUGADA o PRIORIDAD_EXPIRACION.
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        edicion = self._pendientes.get(clave)
+        if edicion is not None:
+            # Combinar con la edición pendiente: gana el estado más reciente
+            self.combinadas += 1
+            edicion.enviar = enviar
+            edicion.contenido = contenido
+            edicion.view = view
+            edicion.futuros.append(futuro)
+            if prioridad < edicion.prioridad:
+                edicion.prioridad = prioridad
+                self._push(edicion)
+            return futuro
+
+        edicion = _Edicion(clave, ruta, prioridad, enviar, contenido, view)
+        edicion.futuros.append(futuro)
+        self._pendientes[clave] = edicion
+        asyncio.get_running_loop().call_later(self.ventana, self._push, edicion)
+        return futuro
+
+    def invalidate(self, clave):
+        """Olvida la huella de un mensaje editado fuera del planificador."""
+        self._huellas.pop(clave, None)
+
+    def _push(self, edicion: _Edicion):
+        if self._pendientes.get(edicion.clave) is not edicion:
+            return
+        heapq.heappush(self._listas, (edicion.prioridad, next(self._secuencia), edicion))
+        self._pump()
+
+    def _pump(self):
+        """Despacha ediciones listas mientras haya capacidad."""
+        while self._listas and len(self._en_vuelo) < self.max_en_vuelo:
+            _, _, edicion = heapq.heappop(self._listas)
+            clave = edicion.clave
+            if self._pendientes.get(clave) is not edicion:
+                continue  # Entrada obsoleta (ya enviada o reprogramada)
+            if clave in self._en_vuelo:
+                # Se reencola cuando termine la petición en curso, para mantener el orden
+                edicion.bloqueada = True
+                continue
+
+            try:
+                huella = self._fingerprint(edicion)
+            except Exception as e:
+                del self._pendientes[clave]
+                self._resolve(edicion, error=e)
+                continue
+            if self._huellas.get(clave) == huella:
+                # Nada ha cambiado desde el último envío: no hace falta petición REST
+                del self._pendientes[clave]
+                self.sin_cambios += 1
+                self._resolve(edicion)
+                continue
+
+            ruta = edicion.ruta
+            aparcadas = self._aparcadas.get(ruta)
+            if aparcadas is not None:
+                aparcadas.append(edicion)  # Ya hay ediciones esperando al bucket de esta ruta
+                continue
+            bucket = self._buckets.get(ruta)
+            if bucket is None:
+                bucket = self._buckets[ruta] = _BucketRuta(self.capacidad_ruta, self.periodo_ruta)
+            espera = bucket.reserve()
+            if espera > 0:
+                self._aparcadas[ruta] = [edicion]
+                asyncio.get_running_loop().call_later(espera, self._wake_route, ruta)
+                continue
+
+            del self._pendientes[clave]
+            self._en_vuelo.add(clave)
+            asyncio.create_task(self._send(edicion, huella))
+
+    def _wake_route(self, ruta):
+        """Devuelve al heap las ediciones aparcadas de una ruta cuando su bucket tiene hueco."""
+        for edicion in self._aparcadas.pop(ruta, ()):
+            if self._pendientes.get(edicion.clave) is edicion:
+                heapq.heappush(self._listas, (edicion.prioridad, next(self._secuencia), edicion))
+        self._pump()
+
+    def _fingerprint(self, edicion: _Edicion):
+        componentes = repr(edicion.view.to_components()) if edicion.view is not None else None
+        return (edicion.contenido, componentes)
+
+    @staticmethod
+    def _resolve(edicion: _Edicion, error: Exception = None):
+        for futuro in edicion.futuros:
+            if not futuro.done():
+                if error is None:
+                    futuro.set_result(None)
+                else:
+                    futuro.set_exception(error)
+
+    async def _send(self, edicion: _Edicion, huella):
+        clave = edicion.clave
+        try:
+            await edicion.enviar()
+            self.enviadas += 1
+            self._huellas[clave] = huella
+            self._huellas.move_to_end(clave)
+            if len(self._huellas) > self.max_huellas:
+                self._huellas.popitem(last=False)
+            self._resolve(edicion)
+        except Exception as e:
+            self._resolve(edicion, error=e)
+        finally:
+            self._en_vuelo.discard(clave)
+            siguiente = self._pendientes.get(clave)
+            if siguiente is not None and siguiente.bloqueada:
+                siguiente.bloqueada = False
+                heapq.heappush(self._listas, (siguiente.prioridad, next(self._secuencia), siguiente))
+            if len(self._buckets) > self.max_huellas:
+                self._buckets = {ruta: b for ruta, b in self._buckets.items() if not b.is_idle()}
+            self._pump()
@@ -0,0 +1,85 @@
+"""
+Línea de tiempo del arranque del bot.
+
+Mide el arranque en frío desde que se importa este módulo (debe ser la primera
+importación de main.py): hitos como el fin de las importaciones, el login o el
+primer `on_ready`, y la duración de fases concretas como la carga de cada
+extensión. Al terminar el arranque se escribe un resumen en el log y en un
+archivo JSON, y se compara con el arranque anterior para que una regresión se
+vea en el momento.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('discord_bot.arranque')
+
+UMBRAL_REGRESION = 1.5  # Se avisa si el arranque tarda más que esto por el anterior...
+MARGEN_REGRESION = 0.5  # ...y al menos estos segundos más
+
+_INICIO = time.perf_counter()
+_hitos = {}       # nombre -> segundos desde el inicio
+_duraciones = {}  # nombre -> segundos que duró la fase
+_terminado = False
+
+def elapsed() -> float:
+    """Segundos transcurridos desde el inicio del arranque."""
+    return time.perf_counter() - _INICIO
+
+def milestone(nombre: str):
+    """Anota que el arranque ha llegado a un hito (solo cuenta la primera vez)."""
+    if not _terminado:
+        _hitos.setdefault(nombre, elapsed())
+
+@contextmanager
+def measure(nombre: str):
+    """Mide la duración del bloque como una fase del arranque."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if not _terminado:
+            _duraciones[nombre] = time.perf_counter() - inicio
+
+def to_dict() -> dict:
+    return {
+        'hitos': dict(_hitos),
+        'duraciones': dict(_duraciones),
+        'total': max(_hitos.values(), default=0.0),
+    }
+
+def summary() -> str:
+    partes = [f"{nombre} {segundos:.2f}s" for nombre, segundos in sorted(_hitos.items(), key=lambda h: h[1])]
+    partes += [f"{nombre} {segundos * 1000:.0f}ms" for nombre, segundos in _duraciones.items()]
+    return " | ".join(partes)
+
+def _load(ruta: str) -> dict:
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def finish(ruta: str) -> dict:
+    """
+    Cierra la línea de tiempo: la registra en el log, la compara con la del
+    arranque anterior guardada en `ruta` y la guarda en su lugar. Solo tiene
+    efecto la primera vez; devuelve la línea de tiempo, o None si ya se cerró.
+    """
+    global _terminado
+    if _terminado:
+        return None
+    _terminado = True
+    actual = to_dict()
+    logger.info(f"Arranque en {actual['total']:.2f}s: {summary()}")
+
+    anterior = _load(ruta).get('total')
+    if anterior and actual['total'] > anterior * UMBRAL_REGRESION and actual['total'] - anterior > MARGEN_REGRESION:
+        logger.warning(f"El arranque ha tardado {actual['total']:.2f}s, frente a {anterior:.2f}s la vez anterior.")
+    try:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(actual, f, indent=2)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar la línea de tiempo del arranque en {ruta}: {e}")
+    return actual
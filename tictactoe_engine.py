@@ -0,0 +1,110 @@
+"""
+Motor de Tres en Raya basado en bitboards.
+
+El tablero se representa con dos máscaras de 9 bits (una por jugador), donde el
+bit ``i`` corresponde a la casilla ``i`` (0..8, por filas). Al importar el
+módulo se precalcula con negamax el valor de todas las posiciones alcanzables,
+de modo que consultar el ganador, el empate o la mejor jugada de la IA se
+reduce a una búsqueda en tablas.
+"""
+import random
+
+TABLERO_LLENO = 0x1FF
+
+LINEAS_GANADORAS = tuple(
+    (1 << a) | (1 << b) | (1 << c)
+    for a, b, c in ((0,1,2),(3,4,5),(6,7,8),(0,3,6),(1,4,7),(2,5,8),(0,4,8),(2,4,6))
+)
+
+# GANA[mascara] es 1 si la máscara contiene alguna línea completa.
+GANA = bytes(
+    1 if any(mascara & linea == linea for linea in LINEAS_GANADORAS) else 0
+    for mascara in range(TABLERO_LLENO + 1)
+)
+
+# Puntuaciones negamax desde el punto de vista del jugador que mueve.
+# Las victorias más rápidas valen más que las lentas.
+VICTORIA = 10
+
+# Niveles de dificultad: peso relativo de las jugadas según su resultado
+# teórico (ganadora, de empate, perdedora). 'dificil' juega de forma perfecta.
+NIVELES = {
+    "facil": (2, 2, 1),
+    "normal": (12, 4, 1),
+    "dificil": (1, 0, 0),
+}
+NIVEL_POR_DEFECTO = "normal"
+
+# TABLA[(propia, rival)] -> tupla de (casilla, puntuación) para el jugador que mueve.
+TABLA = {}
+
+
+def _negamax(propia: int, rival: int) -> int:
+    """Rellena TABLA para la posición dada y devuelve su valor para quien mueve."""
+    clave = (propia, rival)
+    jugadas = TABLA.get(clave)
+    if jugadas is not None:
+        return max((p for _, p in jugadas), default=0)
+
+    ocupadas = propia | rival
+    profundidad = bin(ocupadas).count("1")
+    puntuadas = []
+    for casilla in range(9):
+        bit = 1 << casilla
+        if ocupadas & bit:
+            continue
+        nueva = propia | bit
+        if GANA[nueva]:
+            puntuacion = VICTORIA - profundidad
+        elif (nueva | rival) == TABLERO_LLENO:
+            puntuacion = 0
+        else:
+            puntuacion = -_negamax(rival, nueva)
+        puntuadas.append((casilla, puntuacion))
+
+    TABLA[clave] = tuple(puntuadas)
+    return max((p for _, p in puntuadas), default=0)
+
+
+_negamax(0, 0)
+
+
+def is_winner(mascara: int) -> bool:
+    """Indica si la máscara de un jugador contiene una línea ganadora."""
+    return bool(GANA[mascara])
+
+
+def is_full(mascara_a: int, mascara_b: int) -> bool:
+    """Indica si no quedan casillas libres."""
+    return (mascara_a | mascara_b) == TABLERO_LLENO
+
+
+def scored_moves(propia: int, rival: int) -> tuple:
+    """Devuelve las jugadas legales con su puntuación negamax para quien mueve."""
+    jugadas = TABLA.get((propia, rival))
+    if jugadas is None:
+        # Posición no alcanzable desde una partida normal (p. ej. turnos
+        # alterados): se calcula bajo demanda y queda memorizada.
+        _negamax(propia, rival)
+        jugadas = TABLA[(propia, rival)]
+    return jugadas
+
+
+def best_move(propia: int, rival: int, nivel: str = NIVEL_POR_DEFECTO) -> int:
+    """
+    Elige la jugada de la IA según el nivel de dificultad.
+
+    Devuelve -1 si no quedan casillas libres.
+    """
+    jugadas = scored_moves(propia, rival)
+    if not jugadas:
+        return -1
+
+    pesos_nivel = NIVELES.get(nivel, NIVELES[NIVEL_POR_DEFECTO])
+    if pesos_nivel == NIVELES["dificil"]:
+        mejor = max(p for _, p in jugadas)
+        return random.choice([c for c, p in jugadas if p == mejor])
+
+    gana, empata, pierde = pesos_nivel
+    pesos = [gana if p > 0 else empata if p == 0 else pierde for _, p in jugadas]
+    return random.choices([c for c, _ in jugadas], weights=pesos)[0]
@@ -0,0 +1,104 @@
+"""
+Rueda de temporizadores jerárquica.
+
+Sustituye a un temporizador del bucle de eventos por partida (call_later, un
+heap con O(log n) por operación) cuando hay muchísimas partidas aparcadas.
+El tiempo se divide en ticks de `resolucion` segundos y cada nivel es una
+rueda de `ranuras` ranuras: el nivel 0 cubre los próximos `ranuras` ticks, el
+nivel 1 los próximos `ranuras`² en bloques de `ranuras` ticks, y así. Cada
+ranura es un dict, así que programar y cancelar son O(1). Al avanzar, las
+ranuras de los niveles superiores se reparten en los inferiores cuando les
+llega el turno, y cada tick devuelve de una vez todo lo que vence en él.
+
+Los instantes son de reloj de pared (time.time()), como `expira_en` de las
+partidas guardadas, así que sobreviven a un reinicio.
+"""
+import time
+
+class TimerWheel:
+    def __init__(self, resolucion: float = 1.0, ranuras: int = 64, niveles: int = 3):
+        self.resolucion = resolucion
+        self.ranuras = ranuras
+        self.niveles = niveles
+        # _ruedas[nivel][ranura] -> {clave: valor}
+        self._ruedas = [[{} for _ in range(ranuras)] for _ in range(niveles)]
+        # Más allá del último nivel: se recolocan cada vez que da la vuelta
+        self._lejanos = {}
+        # clave -> dict de la ranura en la que está
+        self._ubicacion = {}
+        self._tick = int(time.time() / resolucion)  # Último tick procesado
+
+    def __len__(self) -> int:
+        return len(self._ubicacion)
+
+    def __contains__(self, clave) -> bool:
+        return clave in self._ubicacion
+
+    def schedule(self, clave, instante: float, valor=None):
+        """Programa (o reprograma) `clave` para que venza en `instante` (epoch)."""
+        self.cancel(clave)
+        # Nunca en el tick actual, que ya se procesó: como pronto en el siguiente
+        self._place(clave, max(int(instante / self.resolucion), self._tick + 1), valor)
+
+    def cancel(self, clave) -> bool:
+        """Cancela `clave`. Devuelve False si no estaba programada."""
+        ranura = self._ubicacion.pop(clave, None)
+        if ranura is None:
+            return False
+        del ranura[clave]
+        return True
+
+    def _place(self, clave, tick: int, valor):
+        # Nivel más bajo en el que `tick` y el tick actual comparten todos los dígitos superiores
+        actual = self._tick
+        escala = 1
+        for nivel in range(self.niveles):
+            siguiente = escala * self.ranuras
+            if tick // siguiente == actual // siguiente:
+                ranura = self._ruedas[nivel][(tick // escala) % self.ranuras]
+                break
+            escala = siguiente
+        else:
+            ranura = self._lejanos
+        ranura[clave] = (tick, valor)
+        self._ubicacion[clave] = ranura
+
+    def _cascade(self, ranura: dict):
+        entradas = list(ranura.items())
+        ranura.clear()
+        for clave, (tick, valor) in entradas:
+            self._place(clave, tick, valor)
+
+    def advance(self, ahora: float = None) -> list:
+        """
+        Avanza la rueda hasta `ahora` y devuelve los valores de todo lo que ha
+        vencido, en una sola lista. Lo vencido deja de estar programado.
+        """
+        ahora = time.time() if ahora is None else ahora
+        objetivo = int(ahora / self.resolucion)
+        vencidos = []
+        ranuras = self.ranuras
+        while self._tick < objetivo:
+            self._tick += 1
+            tick = self._tick
+            # Se recoloca de arriba abajo lo que ahora cae en un nivel inferior
+            escala = ranuras ** self.niveles
+            if tick % escala == 0 and self._lejanos:
+                self._cascade(self._lejanos)
+            for nivel in range(self.niveles - 1, 0, -1):
+                escala //= ranuras
+                if tick % escala == 0:
+                    ranura = self._ruedas[nivel][(tick // escala) % ranuras]
+                    if ranura:
+                        self._cascade(ranura)
+            ranura = self._ruedas[0][tick % ranuras]
+            if ranura:
+                for clave, (_, valor) in ranura.items():
+                    del self._ubicacion[clave]
+                    vencidos.append(valor)
+                ranura.clear()
+        return vencidos
+
+    def next_tick(self) -> float:
+        """Instante (epoch) en que empieza el siguiente tick."""
+        return (self._tick + 1) * self.resolucion